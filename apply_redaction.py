@@ -1,10 +1,17 @@
 # apply_redaction.py
 # Generate LOW, MEDIUM, and HIGH redactions in 3 folders in one run.
 
-import json, re
+import re, sys
 from pathlib import Path
 
-PREDS = "preds_fixed.json"
+from manifest import Manifest, content_hash, file_hash, tool_version
+from policy_render import SegmentRenderer
+import pred_store
+from span_types import to_dicts
+from textnorm import FIX_PREDS, project_spans
+import trace_events
+
+PREDS = "preds_fixed.json"  # --preds FILE: .json, .spans store or .jsonl (pred_store.py)
 RTIS = "rtis"
 OUT = "redacted_policy"  # base prefix: redacted_policy_LOW, etc.
 
@@ -82,62 +89,90 @@ def mask_high(label, s):
 # ------------------------
 # REDACTOR
 # ------------------------
-def apply_policy_to_text(text, spans, mode):
-    s = str(text)
-    spans = sorted(spans, key=lambda x: x["start"], reverse=True)
+@trace_events.timed("apply_policy_to_text")
+def apply_policy_to_text(text, spans, mode, out=None):
+    """
+    Replace every span by its policy mask. Spans are applied from the end of the
+    document backwards, exactly like s = s[:st] + repl + s[ed:] one span at a time,
+    but the output is assembled from slices in one pass (see policy_render.py).
+    With `out` (a text file handle) the result is written there instead of returned.
+    """
+    r = SegmentRenderer(str(text))
+    spans = sorted(spans, key=lambda x: x.start, reverse=True)
+
+    if mode == "LOW":
+        mask = mask_low
+    elif mode == "HIGH":
+        mask = mask_high
+    else:
+        mask = mask_medium
 
     for sp in spans:
-        label = sp["label"]
-        st = sp["start"]
-        ed = sp["end"]
+        label = sp.label
+        st = sp.start
+        ed = sp.end
 
-        if st < 0 or ed > len(s) or st >= ed:
+        if st < 0 or ed > len(r) or st >= ed:
             continue
 
-        snippet = s[st:ed]
-
-        if mode == "LOW":
-            repl = mask_low(label, snippet)
-        elif mode == "HIGH":
-            repl = mask_high(label, snippet)
-        else:
-            repl = mask_medium(label, snippet)
-
-        s = s[:st] + repl + s[ed:]
+        r.replace(st, ed, lambda snippet, label=label: mask(label, snippet))
 
-    # formatting cleanup
-    s = re.sub(r"\]\s*\[", "] [", s)
-    return s
+    # formatting cleanup ("] [") happens in render()/write()
+    if out is not None:
+        r.write(out)
+        return None
+    return r.render()
 
 
 # ------------------------
 # MAIN: run ALL 3 policies
 # ------------------------
-def main():
-    preds = json.loads(Path(PREDS).read_text(encoding="utf-8"))
+def main(full=False, preds_path=PREDS):
+    preds = pred_store.Records(preds_path)  # JSONL: re-read record by record for every mode
     modes = ["LOW", "MEDIUM", "HIGH"]
+    # incremental: a redacted file is rewritten only if its spans, its source text,
+    # this script or the file itself changed since it was written (full=True: all)
+    manifest = Manifest("apply_redaction", tool_version("apply_redaction.py", "policy_render.py", "textnorm.py"))
+    src_hashes = {}
 
     for mode in modes:
         outdir = Path(f"{OUT}_{mode}")
         outdir.mkdir(exist_ok=True)
 
         print(f"\n=== Generating {mode} redactions... ===")
-        count = 0
+        count = skipped = 0
 
-        for fname, spans in preds.items():
+        for fname, spans in preds:
             src = Path(RTIS) / fname
             if not src.exists():
                 continue
 
-            text = src.read_text(encoding="utf-8")
-            redacted = apply_policy_to_text(text, spans, mode)
-            (outdir / fname).write_text(redacted, encoding="utf-8")
+            if fname not in src_hashes:
+                src_hashes[fname] = file_hash(src)
+            key, input_hash = f"{mode}/{fname}", content_hash(to_dicts(spans), src_hashes[fname])
+            if not full and manifest.fresh(key, input_hash):
+                skipped += 1
+                continue
+
+            with trace_events.stage("policy_file", doc=fname, mode=mode):
+                with trace_events.stage("read"):
+                    text = src.read_text(encoding="utf-8")
+                # fix_preds offsets are on its normalized text (collapsed spaces,
+                # no zero-width chars); redact the original file at the same places
+                with trace_events.stage("offset_map"):
+                    _, offsets = FIX_PREDS.normalize_with_map(text)
+                with open(outdir / fname, "w", encoding="utf-8") as fh:
+                    apply_policy_to_text(text, project_spans(spans, offsets), mode, out=fh)
+            manifest.record(key, input_hash, [outdir / fname])
             count += 1
 
-        print(f"✓ {mode}: Saved {count} files → {outdir}")
+        print(f"✓ {mode}: Saved {count} files → {outdir} ({skipped} unchanged)")
 
+    manifest.prune(f"{mode}/{fname}" for mode in modes for fname in preds.names())
+    manifest.save()
     print("\nAll policies generated successfully.")
 
 
 if __name__ == "__main__":
-    main()
+    trace_events.from_argv()  # --trace FILE: per-file stage timings (Chrome trace JSON)
+    main(full="--full" in sys.argv, preds_path=pred_store.path_from_argv(PREDS))
@@ -1,8 +1,14 @@
 # apply_redaction_safe.py
-import json, re
+import re
 from pathlib import Path
 
-PREDS = "preds_clean.json"
+from policy_render import SegmentRenderer
+import pred_store
+from span_types import coded
+from textnorm import COLLAPSE_SPACES, project_spans
+import trace_events
+
+PREDS = "preds_clean.json"  # --preds FILE: .json, .spans store or .jsonl (pred_store.py)
 RTIS = "rtis"
 OUT = "redacted_policy"
 
@@ -65,48 +71,49 @@ def mask_high(label, s):
 # ------------------------
 # Apply clean non-overlapping replacements safely
 # ------------------------
-def apply_policy_to_text(text, spans, mode):
+@trace_events.timed("apply_policy_to_text")
+def apply_policy_to_text(text, spans, mode, out=None):
     s = str(text)
     # ensure spans sorted by start ascending
-    spans = sorted(spans, key=lambda x: x["start"])
+    spans = sorted(spans, key=lambda x: x.start)
     # defensive: collapse any tiny overlaps (shouldn't exist after cleaning)
     safe_spans = []
     for sp in spans:
-        st, ed = int(sp["start"]), int(sp["end"])
+        st, ed = int(sp.start), int(sp.end)
         if st < 0 or ed > len(s) or st >= ed:
             continue
-        if safe_spans and st < safe_spans[-1]["end"]:
+        if safe_spans and st < safe_spans[-1].end:
             # overlap with previous -> clip or merge conservatively
             prev = safe_spans[-1]
-            if sp["label"] == prev["label"]:
-                prev["end"] = max(prev["end"], ed)
+            if sp.code == prev.code:
+                prev.end = max(prev.end, ed)
             else:
                 # clip the earlier one to avoid cross-label mashup: keep larger
-                len_prev = prev["end"] - prev["start"]
+                len_prev = prev.end - prev.start
                 len_sp = ed - st
                 if len_sp > len_prev:
                     # replace prev with sp
-                    safe_spans[-1] = {"start": st, "end": ed, "label": sp["label"], "text": sp.get("text","")}
+                    safe_spans[-1] = coded(st, ed, sp.code)
                 else:
                     # drop/clip sp to non-overlapping tail
-                    if ed > prev["end"]:
-                        sp["start"] = prev["end"]
+                    if ed > prev.end:
+                        sp.start = prev.end
                         safe_spans.append(sp)
                     # else drop sp
         else:
-            safe_spans.append({"start": st, "end": ed, "label": sp["label"], "text": sp.get("text","")})
+            safe_spans.append(coded(st, ed, sp.code))
 
     # build replacements in reverse order
     repls = []
     for sp in reversed(safe_spans):
-        st, ed = sp["start"], sp["end"]
+        st, ed = sp.start, sp.end
         snippet = s[st:ed]
         if mode == "LOW":
-            replacement = mask_low(sp["label"], snippet)
+            replacement = mask_low(sp.label, snippet)
         elif mode == "HIGH":
-            replacement = mask_high(sp["label"], snippet)
+            replacement = mask_high(sp.label, snippet)
         else:
-            replacement = mask_medium(sp["label"], snippet)
+            replacement = mask_medium(sp.label, snippet)
         # keep surrounding spacing tidy
         # if snippet had leading/trailing newline, preserve one newline
         lead = "\n" if snippet[:1] == "\n" else ""
@@ -114,31 +121,40 @@ def apply_policy_to_text(text, spans, mode):
         # avoid crushing previous bracket to preceding token
         repls.append((st, ed, lead + replacement + trail))
 
-    # apply
+    # apply (from slices, in one pass; see policy_render.py)
+    r = SegmentRenderer(s)
     for st, ed, rep in repls:
-        s = s[:st] + rep + s[ed:]
+        r.replace(st, ed, rep)
     # final tidy: collapse "][ " into "] ["
-    s = re.sub(r"\]\s*\[", "] [", s)
-    return s
+    if out is not None:
+        r.write(out)
+        return None
+    return r.render()
 
-def main():
-    preds = json.loads(Path(PREDS).read_text(encoding="utf-8"))
+def main(preds_path=PREDS):
+    preds = pred_store.Records(preds_path)  # JSONL: re-read record by record for every mode
     modes = ["LOW", "MEDIUM", "HIGH"]
     for mode in modes:
         outdir = Path(f"{OUT}_{mode}")
         outdir.mkdir(exist_ok=True)
         print(f"\n=== Generating {mode} redactions... ===")
         count = 0
-        for fname, spans in preds.items():
+        for fname, spans in preds:
             src = Path(RTIS) / fname
             if not src.exists():
                 continue
-            text = src.read_text(encoding="utf-8")
-            redacted = apply_policy_to_text(text, spans, mode)
-            (outdir / fname).write_text(redacted, encoding="utf-8")
+            with trace_events.stage("policy_file", doc=fname, mode=mode):
+                with trace_events.stage("read"):
+                    text = src.read_text(encoding="utf-8")
+                # clean_preds offsets are on its normalized text: map them onto the file
+                with trace_events.stage("offset_map"):
+                    _, offsets = COLLAPSE_SPACES.normalize_with_map(text)
+                with open(outdir / fname, "w", encoding="utf-8") as fh:
+                    apply_policy_to_text(text, project_spans(spans, offsets), mode, out=fh)
             count += 1
         print(f"✓ {mode}: Saved {count} files → {outdir}")
     print("\nAll policies generated successfully.")
 
 if __name__ == "__main__":
-    main()
+    trace_events.from_argv()  # --trace FILE: per-file stage timings (Chrome trace JSON)
+    main(pred_store.path_from_argv(PREDS))
@@ -0,0 +1,120 @@
+# bench_cue_index.py
+# cue_index.CueIndex vs the per-span checks fix_preds.py made before it (a PERSON
+# span is dropped if its lowercased text contains an address keyword; a PIN needs
+# a pin/zip cue word within 20 chars): the same answers on rtis/ and synthetic
+# documents, through the window patterns and through the one-pass index; then the
+# time of fix_preds' queries per document, old checks vs CueIndex (built per
+# document, as fix_preds does) vs an index built up front, for few and many spans.
+# Usage: python bench_cue_index.py [n_docs]
+import re
+import sys
+import time
+import random
+import pathlib
+
+import synth_corpus
+from cue_index import ADDRESS_KEYWORDS, CueIndex
+from textnorm import FIX_PREDS
+
+PIN_CUE = re.compile(r'\b(pin|pincode|pincode:|pin:|postcode|zip|pin-)\b')
+
+
+# -------------------- LEGACY CHECKS --------------------
+def legacy_address(text, lo, hi):
+    txt = text[lo:hi].lower()
+    return any(kw in txt for kw in ADDRESS_KEYWORDS)
+
+
+def legacy_pin(text, nst, ned):
+    left = text[max(0, nst-20):nst].lower()
+    right = text[ned:min(len(text), ned+20)].lower()
+    return bool(PIN_CUE.search(left + " " + right))
+
+
+def new_pin(cues, text, nst, ned):
+    return (cues.any_word_within("pin", max(0, nst-20), nst)
+            or cues.any_word_within("pin", ned, min(len(text), ned+20)))
+
+
+# -------------------- QUERIES --------------------
+def queries(rng, text, n):
+    """fix_preds' query mix: ("person", start, end) spans and ("pin", start, end) 6-digit spans."""
+    out = []
+    for m in re.finditer(r'\b\d{6}\b', text):
+        out.append(("pin", m.start(), m.end()))
+    for _ in range(n):
+        st = rng.randrange(len(text) + 1)
+        out.append(("person", st, min(len(text), st + rng.randrange(3, 40))))
+    rng.shuffle(out)
+    return out[:n]
+
+
+def legacy_answers(text, qs):
+    return [legacy_address(text, st, ed) if kind == "person" else legacy_pin(text, st, ed) for kind, st, ed in qs]
+
+
+def new_answers(cues, text, qs):
+    return [cues.any_within("address", st, ed) if kind == "person" else new_pin(cues, text, st, ed)
+            for kind, st, ed in qs]
+
+
+def up_front(text):
+    cues = CueIndex(text)
+    cues._index()
+    return cues
+
+
+def check(rng, text):
+    qs = queries(rng, text, 200)
+    want = legacy_answers(text, qs)
+    assert new_answers(CueIndex(text), text, qs) == want
+    assert new_answers(up_front(text), text, qs) == want
+
+
+def timed(fn, repeat=3):
+    t = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        t = min(t, time.perf_counter() - t0)
+    return t
+
+
+def main():
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rng = random.Random(0)
+    rtis = [FIX_PREDS.normalize(p.read_text(encoding="utf-8")) for p in sorted(pathlib.Path("rtis").glob("*.txt"))]
+    synth = [d["text"] for d in synth_corpus.generate(n_docs)]
+    for text in rtis + synth:
+        check(rng, text)
+    # cue words glued to letters / digits / Devanagari, upper case, at the window edges
+    for _ in range(n_docs):
+        text = "".join(rng.choice(["PIN", "pin:", "Zip", "pincode", "xpin", "पिन", " ", "\n", "-", "110001",
+                                   "Road", "st", "नगर", "a", "_"]) for _ in range(60))
+        check(rng, text)
+    print(f"{len(rtis)} rtis/ + {2 * n_docs} synthetic documents: same answers as the per-span checks")
+
+    print("\n{:>10} {:>7} {:>10} {:>10} {:>10}".format("chars", "spans", "old s", "CueIndex s", "up front s"))
+    pool = iter(synth_corpus.generate(10 ** 6, seed=1))
+    cases = [(sum(map(len, rtis)) // len(rtis), 5, "rtis/ doc")]
+    cases += [(100_000, 5, ""), (100_000, 500, ""), (1_000_000, 50, ""), (1_000_000, 5000, ""), (20_000, 5000, "")]
+    for size, n_spans, name in cases:
+        if name:
+            docs = rtis
+        else:
+            parts, total = [], 0
+            while total < size:
+                parts.append(next(pool)["text"])
+                total += len(parts[-1]) + 1
+            docs = ["\n".join(parts)[:size]]
+        work = [(text, queries(rng, text, n_spans)) for text in docs]
+        t_old = timed(lambda: [legacy_answers(text, qs) for text, qs in work])
+        t_new = timed(lambda: [new_answers(CueIndex(text), text, qs) for text, qs in work])
+        t_up = timed(lambda: [new_answers(up_front(text), text, qs) for text, qs in work])
+        label = name or f"{size:,}"
+        print("{:>10} {:>7} {:>10.5f} {:>10.5f} {:>10.5f}".format(label, n_spans, t_old / len(work),
+                                                                  t_new / len(work), t_up / len(work)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# bench_e2e.py
+# End-to-end throughput on a synthetic corpus (synth_corpus.py): docs/s, MB/s and
+# peak RSS of every pipeline stage, from raw text to evaluation against the
+# generated gold spans. Documents are generated and processed in blocks, so 1M
+# documents run in bounded memory; each stage is timed on each block.
+# MB/s counts the UTF-8 bytes of the block's raw text (normalize) or normalized
+# text (all other stages). Peak RSS is the high-water mark while the stage ran
+# (Linux: VmHWM, reset before every stage) and includes the block itself; on
+# other systems it falls back to ru_maxrss, the peak of the whole run so far.
+# spacy_spans / hf_spans are skipped when en_core_web_sm / the XLM-R model are
+# not available.
+# Usage: python bench_e2e.py [n_docs] [--block 5000] [--chars 200-1200]
+#        [--langs en,hi,hinglish] [--level strong] [--json report.json]
+import json
+import time
+import argparse
+
+import apply_redaction
+import redact_demo_updated as R
+import synth_corpus
+from eval_script import match_counts, metrics
+from memstats import peak_rss_mb, reset_peak_rss
+from span_resolve import dedupe_levels
+from span_types import from_dicts
+from textnorm import normalize_text
+
+STAGES = ["normalize", "rule_spans", "line_spans", "spacy_spans", "hf_spans", "combine", "apply_policy", "evaluate"]
+POLICY_MODES = ["LOW", "MEDIUM", "HIGH"]
+
+
+# -------------------- STAGES --------------------
+def detectors_available(level):
+    """{"spacy": bool, "hf": bool} for the detectors `level` would use."""
+    have = {"spacy": False, "hf": False}
+    if level in ("medium", "strong"):
+        try:
+            R.DETECTORS.get("spacy")
+            have["spacy"] = True
+        except Exception:
+            pass
+    if level == "strong":
+        have["hf"] = R.DETECTORS.get("hf_engine") is not None
+    return have
+
+
+def run_block(block, have, totals):
+    """Every stage over one block of generated documents; adds to totals[stage]."""
+    state = {}
+
+    def stage(name, fn, nbytes):
+        reset_peak_rss()
+        t0 = time.perf_counter()
+        state[name] = fn()
+        secs = time.perf_counter() - t0
+        t = totals[name]
+        t["seconds"] += secs
+        t["docs"] += len(block)
+        t["bytes"] += nbytes
+        t["peak_rss_mb"] = max(t["peak_rss_mb"], peak_rss_mb())
+
+    raw_bytes = sum(len(d["raw"].encode("utf-8")) for d in block)
+    stage("normalize", lambda: [normalize_text(d["raw"]) for d in block], raw_bytes)
+    texts = state["normalize"]
+    nbytes = sum(len(t.encode("utf-8")) for t in texts)
+    stage("rule_spans", lambda: [R.rule_spans(t) for t in texts], nbytes)
+    stage("line_spans", lambda: [R.line_spans(t) for t in texts], nbytes)
+    increments = [[r + l for r, l in zip(state["rule_spans"], state["line_spans"])]]
+    if have["spacy"]:
+        stage("spacy_spans", lambda: list(R.spacy_spans_batch(texts)), nbytes)
+        increments.append(state["spacy_spans"])
+    if have["hf"]:
+        stage("hf_spans", lambda: R.hf_spans_batch(texts), nbytes)
+        increments.append(state["hf_spans"])
+    # preds of the highest level produced, as redact_text_levels hands to eval
+    stage("combine", lambda: [dedupe_levels(inc, len(t))[-1] for inc, t in zip(zip(*increments), texts)], nbytes)
+    preds = state["combine"]
+    # rendered text is only measured, not kept (the pipeline writes it out)
+    stage("apply_policy", lambda: sum(len(apply_redaction.apply_policy_to_text(t, p, mode))
+                                      for t, p in zip(texts, preds) for mode in POLICY_MODES), nbytes)
+    gold = {d["name"]: from_dicts(d["spans"]) for d in block}
+    stage("evaluate", lambda: match_counts(gold, {d["name"]: p for d, p in zip(block, preds)})[0], nbytes)
+    for label, c in state["evaluate"].items():
+        acc = totals["_counts"].setdefault(label, {"tp": 0, "fp": 0, "fn": 0})
+        for k in acc:
+            acc[k] += c[k]
+
+
+def _blocks(docs, size):
+    block = []
+    for d in docs:
+        block.append(d)
+        if len(block) == size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage throughput on a synthetic RTI corpus.")
+    parser.add_argument("n", type=int, nargs="?", default=10_000, help="documents (1k .. 1M)")
+    parser.add_argument("--block", type=int, default=5_000, help="documents generated and processed at a time")
+    parser.add_argument("--chars", default="200-1200", help="document length range in characters (min-max)")
+    parser.add_argument("--langs", default=",".join(synth_corpus.LANGS))
+    parser.add_argument("--level", choices=R.LEVELS, default="strong", help="highest detector level to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report here")
+    args = parser.parse_args()
+
+    have = detectors_available(args.level)
+    totals = {name: {"seconds": 0.0, "docs": 0, "bytes": 0, "peak_rss_mb": 0.0} for name in STAGES}
+    totals["_counts"] = {}
+    t_gen = 0.0
+    docs = synth_corpus.generate(args.n, args.langs.split(","), synth_corpus.parse_range(args.chars), args.seed)
+    t0 = time.perf_counter()
+    for block in _blocks(docs, args.block):
+        t_gen += time.perf_counter() - t0
+        run_block(block, have, totals)
+        t0 = time.perf_counter()
+    counts = totals.pop("_counts")
+
+    rss = "VmHWM per stage" if reset_peak_rss() else "ru_maxrss, whole run"
+    print(f"{args.n} synthetic documents ({args.langs}, {args.chars} chars), blocks of {args.block}; "
+          f"generated in {t_gen:.1f}s")
+    print("{:<14} {:>10} {:>10} {:>10} {:>14}".format("stage", "seconds", "docs/s", "MB/s", "peak RSS MB"))
+    report = {"n_docs": args.n, "block": args.block, "chars": args.chars, "langs": args.langs,
+              "level": args.level, "rss": rss, "stages": {}}
+    for name in STAGES:
+        t = totals[name]
+        if not t["docs"]:
+            print(f"{name:<14} {'skipped (detector not available)':>48}")
+            continue
+        secs = t["seconds"]
+        row = {"seconds": secs, "docs_per_s": t["docs"] / secs, "mb_per_s": t["bytes"] / secs / 1e6,
+               "peak_rss_mb": t["peak_rss_mb"]}
+        report["stages"][name] = row
+        print("{:<14} {:>10.2f} {:>10.0f} {:>10.2f} {:>14.1f}".format(
+            name, secs, row["docs_per_s"], row["mb_per_s"], row["peak_rss_mb"]))
+    print(f"(peak RSS: {rss}; apply_policy renders {', '.join(POLICY_MODES)} for every document)")
+
+    tp, fp, fn = (sum(c[k] for c in counts.values()) for k in ("tp", "fp", "fn"))
+    p, r, f1 = metrics(tp, fp, fn)
+    report["overall"] = {"precision": p, "recall": r, "f1": f1}
+    report["labels"] = {label: dict(zip(("precision", "recall", "f1"), metrics(c["tp"], c["fp"], c["fn"])))
+                        for label, c in sorted(counts.items())}
+    print(f"\nspans vs synthetic gold: P={p:.3f} R={r:.3f} F1={f1:.3f}")
+    for label, m in report["labels"].items():
+        print(f"  {label:<10} P={m['precision']:.3f} R={m['recall']:.3f} F1={m['f1']:.3f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# bench_langid.py
+# Throughput of langid.identify vs langdetect.detect on the rtis samples (plus
+# generated documents), how often the two agree, and determinism: identify is
+# run twice, langdetect three times without a seed.
+# Usage: python bench_langid.py [n_generated_docs]
+import sys
+import time
+import pathlib
+from collections import Counter
+
+import langid
+from bench_spacy_pipe import generate_corpus
+from textnorm import normalize_text
+
+
+def timed(fn, docs):
+    t0 = time.perf_counter()
+    out = [fn(t) for t in docs]
+    return out, time.perf_counter() - t0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    samples = [normalize_text(p.read_text(encoding="utf-8")) for p in sorted(pathlib.Path("rtis").rglob("*.txt"))]
+    docs = samples + generate_corpus(n)
+
+    ours, t_ours = timed(langid.identify, docs)
+    again, _ = timed(langid.identify, docs)
+    assert ours == again, "langid.identify is not deterministic"
+    print(f"{len(docs)} documents ({len(samples)} samples + {n} generated)")
+    print("{:<12} {:>10} {:>12} {:>10}".format("", "seconds", "us / doc", "docs/s"))
+    print("{:<12} {:>10.3f} {:>12.1f} {:>10.0f}".format("langid", t_ours, t_ours / len(docs) * 1e6, len(docs) / t_ours))
+    print("languages:", dict(Counter(r["lang"] for r in ours).most_common()))
+    print("scripts  :", dict(Counter(r["script"] for r in ours).most_common()))
+
+    try:
+        from langdetect import detect
+    except ImportError:
+        print("\nlangdetect not installed: skipping the comparison")
+        return
+
+    def safe_detect(text):
+        try:
+            return detect(text)
+        except Exception:  # no features (digits / punctuation only)
+            return "unknown"
+
+    t0 = time.perf_counter()
+    safe_detect("warm-up: langdetect loads its profiles on first use")
+    t_load = time.perf_counter() - t0
+    runs = [timed(safe_detect, docs) for _ in range(3)]
+    theirs, t_theirs = runs[0]
+    print("{:<12} {:>10.3f} {:>12.1f} {:>10.0f}   (+{:.2f}s profile load)".format(
+        "langdetect", t_theirs, t_theirs / len(docs) * 1e6, len(docs) / t_theirs, t_load))
+    print(f"speed-up {t_theirs / t_ours:.0f}x")
+    unstable = sum(len({r[0][i] for r in runs}) > 1 for i in range(len(docs)))
+    print(f"langdetect changed its answer between runs on {unstable}/{len(docs)} documents")
+    # hinglish is romanized: langdetect can only call it en (or something random)
+    same = sum(o["lang"] == t or (o["lang"] == "hinglish" and t == "en") for o, t in zip(ours, theirs))
+    print(f"agreement (hinglish counted as en): {same}/{len(docs)}")
+    print("disagreements:", dict(Counter((o["lang"], t) for o, t in zip(ours, theirs)
+                                         if not (o["lang"] == t or (o["lang"] == "hinglish" and t == "en")))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_memstats.py
+# memstats on a synthetic corpus (synth_corpus.py): preds.json written entry by
+# entry (pred_store.dump_json_items, from a dict and from a spilled SpillDict) is
+# byte-identical to json.dump; Python heap held by the predictions of n documents
+# in a dict vs a SpillDict spilled every 1000 documents; cost of one accounted
+# stage and of the per-document budget check.
+# Usage: python bench_memstats.py [n_docs]
+import io
+import sys
+import json
+import timeit
+import tracemalloc
+
+import memstats
+import pred_store
+import synth_corpus
+import trace_events
+
+
+def peak_of(fill):
+    tracemalloc.start()
+    kept = fill()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return kept, peak / (1 << 20)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    docs = list(synth_corpus.generate(n))
+    preds = {d["name"]: d["spans"] for d in docs}
+    preds["empty.txt"] = []
+    expected = io.StringIO()
+    json.dump(preds, expected, ensure_ascii=False, indent=2)
+    for store in (preds, memstats.SpillDict()):
+        if isinstance(store, memstats.SpillDict):
+            for i, (k, v) in enumerate(preds.items()):
+                store[k] = v
+                if i % 997 == 0:
+                    store.spill()
+        got = io.StringIO()
+        pred_store.dump_json_items(((k, store[k]) for k in preds), got)
+        assert got.getvalue() == expected.getvalue(), type(store).__name__
+    got = io.StringIO()
+    pred_store.dump_json_items(iter(()), got)
+    assert got.getvalue() == "{}"
+    print(f"preds.json of {n} documents: dump_json_items == json.dump (dict and SpillDict)")
+
+    # the pipeline builds a fresh span list per document: copy, so the dict really holds them
+    def fill_dict():
+        out = {}
+        for d in docs:
+            out[d["name"]] = json.loads(json.dumps(d["spans"]))
+        return out
+
+    def fill_spill():
+        out = memstats.SpillDict()
+        for i, d in enumerate(docs, 1):
+            out[d["name"]] = json.loads(json.dumps(d["spans"]))
+            if i % 1000 == 0:
+                out.spill()
+        return out
+
+    _, dict_mb = peak_of(fill_dict)
+    spill, spill_mb = peak_of(fill_spill)
+    spill.close()
+    print(f"Python heap peak holding the preds: dict {dict_mb:.1f} MB, SpillDict {spill_mb:.1f} MB")
+
+    k = 100_000
+    stmt = 'with stage("rule_spans", doc="x"): pass'
+    t_off = min(timeit.repeat(stmt, globals={"stage": trace_events.stage}, number=k, repeat=5)) / k
+    memstats.enable_accounting()
+    t_on = min(timeit.repeat(stmt, setup="acc.rows.clear()", globals={"stage": trace_events.stage,
+                             "acc": memstats._ACCOUNTING}, number=k, repeat=5)) / k
+    trace_events.observe(None)
+    tracemalloc.stop()
+    memstats.set_budget(1e9)
+    t_check = min(timeit.repeat("check()", globals={"check": memstats.check}, number=k, repeat=5)) / k
+    print(f"one stage: {t_off * 1e6:.2f} us off, {t_on * 1e6:.2f} us accounted; "
+          f"budget check: {t_check * 1e6:.2f} us / document")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# bench_onnx.py
+# XLM-R CPU backends side by side: eager PyTorch fp32 vs the ONNX Runtime export
+# (fp32 and dynamic int8, see onnx_backend.py), all through the same batched
+# engine (hf_batch.py) on the gold-annotated RTI files. Reports seconds, tokens/s,
+# speed-up over PyTorch, span-level F1 against gold.json and how many documents
+# get exactly the PyTorch spans.
+#
+# --tiny exports a small randomly initialized model with the checkpoint's config
+# (same labels, 2 layers) instead, to exercise the export / parity path without
+# the fine-tuned weights; its F1 is meaningless, the identical count is not.
+# Usage: python bench_onnx.py [--tiny] [--rounds N]
+import sys
+import time
+import pathlib
+import tempfile
+
+import eval_script
+import onnx_backend
+from hf_batch import BatchedTokenClassifier
+from textnorm import normalize_text
+
+
+def tiny_model(model_dir, out_dir):
+    from transformers import AutoConfig, XLMRobertaForTokenClassification
+    config = AutoConfig.from_pretrained(model_dir)
+    config.update({"num_hidden_layers": 2, "hidden_size": 64, "num_attention_heads": 4,
+                   "intermediate_size": 128})
+    XLMRobertaForTokenClassification(config).save_pretrained(out_dir)
+    return out_dir
+
+
+def run(engine, texts, rounds):
+    engine.predict(texts[:1])  # warm-up: lazy init, first-call allocations
+    engine.stats.update(tokens=0, padded=0, seconds=0.0)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        preds = engine.predict(texts)
+    return preds, time.perf_counter() - t0, engine.stats["tokens"]
+
+
+def main():
+    rounds = int(sys.argv[sys.argv.index("--rounds") + 1]) if "--rounds" in sys.argv else 3
+    tmp = tempfile.TemporaryDirectory()
+    model_dir, onnx_dir = onnx_backend.MODEL_DIR, pathlib.Path(onnx_backend.ONNX_DIR)
+    if "--tiny" in sys.argv:
+        model_dir = tiny_model(model_dir, pathlib.Path(tmp.name) / "tiny")
+        onnx_dir = pathlib.Path(tmp.name) / "tiny_onnx"
+    if not all((onnx_dir / f).exists() for f in onnx_backend.BACKENDS.values()):
+        print("exporting", model_dir, "->", onnx_dir)
+        onnx_backend.export(model_dir, onnx_dir, int8=True)
+
+    from transformers import XLMRobertaForTokenClassification
+    gold = eval_script.load_spans("gold.json")
+    names = [n for n in gold if (pathlib.Path("rtis") / n).exists()]
+    texts = [normalize_text((pathlib.Path("rtis") / n).read_text(encoding="utf-8")) for n in names]
+    gold = {n: gold[n] for n in names}
+
+    backends = {"torch": None, **{b: onnx_backend.load(b, onnx_dir) for b in onnx_backend.BACKENDS}}
+    tokenizer = backends["onnx"][1]
+    backends["torch"] = (XLMRobertaForTokenClassification.from_pretrained(model_dir), tokenizer)
+
+    print(f"{len(texts)} documents x {rounds} rounds, model {model_dir}")
+    print("{:<10} {:>9} {:>9} {:>9} {:>8} {:>8} {:>10}".format(
+        "backend", "seconds", "tokens/s", "speed-up", "F1", "dF1", "identical"))
+    ref = None
+    for name, (model, tok) in backends.items():
+        preds, secs, tokens = run(BatchedTokenClassifier(model, tok), texts, rounds)
+        _, (tp, fp, fn) = eval_script.match_counts(gold, dict(zip(names, preds)))
+        f1 = eval_script.metrics(tp, fp, fn)[2]
+        if ref is None:
+            ref = (preds, secs, f1)
+        same = sum(p == r for p, r in zip(preds, ref[0]))
+        print("{:<10} {:>9.2f} {:>9.0f} {:>8.2f}x {:>8.3f} {:>+8.3f} {:>6}/{:<3}".format(
+            name, secs, tokens / secs, ref[1] / secs, f1, f1 - ref[2], same, len(texts)))
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# bench_parallel.py
+# Scaling of the process-pool corpus runner (redact_demo_updated.run_parallel):
+# docs/s at 1, 2, 4, 8 and 16 workers on a generated corpus, checking that every
+# worker count produces exactly the predictions of an in-process run. Timings
+# include worker start-up and model loading (reported separately on one chunk).
+# Usage: python bench_parallel.py [n_docs] [level] [chunk_size] [workers...]
+import os
+import sys
+import time
+import shutil
+import pathlib
+import tempfile
+
+import redact_demo_updated as R
+from bench_spacy_pipe import generate_corpus
+
+
+def sequential(paths, level, outdir):
+    out = []
+    for group in R.detect_corpus(paths, level):
+        for text, p, det in group:
+            out.append((p.name, *R.redact_document(text, p, det, level, outdir)))
+    return out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    level = sys.argv[2] if len(sys.argv) > 2 else "strong"
+    chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else R.CHUNK_SIZE
+    counts = [int(w) for w in sys.argv[4:]] or [1, 2, 4, 8, 16]
+    tmp = pathlib.Path(tempfile.mkdtemp())
+    try:
+        src, outdir = tmp / "rtis", tmp / "outputs"
+        src.mkdir()
+        outdir.mkdir()
+        paths = []
+        for i, text in enumerate(generate_corpus(n)):
+            paths.append(src / f"doc{i:07d}.txt")
+            paths[-1].write_text(text, encoding="utf-8")
+
+        t0 = time.perf_counter()
+        ref = sequential(paths, level, outdir)
+        t_seq = time.perf_counter() - t0
+        print(f"{n} documents, level={level}, chunk_size={chunk_size}, {os.cpu_count()} CPUs")
+        print("{:<12} {:>10} {:>10} {:>10} {:>10}".format("", "startup s", "seconds", "docs/s", "identical"))
+        print("{:<12} {:>10} {:>10.2f} {:>10.1f} {:>10}".format("in-process", "-", t_seq, n / t_seq, "ref"))
+        for workers in counts:
+            t0 = time.perf_counter()
+            list(R.run_parallel(paths[:1], level, outdir, workers, chunk_size))
+            startup = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            got = list(R.run_parallel(paths, level, outdir, workers, chunk_size))
+            secs = time.perf_counter() - t0
+            print("{:<12} {:>10.2f} {:>10.2f} {:>10.1f} {:>10}".format(
+                f"{workers} workers", startup, secs, n / secs, "yes" if got == ref else "NO"))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
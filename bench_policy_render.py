@@ -0,0 +1,132 @@
+# bench_policy_render.py
+# apply_policy_to_text: slice-by-slice renderer vs the old s = s[:st] + repl + s[ed:] loop.
+# Checks byte-identical output (random and overlapping spans, both policy scripts,
+# returned string and streamed file) and times a document with 10k spans.
+# Usage: python bench_policy_render.py
+import io
+import re
+import time
+import random
+
+import apply_redaction
+import apply_redaction_safe
+from span_types import from_dicts
+
+LABELS = ["PERSON", "ADDRESS", "PHONE", "AADHAAR", "PAN", "EMAIL", "PIN", "DATE", "FILE", "VOTER_ID"]
+MODES = ["LOW", "MEDIUM", "HIGH"]
+
+
+def old_apply(text, spans, mode):
+    """Previous apply_redaction.apply_policy_to_text."""
+    M = apply_redaction
+    s = str(text)
+    spans = sorted(spans, key=lambda x: x["start"], reverse=True)
+    for sp in spans:
+        label, st, ed = sp["label"], sp["start"], sp["end"]
+        if st < 0 or ed > len(s) or st >= ed:
+            continue
+        snippet = s[st:ed]
+        if mode == "LOW":
+            repl = M.mask_low(label, snippet)
+        elif mode == "HIGH":
+            repl = M.mask_high(label, snippet)
+        else:
+            repl = M.mask_medium(label, snippet)
+        s = s[:st] + repl + s[ed:]
+    return re.sub(r"\]\s*\[", "] [", s)
+
+
+def old_apply_safe(text, spans, mode):
+    """
+    Previous apply_redaction_safe.apply_policy_to_text. Its span cleaning is
+    unchanged, so the replacements are recorded from the current code and then
+    applied with the old s = s[:st] + rep + s[ed:] loop.
+    """
+    calls = []
+
+    class Recorder:
+        def __init__(self, base):
+            calls.append(base)
+
+        def replace(self, st, ed, rep):
+            calls.append((st, ed, rep))
+
+        def render(self):
+            return None
+
+    orig = apply_redaction_safe.SegmentRenderer
+    apply_redaction_safe.SegmentRenderer = Recorder
+    try:
+        apply_redaction_safe.apply_policy_to_text(text, spans, mode)
+    finally:
+        apply_redaction_safe.SegmentRenderer = orig
+    s = calls[0]
+    for st, ed, rep in calls[1:]:
+        s = s[:st] + rep + s[ed:]
+    return re.sub(r"\]\s*\[", "] [", s)
+
+
+def random_doc(rng, n_chars):
+    words = ["Applicant:", "Ramesh", "Iyer", "9488801122", "]", "[", " ", "\n", "Flat 7B,", "Anna", "Street,", "641002", "  "]
+    out = []
+    while sum(map(len, out)) < n_chars:
+        out.append(rng.choice(words) + " ")
+    return "".join(out)[:n_chars]
+
+
+def random_spans(rng, n, text_len, max_len=25, overlapping=True):
+    spans = []
+    if overlapping:
+        for _ in range(n):
+            st = rng.randrange(-3, text_len + 3)
+            spans.append({"start": st, "end": st + rng.randrange(0, max_len), "label": rng.choice(LABELS)})
+    else:
+        # 10k-span style: sorted, disjoint
+        step = max(2, text_len // (n + 1))
+        for st in range(0, text_len - step, step)[:n]:
+            spans.append({"start": st, "end": st + rng.randrange(1, step), "label": rng.choice(LABELS)})
+    return spans
+
+
+def new_streamed(fn, text, spans, mode):
+    buf = io.StringIO()
+    fn(text, spans, mode, out=buf)
+    return buf.getvalue()
+
+
+def check(rng, cases):
+    for _ in range(cases):
+        text = random_doc(rng, rng.randrange(0, 300))
+        spans = random_spans(rng, rng.randrange(0, 30), len(text))
+        for mode in MODES:
+            want = old_apply(text, [dict(s) for s in spans], mode)
+            assert apply_redaction.apply_policy_to_text(text, from_dicts(spans), mode) == want
+            assert new_streamed(apply_redaction.apply_policy_to_text, text, from_dicts(spans), mode) == want
+            want = old_apply_safe(text, from_dicts(spans), mode)
+            assert apply_redaction_safe.apply_policy_to_text(text, from_dicts(spans), mode) == want
+            assert new_streamed(apply_redaction_safe.apply_policy_to_text, text, from_dicts(spans), mode) == want
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    rng = random.Random(0)
+    check(rng, 3000)
+    print("equivalence: OK (3000 random documents x 3 modes x 2 scripts)\n")
+
+    text = random_doc(rng, 400_000)
+    spans = random_spans(rng, 10_000, len(text), overlapping=False)
+    print(f"document: {len(text)} chars, {len(spans)} spans")
+    print("{:<8} {:>10} {:>10}".format("Mode", "old (s)", "new (s)"))
+    for mode in MODES:
+        t_old = timed(old_apply, text, spans, mode)
+        t_new = timed(apply_redaction.apply_policy_to_text, text, from_dicts(spans), mode)
+        print("{:<8} {:>10.3f} {:>10.3f}".format(mode, t_old, t_new))
+
+
+if __name__ == "__main__":
+    main()
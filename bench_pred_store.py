@@ -0,0 +1,110 @@
+# bench_pred_store.py
+# pred_store (.spans, memory-mapped columns; .jsonl, one record per line) vs the
+# pretty-printed JSON files: json -> store -> json and json -> jsonl -> json give
+# back every preds*.json / gold.json byte for byte, and a synthetic corpus
+# (synth_corpus.py, spans with and without "text") too; then file size, time to
+# open the predictions and read one document, to stream every document, and to
+# evaluate (eval_script.match_files, gold and preds joined on file name) with the
+# Python heap peak it needs, per format.
+# Usage: python bench_pred_store.py [n_docs]
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import filecmp
+import tracemalloc
+
+import eval_script
+import pred_store
+import synth_corpus
+
+REPO_FILES = ("preds.json", "preds_fixed.json", "preds_clean.json", "preds_finetuned.json", "gold.json")
+
+
+def best(fn, repeat=3):
+    t = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        t = min(t, time.perf_counter() - t0)
+        if hasattr(out, "close"):
+            out.close()
+    return t
+
+
+def round_trip(src, tmp, ext=pred_store.EXT):
+    mid, back = os.path.join(tmp, "x" + ext), os.path.join(tmp, "x.json")
+    pred_store.convert(src, mid)
+    pred_store.convert(mid, back)
+    return filecmp.cmp(src, back, shallow=False)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(0)
+    tmp = tempfile.mkdtemp(prefix="pred_store_")
+    for f in REPO_FILES:
+        if os.path.exists(f):
+            assert round_trip(f, tmp), f
+            assert round_trip(f, tmp, pred_store.JSONL_EXT), f
+    print(f"{', '.join(f for f in REPO_FILES if os.path.exists(f))}: json -> store / jsonl -> json identical")
+
+    gold = {}
+    for d in synth_corpus.generate(n):
+        spans = [dict(s) for s in d["spans"]]
+        for s in spans:
+            if rng.random() < 0.5:  # fix_preds / clean_preds output carries the text too
+                s["text"] = d["text"][s["start"]:s["end"]]
+        gold[d["name"]] = spans
+    paths = {"json": os.path.join(tmp, "gold.json"), "store": os.path.join(tmp, "gold.spans"),
+             "jsonl": os.path.join(tmp, "gold.jsonl")}
+    with open(paths["json"], "w", encoding="utf-8") as f:
+        json.dump(gold, f, ensure_ascii=False, indent=2)
+    pred_store.write(paths["store"], gold)
+    pred_store.convert(paths["json"], paths["jsonl"])
+    assert round_trip(paths["json"], tmp)
+    assert round_trip(paths["json"], tmp, pred_store.JSONL_EXT)
+    print(f"{n} synthetic documents: json -> store / jsonl -> json identical")
+
+    names = list(gold)
+    probe = [rng.choice(names) for _ in range(100)]
+    del gold
+    print(f"\n{n} documents, {sum(1 for _ in open(paths['json'], encoding='utf-8')):,} JSON lines")
+    print("{:<8} {:>9} {:>14} {:>12} {:>10} {:>14}".format("format", "MB", "open + 1 doc s", "all docs s",
+                                                           "eval s", "eval heap MB"))
+    for fmt, path in paths.items():
+        def one_doc():
+            preds = eval_script.load_spans(path)
+            preds[probe[0]]
+            return preds
+
+        def all_docs():
+            for _ in pred_store.iter_preds(path):
+                pass
+
+        def evaluate():
+            return eval_script.match_files(path, path)
+
+        tracemalloc.start()
+        evaluate()
+        heap = tracemalloc.get_traced_memory()[1] / (1 << 20)
+        tracemalloc.stop()
+        # JSONL has no random access: load_spans would read it whole
+        first = "-" if fmt == "jsonl" else f"{best(one_doc):.4f}"
+        print("{:<8} {:>9.1f} {:>14} {:>12.3f} {:>10.3f} {:>14.1f}".format(
+            fmt, os.path.getsize(path) / (1 << 20), first, best(all_docs), best(evaluate, 1), heap))
+
+    with pred_store.PredStore(paths["store"]) as store:
+        k = 10_000
+        t0 = time.perf_counter()
+        for i in range(k):
+            store[probe[i % len(probe)]]
+        print(f"one document from an open store: {(time.perf_counter() - t0) / k * 1e6:.1f} us")
+    shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# bench_rule_spans.py
+# Compare the single-pass RULE_SCANNER with the old per-label loop of rule_spans().
+# Usage: python bench_rule_spans.py
+import re
+import time
+import random
+import pathlib
+
+from redact_demo_updated import PATTERNS, _regex_span_bounds, normalize_text, rule_spans
+from span_types import to_dicts
+
+SIZES = [("1 KB", 1_000), ("100 KB", 100_000), ("10 MB", 10_000_000)]
+
+
+def rule_spans_loop(text):
+    """Previous implementation: one finditer() per label plus a PIN re-check."""
+    spans = []
+    for label, pat in PATTERNS.items():
+        for m in pat.finditer(text):
+            st, ed = _regex_span_bounds(m)
+            if label == "PIN":
+                token = text[st:ed].strip()
+                if not re.fullmatch(r'\d{6}', token):
+                    continue
+            spans.append({"start": st, "end": ed, "label": label})
+    return spans
+
+
+def corpus_text():
+    parts = [normalize_text(p.read_text(encoding="utf-8")) for p in sorted(pathlib.Path("rtis").rglob("*.txt"))]
+    return "\n\n".join(parts)
+
+
+def make_input(base, size):
+    """The corpus repeated and cut to exactly `size` characters."""
+    reps = size // (len(base) + 2) + 1
+    return ((base + "\n\n") * reps)[:size]
+
+
+def fuzz_text(rng, n=400):
+    # short random strings dense in the characters the patterns care about
+    alphabet = "0123456789 ABCDEFGHIJKLMNOPQRSTUVWXYZabcdef@.+-/:_\nFile No पता"
+    return "".join(rng.choice(alphabet) for _ in range(n))
+
+
+def timed(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    base = corpus_text()
+    rng = random.Random(0)
+
+    # equivalence: real corpus + random strings
+    assert to_dicts(rule_spans(base)) == rule_spans_loop(base), "mismatch on rtis corpus"
+    for _ in range(2000):
+        t = fuzz_text(rng)
+        assert to_dicts(rule_spans(t)) == rule_spans_loop(t), f"mismatch on {t!r}"
+    print("equivalence: OK (rtis corpus + 2000 random strings)\n")
+
+    print("{:<8} {:>11} {:>12} {:>12} {:>9}".format("Input", "chars", "loop (s)", "scanner (s)", "speed-up"))
+    print("-" * 57)
+    for name, size in SIZES:
+        text = make_input(base, size)
+        repeat = 5 if size < 1_000_000 else 1
+        t_loop = timed(rule_spans_loop, text, repeat)
+        t_scan = timed(rule_spans, text, repeat)
+        print("{:<8} {:>11,} {:>12.4f} {:>12.4f} {:>8.2f}x".format(name, len(text), t_loop, t_scan, t_loop / t_scan))
+
+
+if __name__ == "__main__":
+    main()
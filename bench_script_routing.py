@@ -0,0 +1,80 @@
+# bench_script_routing.py
+# Script-aware spaCy routing (script_runs.py): how many spaCy tokens each
+# document costs with and without it, segmenter throughput on 1 MB / 10 MB of
+# corpus text, and checks that the numpy segmenter agrees with a per-character
+# lookup and that every routed run maps back onto the original text.
+# With en_core_web_sm installed it also times spacy_spans_batch both ways and
+# counts the spans that only whole-document runs produced.
+# Usage: python bench_script_routing.py [n_generated_docs]
+import sys
+import time
+import pathlib
+from bisect import bisect_right
+
+import spacy
+
+import redact_demo_updated as R
+import script_runs
+from bench_spacy_pipe import generate_corpus
+
+
+def reference_codes(text):
+    """Script index of every char, one Python lookup at a time (no numpy)."""
+    bounds = sorted((lo, hi, script_runs.SCRIPTS.index(name))
+                    for name, ranges in script_runs._RANGES.items() for lo, hi in ranges)
+    los = [b[0] for b in bounds]
+    out = []
+    for ch in text:
+        cp = ord(ch)
+        k = bisect_right(los, cp) - 1
+        out.append(bounds[k][2] if k >= 0 and cp <= bounds[k][1] else script_runs.OTHER)
+    return out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    samples = [R.normalize_text(p.read_text(encoding="utf-8")) for p in sorted(pathlib.Path("rtis").rglob("*.txt"))]
+    docs = samples + generate_corpus(n)
+
+    for text in samples:
+        assert script_runs.script_codes(text).tolist() == reference_codes(text), "segmenter mismatch"
+        view, pieces = script_runs.latin_view(text)
+        assert all(view[v:v + k] == text[r:r + k] for v, r, k in pieces), "bad piece offsets"
+    print(f"segmenter agrees with per-char lookup on {len(samples)} sample files; pieces map back")
+
+    tokenizer = spacy.blank("en").tokenizer
+    full = [len(tokenizer(t)) for t in docs]
+    routed = [len(tokenizer(script_runs.latin_view(t)[0])) for t in docs]
+    skipped = sum(r == 0 for r in routed)
+    print(f"\n{len(docs)} documents ({len(samples)} samples + {n} generated)")
+    print(f"spaCy tokens / doc: {sum(full) / len(docs):.1f} whole text -> {sum(routed) / len(docs):.1f} "
+          f"Latin runs only ({1 - sum(routed) / sum(full):.1%} fewer); "
+          f"{skipped} documents have no Latin text at all")
+
+    base = "\n".join(samples)
+    print("\n{:>10} {:>10} {:>10}".format("size", "seconds", "MB/s"))
+    for size in (1_000_000, 10_000_000):
+        text = (base * (size // len(base) + 1))[:size]
+        t0 = time.perf_counter()
+        script_runs.script_runs(text)
+        secs = time.perf_counter() - t0
+        print("{:>10} {:>10.3f} {:>10.1f}".format(size, secs, len(text.encode("utf-8")) / secs / 1e6))
+
+    try:
+        R.DETECTORS.get("spacy")
+    except Exception:
+        print("\nen_core_web_sm not available: skipping the NER timing")
+        return
+    timings = {}
+    for routed_only in (False, True):
+        R.SPACY_LATIN_ONLY = routed_only
+        t0 = time.perf_counter()
+        timings[routed_only] = (list(R.spacy_spans_batch(docs)), time.perf_counter() - t0)
+    (whole, t_whole), (latin, t_latin) = timings[False], timings[True]
+    dropped = sum(len(w) - len(l) for w, l in zip(whole, latin))
+    print(f"\nspacy_spans_batch: {t_whole:.2f}s whole documents, {t_latin:.2f}s Latin runs "
+          f"({t_whole / t_latin:.2f}x); {dropped} spans fewer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# bench_server.py
+# Latency / throughput of redact_server under concurrent clients.
+# Starts a server in-process on a free port (or uses --url), sends the lines of
+# rtis/*.txt as requests from N client threads, checks every answer against a
+# direct redact_text_levels() call and reports p50 / p99 latency and requests/s.
+# Usage: python bench_server.py [--level light] [--clients 1 8 32] [--requests 2000]
+import time
+import pathlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import redact_demo_updated as R
+from redact_server import RedactClient, make_server
+from span_types import to_dicts
+
+
+def load_requests(n):
+    lines = []
+    for p in sorted(pathlib.Path("rtis").rglob("*.txt")):
+        lines.extend(l for l in R.normalize_text(p.read_text(encoding="utf-8")).splitlines() if l.strip())
+    return [lines[i % len(lines)] for i in range(n)]
+
+
+def percentile(sorted_vals, q):
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+def run(client, texts, level, clients):
+    latencies = [0.0] * len(texts)
+    answers = [None] * len(texts)
+
+    def one(i):
+        t0 = time.perf_counter()
+        answers[i] = client.redact(texts[i], level)
+        latencies[i] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(one, range(len(texts))))
+    wall = time.perf_counter() - t0
+    return sorted(latencies), wall, answers
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", help="benchmark an already running server instead")
+    ap.add_argument("--level", choices=R.LEVELS, default="light")
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--max-batch", type=int, default=32)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = ap.parse_args()
+
+    server = None
+    if args.url:
+        client = RedactClient(args.url)
+    else:
+        R.DETECTORS.ensure(args.level)
+        server = make_server(port=0, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = RedactClient(f"http://127.0.0.1:{server.server_address[1]}")
+
+    texts = load_requests(args.requests)
+    # answers come back as JSON: compare against the span dicts
+    expected = [(redacted, to_dicts(spans)) for redacted, spans in
+                (R.redact_text_levels(t, level=args.level) for t in texts)]
+    print(f"{len(texts)} requests, level={args.level}")
+    print("{:>8} {:>10} {:>10} {:>10} {:>10}".format("clients", "p50 ms", "p99 ms", "req/s", "identical"))
+    for n in args.clients:
+        lat, wall, answers = run(client, texts, args.level, n)
+        same = sum(a["redacted"] == e[0][args.level] and a["spans"] == e[1] for a, e in zip(answers, expected))
+        print("{:>8} {:>10.2f} {:>10.2f} {:>10.0f} {:>10}".format(
+            n, percentile(lat, 0.50) * 1000, percentile(lat, 0.99) * 1000, len(texts) / wall,
+            f"{same}/{len(texts)}"))
+    print("server:", client.health())
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# bench_snippet_index.py
+# snippet_index.best_match (4-gram position map) vs the find_best_match functions it
+# replaced in fix_preds.py and clean_preds.py: the same (start, end) for the
+# spans of rtis/ (snippets from preds.json / preds_fixed.json.bak, as the two
+# scripts see them) and for random snippets on synthetic documents (exact,
+# whitespace-mangled, garbled tails, absent, approx_start off the text), with
+# the index forced on; then realignment time per document size, index build
+# included, where the old searches scan the whole document per span.
+# Usage: python bench_snippet_index.py [n_random] [spans per 1000 chars]
+import re
+import sys
+import time
+import json
+import random
+import pathlib
+
+import synth_corpus
+from snippet_index import SnippetIndex, best_match
+from textnorm import COLLAPSE_SPACES, FIX_PREDS
+
+FIX = dict(max_prefix=30, radius=60)
+CLEAN = dict(max_prefix=40, radius=120, strip_first=True, extend=True)
+
+
+# -------------------- LEGACY IMPLEMENTATIONS --------------------
+def legacy_fix(norm_text, snippet, approx_start):
+    if not snippet:
+        return None
+    idx = norm_text.find(snippet)
+    if idx != -1:
+        return idx, idx + len(snippet)
+    s = snippet.strip()
+    if not s:
+        return None
+    s2 = re.sub(r'\s+', ' ', s)
+    idx = norm_text.find(s2)
+    if idx != -1:
+        return idx, idx + len(s2)
+    L = len(s)
+    for w in range(min(30, L), 3, -1):
+        piece = s[:w]
+        lo = max(0, approx_start - 60)
+        hi = min(len(norm_text), approx_start + 60)
+        idx = norm_text.find(piece, lo, hi)
+        if idx != -1:
+            return idx, idx + w
+    return None
+
+
+def legacy_clean(norm, snippet, approx_start):
+    if not snippet:
+        return None
+    s = snippet.strip()
+    if not s:
+        return None
+    idx = norm.find(s)
+    if idx != -1:
+        return idx, idx+len(s)
+    s2 = re.sub(r'\s+', ' ', s)
+    idx = norm.find(s2)
+    if idx != -1:
+        return idx, idx + len(s2)
+    for w in range(min(len(s), 40), 3, -1):
+        piece = s[:w]
+        lo = max(0, approx_start - 120)
+        hi = min(len(norm), approx_start + 120)
+        idx = norm.find(piece, lo, hi)
+        if idx != -1:
+            j = idx + w
+            while j < len(norm) and len(s) > (j-idx) and norm[j] == s[j-idx]:
+                j += 1
+            return idx, j
+    return None
+
+
+# -------------------- EQUIVALENCE --------------------
+def check(text, queries, scan_below=0):
+    index = SnippetIndex(text, scan_below=scan_below)
+    for snippet, approx in queries:
+        assert best_match(index, snippet, approx, **FIX) == legacy_fix(text, snippet, approx), (snippet, approx)
+        assert best_match(index, snippet, approx, **CLEAN) == legacy_clean(text, snippet, approx), (snippet, approx)
+
+
+def mangle(rng, text, n):
+    """Snippets the way predictions come: exact, re-spaced, garbled at the end, absent."""
+    out = []
+    for _ in range(n):
+        st = rng.randrange(len(text) + 1)
+        snip = text[st:st + rng.randrange(1, 80)]
+        kind = rng.randrange(6)
+        if kind == 1:
+            snip = re.sub(r' ', lambda m: rng.choice([" ", "  ", "\n", "\t "]), snip)
+        elif kind == 2 and snip:
+            cut = rng.randrange(len(snip))
+            snip = snip[:cut] + "".join(rng.choice("xyz#@ 0") for _ in range(rng.randrange(1, 10)))
+        elif kind == 3:
+            snip = "".join(rng.choice("abc Q9क") for _ in range(rng.randrange(0, 12)))
+        elif kind == 4:
+            snip = "  " + snip + " \n"
+        approx = st + rng.randrange(-150, 150) if rng.random() < 0.9 else rng.randrange(-400, len(text) + 400)
+        out.append((snip, approx))
+    return out
+
+
+def corpus_queries(preds_file, normalize):
+    rtis = pathlib.Path("rtis")
+    preds = json.loads(pathlib.Path(preds_file).read_text(encoding="utf-8"))
+    for fname, spans in preds.items():
+        path = rtis / fname
+        if not path.exists():
+            continue
+        raw = path.read_text(encoding="utf-8", errors="replace")
+        queries = [(normalize(s.get("text") or raw[s["start"]:s["end"]]).strip(), s["start"]) for s in spans]
+        yield normalize(raw), queries
+
+
+def main():
+    n_random = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    density = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = random.Random(0)
+
+    n = 0
+    for preds_file, norm in (("preds.json", FIX_PREDS.normalize), ("preds_fixed.json.bak", COLLAPSE_SPACES.normalize)):
+        for text, queries in corpus_queries(preds_file, norm):
+            check(text, queries + mangle(rng, text, 20))
+            n += 1
+    print(f"rtis/: {n} documents identical (fix_preds and clean_preds rules)")
+
+    docs = [d["text"] for d in synth_corpus.generate(n_random)]
+    for i, text in enumerate(docs):
+        # repeats and runs: many equal suffixes for the sort to separate
+        if i % 3 == 0:
+            text = text + "\n" + text[:len(text) // 2] + " " * rng.randrange(40)
+        check(text, mangle(rng, text, 40))
+        check(text, mangle(rng, text, 10), scan_below=1 << 30)
+    for text in ("", "a", "aaaa", "ab" * 50):
+        check(text, mangle(rng, text, 30))
+    print(f"{n_random} random documents identical (index and scan)")
+
+    print(f"\n{density:g} spans per 1000 characters")
+    print("{:>10} {:>7} {:>10} {:>10} {:>10} {:>9}".format("chars", "spans", "legacy s", "index s", "build s",
+                                                           "speed-up"))
+    pool = iter(synth_corpus.generate(10 ** 6, seed=1))
+    for size in (1_000, 10_000, 50_000, 100_000, 200_000, 1_000_000):
+        parts, total = [], 0
+        while total < size:
+            parts.append(next(pool)["text"])
+            total += len(parts[-1]) + 1
+        text = "\n".join(parts)[:size]
+        queries = mangle(rng, text, max(1, int(size * density / 1000)))
+        t0 = time.perf_counter()
+        want = [legacy_clean(text, s, a) for s, a in queries]
+        t_legacy = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index = SnippetIndex(text, scan_below=0)
+        index._indexed()
+        t_build = time.perf_counter() - t0
+        got = [best_match(index, s, a, **CLEAN) for s, a in queries]
+        t_index = time.perf_counter() - t0
+        assert got == want
+        print("{:>10,} {:>7} {:>10.4f} {:>10.4f} {:>10.4f} {:>8.1f}x".format(size, len(queries), t_legacy, t_index,
+                                                                            t_build, t_legacy / t_index))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# bench_spacy_pipe.py
+# Documents/second: per-document nlp(text) on the full en_core_web_sm pipeline
+# vs spacy_spans_batch() (nlp.pipe on the NER-only pipeline).
+# Usage: python bench_spacy_pipe.py [n_docs] [batch_size] [n_process]
+import sys
+import time
+import random
+import pathlib
+
+import spacy
+
+import redact_demo_updated
+from redact_demo_updated import DETECTORS, doc_spans, normalize_text, spacy_spans_batch
+
+
+def generate_corpus(n, seed=0):
+    """n documents built by shuffling lines of the rtis samples and re-drawing digits."""
+    lines = []
+    for p in sorted(pathlib.Path("rtis").rglob("*.txt")):
+        lines.extend(l for l in normalize_text(p.read_text(encoding="utf-8")).splitlines() if l.strip())
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(n):
+        body = rng.sample(lines, k=min(len(lines), rng.randint(4, 12)))
+        docs.append("\n".join("".join(str(rng.randint(0, 9)) if ch.isdigit() else ch for ch in l) for l in body))
+    return docs
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    n_process = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    docs = generate_corpus(n)
+    # like for like with the old whole-document nlp(text); see bench_script_routing.py
+    redact_demo_updated.SPACY_LATIN_ONLY = False
+
+    full = spacy.load("en_core_web_sm")  # every component enabled, as before
+    print("full pipeline:", full.pipe_names)
+    print("NER pipeline :", DETECTORS.get("spacy").pipe_names)
+
+    t0 = time.perf_counter()
+    old = [doc_spans(full(t), t) for t in docs]
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = list(spacy_spans_batch(docs, batch_size=batch_size, n_process=n_process))
+    t_new = time.perf_counter() - t0
+
+    same = sum(a == b for a, b in zip(old, new))
+    print(f"\n{n} documents, batch_size={batch_size}, n_process={n_process}")
+    print("{:<28} {:>10} {:>10}".format("", "seconds", "docs/s"))
+    print("{:<28} {:>10.2f} {:>10.1f}".format("nlp(text), full pipeline", t_old, n / t_old))
+    print("{:<28} {:>10.2f} {:>10.1f}".format("nlp.pipe, NER only", t_new, n / t_new))
+    print(f"speed-up {t_old / t_new:.2f}x; identical spans on {same}/{n} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# bench_span_cache.py
+# Cold vs warm corpus detection through the span cache (redact_demo_updated.detect_corpus):
+# the warm pass must return the same detections, run no detector and write nothing
+# to the cache file (no write lock for parallel workers). Also checks that a small
+# size budget evicts least-recently-used entries first.
+# Usage: python bench_span_cache.py [level] [copies]
+import sys
+import time
+import shutil
+import pathlib
+import tempfile
+
+import redact_demo_updated as R
+from span_cache import SpanCache
+
+
+def run(paths, level, cache):
+    t0 = time.perf_counter()
+    out = [(p.name, d) for group in R.detect_corpus(paths, level, cache) for _, p, d in group]
+    return out, time.perf_counter() - t0
+
+
+def main():
+    level = sys.argv[1] if len(sys.argv) > 1 else "strong"
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    tmp = pathlib.Path(tempfile.mkdtemp())
+    try:
+        # distinct documents: every copy gets a marker line
+        sources = sorted(pathlib.Path("rtis").glob("*.txt"))
+        paths = []
+        for c in range(copies):
+            for src in sources:
+                dst = tmp / f"{src.stem}_{c}.txt"
+                dst.write_text(src.read_text(encoding="utf-8") + f"\ncopy {c}\n", encoding="utf-8")
+                paths.append(dst)
+
+        ref, t_none = run(paths, level, None)
+        cache = SpanCache(tmp / "cache.sqlite")
+        cold, t_cold = run(paths, level, cache)
+        changes = cache.db.total_changes
+        warm, t_warm = run(paths, level, cache)
+        assert cold == ref and warm == ref, "cached detections differ"
+        assert cache.db.total_changes == changes, "warm pass wrote to the cache"
+        print(f"{len(paths)} documents, level={level}, cache {cache.size() / 1024:.0f} KiB")
+        print("{:<10} {:>10}".format("", "seconds"))
+        print("{:<10} {:>10.3f}".format("no cache", t_none))
+        print("{:<10} {:>10.3f}".format("cold", t_cold))
+        print("{:<10} {:>10.3f}".format("warm", t_warm))
+        print("stats:", cache.stats)
+
+        # LRU: touch the first half again, shrink the budget, the second half goes first
+        cache.touch_after = 0  # every hit counts, not only those an hour apart
+        half = paths[:len(paths) // 2]
+        run(half, level, cache)
+        cache.max_bytes = cache.size() // 2
+        cache.commit()
+        before = dict(cache.stats)
+        run(half, level, cache)
+        print(f"after evicting {cache.stats['evicted']} entries: "
+              f"re-read of recent half {cache.stats['hits'] - before['hits']} hits, "
+              f"{cache.stats['misses'] - before['misses']} misses")
+        cache.close()
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# bench_span_match.py
+# Timing: span_match (sort-merge sweep) vs the nested loops it replaced in
+# eval_script.evaluate and plots.compute_metrics_and_confusion, on a 100k-document
+# gold set and on a few long documents, where the nested loops grow with gold x
+# predicted spans. That both give the same counts and confusion matrix is checked
+# by tests/test_span_match.py, which holds the old loops.
+# Usage: python bench_span_match.py [n_docs]
+import sys
+import time
+import random
+
+import eval_script
+import plots
+from tests.test_span_match import as_spans, legacy_confusion, legacy_eval_counts, random_corpus
+
+
+def main():
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(0)
+    gold = eval_script.load_json("gold.json")
+
+    # corpus scale: documents shaped like the gold set (spans spread over a page)
+    labels = sorted({s["label"] for spans in gold.values() for s in spans})
+    big_gold, big_preds = random_corpus(rng, n_docs, labels, max_spans=20, width=3_000)
+    n_spans = sum(map(len, big_gold.values())) + sum(map(len, big_preds.values()))
+    print(f"{n_docs} documents, {n_spans} spans")
+    print("{:<28} {:>10} {:>10}".format("", "legacy s", "new s"))
+    t0 = time.perf_counter(); legacy_eval_counts(big_gold, big_preds); t_old = time.perf_counter() - t0
+    # the legacy loops read span dicts, span_match reads Spans (converted once, untimed)
+    span_gold, span_preds = as_spans(big_gold), as_spans(big_preds)
+    t0 = time.perf_counter(); eval_script.match_counts(span_gold, span_preds); t_new = time.perf_counter() - t0
+    print("{:<28} {:>10.2f} {:>10.2f}".format("eval_script counts", t_old, t_new))
+    labels = sorted(labels)
+    t0 = time.perf_counter()
+    legacy_eval_counts(big_gold, big_preds); legacy_confusion(big_gold, big_preds, labels)
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter(); plots.compute_metrics_and_confusion(span_gold, span_preds); t_new = time.perf_counter() - t0
+    print("{:<28} {:>10.2f} {:>10.2f}".format("plots metrics + confusion", t_old, t_new))
+
+    # long documents: the nested loops grow with gold x predicted spans per file
+    long_gold, long_preds = random_corpus(rng, 100, labels, max_spans=600, width=100_000)
+    t0 = time.perf_counter(); legacy_eval_counts(long_gold, long_preds); t_old = time.perf_counter() - t0
+    span_gold, span_preds = as_spans(long_gold), as_spans(long_preds)
+    t0 = time.perf_counter(); eval_script.match_counts(span_gold, span_preds); t_new = time.perf_counter() - t0
+    print("{:<28} {:>10.2f} {:>10.2f}".format("eval, 100 docs x ~300 spans", t_old, t_new))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# bench_span_resolve.py
+# Timing: span_resolve vs the old pairwise loops of combine_and_dedupe() and
+# clean_preds.py (contained-span and overlap passes). That both give the same
+# spans is checked by tests/test_span_resolve.py, which holds the old loops.
+# Usage: python bench_span_resolve.py
+import time
+import random
+
+from span_resolve import dedupe_spans, drop_contained, resolve_overlaps
+from span_types import from_dicts
+from tests.test_span_resolve import contained_loop, dedupe_loop, overlap_loop, random_spans
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    rng = random.Random(0)
+    print("{:<16} {:>7} {:>10} {:>10}".format("Pass", "spans", "loop (s)", "new (s)"))
+    print("-" * 46)
+    for n in (1_000, 5_000):
+        text_len = n * 20
+        text = "x" * text_len
+        spans = [s for s in random_spans(rng, n, text_len, 60) if 0 <= s["start"] < s["end"] <= text_len]
+        # the loops took span dicts, span_resolve takes Spans
+        objs = from_dicts(spans)
+        for name, old, new, args, new_args in (
+            ("combine_dedupe", dedupe_loop, dedupe_spans, (spans, text_len), (objs, text_len)),
+            ("contained", contained_loop, drop_contained, (spans,), (objs,)),
+            ("cross-label", overlap_loop, resolve_overlaps, (spans, text), (objs, text)),
+        ):
+            print("{:<16} {:>7} {:>10.4f} {:>10.4f}".format(name, len(spans), timed(old, *args),
+                                                            timed(new, *new_args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# bench_startup.py
+# Cold-start cost of redact_demo_updated per level, each in a fresh interpreter:
+#   import    - cumulative import time of the module (python -X importtime)
+#   first doc - wall time from interpreter start to the first redacted document
+#   heavy     - heavy modules (spaCy, transformers, torch) that got imported
+# Exits non-zero if light mode imports a heavy module or misses the budget, so it
+# can serve as a regression guard.
+# Usage: python bench_startup.py [light_budget_ms] [levels...]
+import re
+import sys
+import json
+import time
+import subprocess
+
+HEAVY = ("spacy", "transformers", "torch", "langdetect")
+
+SAMPLE = "Applicant: Ramesh Kumar, Ph 9876543210, PAN ABCDE1234F, PIN 110001."
+
+CHILD = """
+import sys, json
+import redact_demo_updated as R
+R.redact_text_levels({sample!r}, level={level!r})
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+
+def import_time_ms():
+    """Cumulative import time of redact_demo_updated as reported by -X importtime."""
+    res = subprocess.run([sys.executable, "-X", "importtime", "-c", "import redact_demo_updated"],
+                         capture_output=True, text=True, check=True)
+    for line in res.stderr.splitlines():
+        m = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*redact_demo_updated$", line)
+        if m:
+            return int(m.group(1)) / 1000
+    raise RuntimeError("redact_demo_updated not found in -X importtime output")
+
+
+def first_doc(level):
+    """(ms from process start to first redacted document, heavy modules loaded)."""
+    code = CHILD.format(sample=SAMPLE, level=level, heavy=HEAVY)
+    t0 = time.perf_counter()
+    res = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    ms = (time.perf_counter() - t0) * 1000
+    return ms, json.loads(res.stdout.strip().splitlines()[-1])
+
+
+def bare_interpreter_ms():
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.perf_counter() - t0) * 1000
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 500.0
+    levels = sys.argv[2:] or ["light", "medium", "strong"]
+    baseline = bare_interpreter_ms()
+    imp = import_time_ms()
+    print(f"bare interpreter: {baseline:.0f} ms; import redact_demo_updated: {imp:.1f} ms")
+    print("{:<8} {:>14}  {}".format("level", "first doc ms", "heavy modules"))
+    ok = True
+    for level in levels:
+        ms, heavy = first_doc(level)
+        print("{:<8} {:>14.0f}  {}".format(level, ms, ", ".join(heavy) or "-"))
+        if level == "light" and (heavy or ms > budget):
+            ok = False
+    if not ok:
+        print(f"FAIL: light mode must not import {HEAVY} and must finish within {budget:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# bench_textnorm.py
+# textnorm vs the per-script normalizers it replaces: same output on the corpus and
+# on random strings full of zero-width / quote / dash / CR / space edge cases,
+# offset-map consistency, and timings on 1 KB / 100 KB / 10 MB inputs.
+# Usage: python bench_textnorm.py [n_random]
+import re
+import sys
+import time
+import random
+import pathlib
+import unicodedata
+
+import textnorm
+
+
+# -------------------- LEGACY NORMALIZERS --------------------
+def legacy_default(s):  # redact_demo_updated / normalize_rtis / validate_gold
+    s = unicodedata.normalize("NFKC", s)
+    s = s.replace("‌","").replace("‍","").replace("﻿","")
+    s = s.replace("“",'\"').replace("”",'\"').replace("’","'").replace("‘","'")
+    s = s.replace("—","-").replace("–","-")
+    s = s.replace("\r\n","\n").replace("\r","\n")
+    return s
+
+
+def legacy_clean_preds(s):
+    s = unicodedata.normalize("NFKC", s)
+    s = s.replace("‌", "").replace("‍", "").replace("﻿", "")
+    s = s.replace("\r\n", "\n").replace("\r", "\n")
+    s = s.replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'")
+    s = s.replace("—", "-").replace("–", "-")
+    s = re.sub(r'[ \t ]+', " ", s)
+    return s
+
+
+def legacy_fix_preds(t):
+    t = unicodedata.normalize('NFKC', t)
+    t = t.replace('\r\n', '\n')
+    t = re.sub(r'[ \t ]+', ' ', t)
+    t = re.sub(r'[​-‏﻿]', '', t)
+    return t
+
+
+PAIRS = [
+    ("DEFAULT", textnorm.DEFAULT, legacy_default),
+    ("COLLAPSE_SPACES", textnorm.COLLAPSE_SPACES, legacy_clean_preds),
+    ("FIX_PREDS", textnorm.FIX_PREDS, legacy_fix_preds),
+]
+
+ALPHABET = (list("ab1 .:") + [" ", "  ", "\t", " ", "\r", "\n", "\r\n", "​", "‌", "‍",
+            "‎", "﻿", "“", "”", "‘", "’", "—", "–", "ﬁ", "Ａ", "é", "́", "क़", "क़",
+            "ि", "ह", "가", "ᆨ", "½"])
+
+
+def check_map(norm, s):
+    """Every group of normalized chars sharing a raw start normalizes back from its raw slice."""
+    text, offs = norm.normalize_with_map(s)
+    assert text == norm.normalize(s)
+    assert len(offs) == len(text) + 1 and offs[-1] == len(s)
+    assert all(offs[i] <= offs[i + 1] for i in range(len(text)))
+    i = 0
+    while i < len(text):
+        j = i + 1
+        while j < len(text) and offs[j] == offs[i]:
+            j += 1
+        assert norm.normalize(s[offs[i]:offs[j]]) == text[i:j], (s, i, j)
+        i = j
+
+
+def main():
+    n_random = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    rng = random.Random(0)
+    corpus = [p.read_text(encoding="utf-8") for p in sorted(pathlib.Path("rtis").rglob("*.txt"))]
+    randoms = ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40))) for _ in range(n_random)]
+
+    for name, norm, legacy in PAIRS:
+        same_corpus = sum(norm.normalize(t) == legacy(t) for t in corpus)
+        same_random = sum(norm.normalize(t) == legacy(t) for t in randoms)
+        for t in corpus + randoms:
+            check_map(norm, t)
+        print(f"{name:<16} corpus {same_corpus}/{len(corpus)} identical, random {same_random}/{len(randoms)}, maps ok")
+    # FIX_PREDS differs only where a zero-width char sits inside a space run (or
+    # between \r and \n): the old code collapsed spaces before deleting it
+    diff = [t for t in randoms if textnorm.FIX_PREDS.normalize(t) != legacy_fix_preds(t)]
+    assert all(re.search(r"[ \t \r][​-‏﻿]+[ \t \n]", unicodedata.normalize("NFKC", t))
+               for t in diff), "unexpected FIX_PREDS difference"
+
+    base = "\n".join(corpus)
+    print("\n{:<16} {:>8} {:>10} {:>10} {:>10}".format("", "size", "legacy s", "new s", "with map s"))
+    for size in (1_000, 100_000, 10_000_000):
+        text = (base * (size // len(base) + 1))[:size]
+        for name, norm, legacy in PAIRS:
+            t0 = time.perf_counter(); legacy(text); t_old = time.perf_counter() - t0
+            t0 = time.perf_counter(); norm.normalize(text); t_new = time.perf_counter() - t0
+            t0 = time.perf_counter(); norm.normalize_with_map(text); t_map = time.perf_counter() - t0
+            print("{:<16} {:>8} {:>10.4f} {:>10.4f} {:>10.4f}".format(name, size, t_old, t_new, t_map))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# bench_trace.py
+# Cost of the trace_events instrumentation on a synthetic corpus (synth_corpus.py):
+# redact_text_levels + lang_detect + apply_policy_to_text (LOW/MEDIUM/HIGH) per
+# document, with tracing off and on (best of several interleaved rounds). Tracing
+# off cannot be compared against code without the stage() calls, and on this
+# scale the end-to-end difference is within timing noise, so both costs are also
+# estimated as stages per document x the measured cost of one stage.
+# Usage: python bench_trace.py [n_docs] [rounds]
+import sys
+import time
+import timeit
+
+import apply_redaction
+import redact_demo_updated as R
+import synth_corpus
+import trace_events
+
+
+def workload(texts):
+    for text in texts:
+        R.lang_detect(text)
+        _, preds = R.redact_text_levels(text, level="light")
+        for mode in ("LOW", "MEDIUM", "HIGH"):
+            apply_redaction.apply_policy_to_text(text, preds, mode)
+
+
+def run(texts, on):
+    trace_events._EVENTS = [] if on else None
+    trace_events._ON = on
+    t0 = time.perf_counter()
+    workload(texts)
+    secs = time.perf_counter() - t0
+    events = len(trace_events._EVENTS) if on else 0
+    trace_events._EVENTS = None
+    trace_events._ON = False
+    return secs, events
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    texts = [d["text"] for d in synth_corpus.generate(n)]
+    run(texts[:200], False)  # warm-up (regex caches, imports)
+
+    best = {False: float("inf"), True: float("inf")}
+    for _ in range(rounds):
+        for on in (False, True):
+            secs, events = run(texts, on)
+            best[on] = min(best[on], secs)
+            if on:
+                per_doc = events / n
+
+    # one stage, off and on, vs the bare block it wraps
+    k = 200_000
+    stmt = 'with stage("rule_spans", doc="x"): pass'
+    t_bare = min(timeit.repeat("pass", number=k, repeat=7)) / k
+    t_off = min(timeit.repeat(stmt, globals={"stage": trace_events.stage}, number=k, repeat=7)) / k
+    trace_events.enable()
+    t_on = min(timeit.repeat(stmt, setup="trace_events._EVENTS.clear()", globals={"stage": trace_events.stage,
+                             "trace_events": trace_events}, number=k, repeat=7)) / k
+    trace_events._EVENTS = None
+    trace_events._ON = False
+    off_ns, on_ns = (t_off - t_bare) * 1e9, (t_on - t_bare) * 1e9
+    doc_us = best[False] / n * 1e6
+
+    print(f"{n} documents, {per_doc:.0f} stages / document, best of {rounds} rounds")
+    print("{:<12} {:>10} {:>12}".format("", "seconds", "us / doc"))
+    print("{:<12} {:>10.3f} {:>12.1f}".format("trace off", best[False], doc_us))
+    print("{:<12} {:>10.3f} {:>12.1f}".format("trace on", best[True], best[True] / n * 1e6))
+    print(f"tracing on : {best[True] / best[False] - 1:+.2%} measured; {on_ns:.0f} ns per stage "
+          f"-> ~{per_doc * on_ns / 1e3 / doc_us:.2%} of a document")
+    print(f"tracing off: {off_ns:.0f} ns per stage -> ~{per_doc * off_ns / 1e3 / doc_us:.2%} of a document")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# cue_index.py
+# The cue words used by the post-processing heuristics (fix_preds.py /
+# clean_preds.py), case-folded, and CueIndex, which answers "is there a cue in
+# text[lo:hi]" for one document.
+#
+# This is not a single-pass automaton, by measurement. In pure Python an
+# Aho-Corasick walk costs ~480 ns per character, and one lookahead regex over all
+# 48 cue words takes 142 ms per 1M characters. The old per-span checks cost ~2 us
+# per span, so an up-front pass loses to them at any realistic span density. So:
+#   - a query first checks its own window (one precompiled pattern per cue group
+#     over the case-folded window), which is what a few spans on a page need;
+#   - once the windows checked add up to the document's length, the document is
+#     indexed: one C-level str.find sweep per cue word over the case-folded text
+#     (73 ms per 1M characters, folding included), and later queries bisect the
+#     hits. A document nobody queries is never scanned.
+# bench_cue_index.py, fix_preds' query mix per document, old checks / CueIndex /
+# indexing up front: 100k chars, 500 spans 1.65 / 1.03 / 6.42 ms; 1M chars, 50
+# spans 0.11 / 0.13 / 58.9 ms; 1M chars, 5000 spans 17.5 / 11.0 / 67.9 ms; 20k
+# chars, 5000 spans 26.8 / 10.0 / 8.9 ms.
+#
+# redact_demo_updated.line_spans keeps its two Applicant / Address line regexes.
+# They are (?m)^-anchored patterns that capture the rest of the line rather than
+# keyword lookups, and each is already a single C pass per document (7-9 ms per
+# 1M characters).
+import re
+from bisect import bisect_left
+
+# -------------------- CUE VOCABULARY --------------------
+# PERSON spans containing any of these (as a substring) are really addresses
+ADDRESS_KEYWORDS = {
+    'apt','apartment','colony','col','road','rd','street','st','vihar',
+    'village','flat','block','sector','enclave','layout','nagar','kalan',
+    'residency','residences','bazar','bazaar','housing','lane','gali',
+    'near','opp','opposite','behind','phase','mandir','park','meadow','heights'
+}
+
+# whole words next to a 6-digit number that mark it as a PIN code
+# (same matches as r'\b(pin|pincode|pincode:|pin:|postcode|zip|pin-)\b')
+PIN_CUES = {'pin', 'pincode', 'postcode', 'zip'}
+
+# PERSON "names" that are really form labels / instructions
+PERSON_NOISE_WORDS = {
+    'pata', 'पता', 'का नाम', 'की जिम्मेदारी', 'करे', 'करेin', 'karein', 'अनुरोध',
+    'details', 'karamchariyon', 'attendance'
+}
+
+CUE_GROUPS = {
+    "address": ADDRESS_KEYWORDS,
+    "pin": PIN_CUES,
+    "person_noise": PERSON_NOISE_WORDS,
+}
+
+
+def fold(ch):
+    """Case-fold one character without changing string length (offsets must stay valid)."""
+    f = ch.casefold()
+    if len(f) == 1:
+        return f
+    f = ch.lower()
+    return f if len(f) == 1 else ch
+
+
+def is_word_char(ch):
+    # same definition as re's \w for str patterns: Devanagari letters and digits count,
+    # vowel signs / viramas do not
+    return ch.isalnum() or ch == "_"
+
+
+def fold_text(text):
+    """fold() of every character (text.casefold() when that keeps the length)."""
+    folded = text.casefold()
+    return folded if len(folded) == len(text) else "".join(fold(c) for c in text)
+
+
+# -------------------- PATTERNS --------------------
+_FOLDED_GROUPS = {g: {"".join(fold(c) for c in w) for w in words} for g, words in CUE_GROUPS.items()}
+# any cue of the group / a cue as a whole word (window edges count as boundaries)
+CUE_RX = {g: re.compile("|".join(map(re.escape, sorted(words)))) for g, words in _FOLDED_GROUPS.items()}
+CUE_WORD_RX = {g: re.compile(r"\b(?:%s)\b" % "|".join(map(re.escape, sorted(words))))
+               for g, words in _FOLDED_GROUPS.items()}
+
+
+# -------------------- PER-DOCUMENT INDEX --------------------
+class CueIndex:
+    """Cue lookups by offset in one document; the hits are collected once windows stop paying off."""
+
+    def __init__(self, text):
+        self.text = text
+        self.hits = None
+        self._checked = 0  # characters of the windows checked so far
+
+    def _index(self):
+        folded = fold_text(self.text)
+        self.hits = {}
+        for group, words in _FOLDED_GROUPS.items():
+            lst = []
+            for w in words:
+                i = folded.find(w)
+                while i != -1:
+                    lst.append((i, i + len(w)))
+                    i = folded.find(w, i + 1)
+            lst.sort()
+            self.hits[group] = lst
+        self._starts = {g: [h[0] for h in lst] for g, lst in self.hits.items()}
+
+    def _window(self, lo, hi):
+        """Folded text[lo:hi] to check directly, or None once the document is indexed."""
+        if self.hits is None:
+            self._checked += max(hi - lo, 0)
+            if self._checked <= len(self.text):
+                return fold_text(self.text[lo:hi])
+            self._index()
+        return None
+
+    def _candidates(self, group, lo, hi):
+        hits = self.hits.get(group)
+        if not hits:
+            return
+        i = bisect_left(self._starts[group], lo)
+        while i < len(hits) and hits[i][0] < hi:
+            yield hits[i]
+            i += 1
+
+    def any_within(self, group, lo, hi):
+        """True if some cue of `group` lies entirely inside text[lo:hi] (substring semantics)."""
+        window = self._window(lo, hi)
+        if window is not None:
+            return CUE_RX[group].search(window) is not None
+        return any(ed <= hi for _, ed in self._candidates(group, lo, hi))
+
+    def any_word_within(self, group, lo, hi):
+        """
+        True if a cue of `group` occurs as a whole word inside text[lo:hi], where the
+        window edges count as word boundaries (like re.search(r'\\bcue\\b', text[lo:hi])).
+        """
+        window = self._window(lo, hi)
+        if window is not None:
+            return CUE_WORD_RX[group].search(window) is not None
+        t = self.text
+        for st, ed in self._candidates(group, lo, hi):
+            if ed > hi:
+                continue
+            if st > lo and is_word_char(t[st - 1]):
+                continue
+            if ed < hi and is_word_char(t[ed]):
+                continue
+            return True
+        return False
+
+
+def is_cue_word(group, text):
+    """True if the whole (stripped) text is one of the cue words of `group`."""
+    return "".join(fold(c) for c in text.strip()) in _FOLDED_GROUPS[group]
+
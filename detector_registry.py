@@ -0,0 +1,40 @@
+# detector_registry.py
+# Heavy detectors (spaCy, the XLM-R checkpoint) are loaded on first use instead of
+# at import, so a light (regex-only) run never imports them. Each redaction level
+# lists the detectors it needs; ensure(level) warms exactly those.
+import threading
+
+
+class DetectorRegistry:
+    """Named loaders, each run at most once; the result (even None) is cached."""
+
+    def __init__(self, level_needs):
+        self.level_needs = level_needs
+        self._loaders = {}
+        self._loaded = {}
+        self._lock = threading.RLock()
+
+    def loader(self, name):
+        """Decorator registering a zero-argument loader under `name`."""
+        def register(fn):
+            self._loaders[name] = fn
+            return fn
+        return register
+
+    def get(self, name):
+        try:
+            return self._loaded[name]
+        except KeyError:
+            pass
+        # RLock: a loader may get() the detectors it builds on
+        with self._lock:
+            if name not in self._loaded:
+                self._loaded[name] = self._loaders[name]()
+            return self._loaded[name]
+
+    def is_loaded(self, name):
+        return name in self._loaded
+
+    def ensure(self, level):
+        """Load every detector `level` needs; returns {name: detector}."""
+        return {name: self.get(name) for name in self.level_needs[level]}
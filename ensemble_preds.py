@@ -1,18 +1,20 @@
-import json
-from pathlib import Path
+import pred_store
 
-hf = json.load(open("preds_from_xlmr.json", encoding="utf-8"))
-sp = json.load(open("preds.json", encoding="utf-8"))  # your spaCy+regex preds
-out = {}
-for k in set(list(hf.keys()) + list(sp.keys())):
+# --hf / --preds / --out FILE: .json, .spans or .jsonl; both inputs are read record by
+# record and joined on file name, so JSONL files in the same order take constant memory
+HF = pred_store.path_from_argv("preds_from_xlmr.json", "--hf")
+SP = pred_store.path_from_argv("preds.json")  # your spaCy+regex preds
+OUT = pred_store.path_from_argv("preds_ensemble.json", "--out")
+out = pred_store.PredWriter(OUT)
+for k, hf, sp in pred_store.join_on_file(pred_store.iter_preds(HF, dicts=True), pred_store.iter_preds(SP, dicts=True)):
     items = []
     seen = set()
-    for s in (hf.get(k,[]) + sp.get(k,[])):
+    for s in ((hf or []) + (sp or [])):
         key = (s["start"], s["end"], s["label"])
         if key in seen:
             continue
         seen.add(key)
         items.append(s)
-    out[k] = items
-Path("preds_ensemble.json").write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
-print("wrote preds_ensemble.json")
+    out.write(k, items)
+out.close()
+print(f"wrote {OUT}")
@@ -1,5 +1,7 @@
 import json
-from collections import defaultdict
+
+import pred_store
+from span_match import match_corpus, match_docs
 
 # ------------------ Utility Functions ------------------
 
@@ -9,6 +11,11 @@ def load_json(path):
         return json.load(f)
 
 
+def load_spans(path):
+    """{file name: [Span, ...]} from a gold / preds JSON file or a .spans store (pred_store.py)."""
+    return pred_store.load(path)
+
+
 def span_overlap(a, b):
     """Return True if two spans overlap at all."""
     return not (a[1] <= b[0] or b[1] <= a[0])
@@ -24,37 +31,56 @@ def metrics(tp, fp, fn):
 
 # ------------------ Core Evaluation ------------------
 
+def match_counts(gold, preds):
+    """Per-label and overall tp / fp / fn of {file: [Span, ...]} gold and predictions:
+    each gold span takes the first unmatched prediction of the same label that
+    overlaps it (sort-merge sweep, see span_match.py)."""
+    return _totals(match_corpus(gold, preds)[0])
+
+
+def match_files(gold_path, pred_path):
+    """match_counts of two gold / preds files streamed side by side and joined on file
+    name: JSONL files are read one record at a time, in constant memory if both
+    list the files in the same order."""
+    docs = pred_store.join_on_file(pred_store.iter_preds(gold_path), pred_store.iter_preds(pred_path))
+    return _totals(match_docs(docs)[0])
+
+
+def match_files_by_lang(gold_path, pred_path, langs):
+    """Overall tp / fp / fn and document count per language of two gold / preds files
+    joined on file name; langs: {file: {"lang", "script"}} as in preds_lang.json
+    (redact_demo_updated.py), files it does not list count as "unknown"."""
+    by_lang = {}
+    docs = pred_store.join_on_file(pred_store.iter_preds(gold_path), pred_store.iter_preds(pred_path))
+    for doc in docs:
+        if doc[1] is None:
+            continue
+        lang = langs.get(doc[0], {}).get("lang", "unknown")
+        row = by_lang.setdefault(lang, {"docs": 0, "tp": 0, "fp": 0, "fn": 0})
+        row["docs"] += 1
+        for r in match_docs([doc])[0].values():
+            for k in ("tp", "fp", "fn"):
+                row[k] += r[k]
+    return by_lang
+
+
+def _totals(results):
+    all_tp = sum(r["tp"] for r in results.values())
+    all_fp = sum(r["fp"] for r in results.values())
+    all_fn = sum(r["fn"] for r in results.values())
+    return results, (all_tp, all_fp, all_fn)
+
+
 def evaluate(gold, preds):
-    """Compare gold vs predictions at span level."""
-    results = defaultdict(lambda: {"tp": 0, "fp": 0, "fn": 0})
-    all_tp, all_fp, all_fn = 0, 0, 0
-
-    for fname, g_spans in gold.items():
-        p_spans = preds.get(fname, [])
-        matched_pred = set()
-
-        for g in g_spans:
-            found = False
-            for i, p in enumerate(p_spans):
-                if i in matched_pred:
-                    continue
-                if g["label"] == p["label"] and span_overlap((g["start"], g["end"]), (p["start"], p["end"])):
-                    results[g["label"]]["tp"] += 1
-                    all_tp += 1
-                    matched_pred.add(i)
-                    found = True
-                    break
-            if not found:
-                results[g["label"]]["fn"] += 1
-                all_fn += 1
-
-        # false positives = preds not matched
-        for i, p in enumerate(p_spans):
-            if i not in matched_pred:
-                results[p["label"]]["fp"] += 1
-                all_fp += 1
-
-    # ------------------ Printing Results ------------------
+    """Compare gold vs predictions at span level; prints the table, returns overall (P, R, F1)."""
+    return report(*match_counts(gold, preds))
+
+
+# ------------------ Printing Results ------------------
+
+def report(results, totals):
+    """Print the per-label table of match_counts / match_files; returns overall (P, R, F1)."""
+    all_tp, all_fp, all_fn = totals
 
     print("\n🔍  Evaluation Results\n")
     print("{:<12} {:>10} {:>10} {:>10}".format("Label", "Precision", "Recall", "F1"))
@@ -66,17 +92,37 @@ def evaluate(gold, preds):
     overall_p, overall_r, overall_f1 = metrics(all_tp, all_fp, all_fn)
     print("{:<12} {:>10.3f} {:>10.3f} {:>10.3f}".format("Overall", overall_p, overall_r, overall_f1))
     print()
+    return overall_p, overall_r, overall_f1
+
+
+def report_by_lang(by_lang):
+    """Print the per-language table of match_files_by_lang."""
+    print("{:<12} {:>6} {:>10} {:>10} {:>10}".format("Language", "Docs", "Precision", "Recall", "F1"))
+    print("-" * 52)
+    for lang, r in sorted(by_lang.items()):
+        p, r_, f1 = metrics(r["tp"], r["fp"], r["fn"])
+        print("{:<12} {:>6} {:>10.3f} {:>10.3f} {:>10.3f}".format(lang, r["docs"], p, r_, f1))
+    print()
 
 
 # ------------------ Main Entry ------------------
 
 if __name__ == "__main__":
+    import os
     import sys
-    if len(sys.argv) != 3:
-        print("Usage: python evaluate.py gold.json preds.json")
+    args = sys.argv[1:]
+    # --langs FILE: per-document languages (default preds_lang.json, written by
+    # redact_demo_updated.py; skipped if missing) for a per-language table
+    langs_path = "preds_lang.json"
+    if "--langs" in args:
+        i = args.index("--langs")
+        langs_path = args[i + 1] if i + 1 < len(args) else None
+        del args[i:i + 2]
+    if len(args) != 2 or langs_path is None:
+        print("Usage: python evaluate.py gold.json preds.json [--langs preds_lang.json]   (.spans / .jsonl files too)")
         sys.exit(1)
 
-    gold_path, pred_path = sys.argv[1], sys.argv[2]
-    gold = load_json(gold_path)
-    preds = load_json(pred_path)
-    evaluate(gold, preds)
+    gold_path, pred_path = args
+    report(*match_files(gold_path, pred_path))
+    if os.path.exists(langs_path):
+        report_by_lang(match_files_by_lang(gold_path, pred_path, load_json(langs_path)))
@@ -1,9 +1,16 @@
 # fix_preds.py  (final patched: aggressive-clean + merge addrs + PERSON filter + strict DATE + strict PIN/FILE)
-import json
 import re
-import unicodedata
+import sys
 from pathlib import Path
 
+from cue_index import CueIndex, ADDRESS_KEYWORDS
+from manifest import Manifest, content_hash, file_hash, tool_version
+import pred_store
+from snippet_index import SnippetIndex, best_match
+from span_types import Span, to_dicts
+from textnorm import FIX_PREDS
+import trace_events
+
 # -------------------- STRICT REGEX VALIDATORS --------------------
 RE_PHONE = re.compile(r'(?:\+91[-\s]?)?[6-9]\d{9}\b')
 RE_EMAIL = re.compile(r'[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}')
@@ -22,12 +29,9 @@ RE_DATE = re.compile(
 )
 
 # -------------------- NORMALIZATION --------------------
-def normalize_text(t):
-    t = unicodedata.normalize('NFKC', t)
-    t = t.replace('\r\n', '\n')
-    t = re.sub(r'[ \t\u00A0]+', ' ', t)
-    t = re.sub(r'[\u200B-\u200F\uFEFF]', '', t)
-    return t
+# NFKC, CRLF -> LF, runs of spaces / tabs / NBSP -> one space, zero-width and
+# direction marks (U+200B-U+200F, BOM) removed
+normalize_text = FIX_PREDS.normalize
 
 # -------------------- CLEAN PREFIXES / EDGES (AGGRESSIVE) --------------------
 CLEAN_PREFIXES = [
@@ -60,28 +64,9 @@ def clean_snippet(snip):
     return s
 
 # -------------------- BEST MATCH FINDER --------------------
-def find_best_match(norm_text, snippet, approx_start):
-    if not snippet:
-        return None
-    idx = norm_text.find(snippet)
-    if idx != -1:
-        return idx, idx + len(snippet)
-    s = snippet.strip()
-    if not s:
-        return None
-    s2 = re.sub(r'\s+', ' ', s)
-    idx = norm_text.find(s2)
-    if idx != -1:
-        return idx, idx + len(s2)
-    L = len(s)
-    for w in range(min(30, L), 3, -1):
-        piece = s[:w]
-        lo = max(0, approx_start - 60)
-        hi = min(len(norm_text), approx_start + 60)
-        idx = norm_text.find(piece, lo, hi)
-        if idx != -1:
-            return idx, idx + w
-    return None
+def find_best_match(index, snippet, approx_start):
+    # index: SnippetIndex of the normalized document, built once per document
+    return best_match(index, snippet, approx_start, max_prefix=30, radius=60)
 
 # -------------------- IOU --------------------
 def iou(a, b):
@@ -91,27 +76,49 @@ def iou(a, b):
 
 # -------------------- MAIN --------------------
 PROJECT_RTI = "rtis"
-preds = json.load(open("preds.json", encoding="utf-8"))
-fixed = {}
-
-for fname, spans in preds.items():
+INFILE = pred_store.path_from_argv("preds.json")  # --preds FILE: .json, .spans store or .jsonl
+OUTFILE = pred_store.path_from_argv("preds_fixed.json", "--out")  # --out FILE; .jsonl too
+trace_events.from_argv()  # --trace FILE: per-file stage timings (Chrome trace JSON)
+# one record at a time: with JSONL input and output no file is held whole
+preds = pred_store.iter_preds(INFILE)
+out = pred_store.PredWriter(OUTFILE)
+names = []
+
+# incremental: a file is redone only if its input entry, its text or this
+# script changed (--full redoes everything)
+manifest = Manifest("fix_preds", tool_version("fix_preds.py", "cue_index.py", "snippet_index.py", "span_types.py",
+                                              "textnorm.py"))
+previous = pred_store.PreviousOutput(None if "--full" in sys.argv else OUTFILE)
+
+for fname, spans in preds:
     path = Path(PROJECT_RTI) / fname
     if not path.exists():
         print("Missing text file:", path)
         continue
 
+    input_hash = content_hash(to_dicts(spans), file_hash(path))
+    entry = previous.get(fname) if manifest.known(fname, input_hash) else None
+    if manifest.fresh(fname, input_hash, entry):
+        out.write(fname, entry)
+        names.append(fname)
+        continue
+
+    t_file = trace_events.start(doc=fname)
+    t0 = trace_events.start()
     raw = path.read_text(encoding="utf-8")
     ntext = normalize_text(raw)
+    cues = CueIndex(ntext)  # address / PIN cue lookups; the text is scanned only when a span asks
+    index = SnippetIndex(ntext)  # snippet searches; a 4-gram map on long documents
+    trace_events.record("read_normalize", t0)
+    t0 = trace_events.start()
     new_spans = []
 
     for s in spans:
-        lab = s.get("label")
-        st = int(s.get("start", 0))
-        ed = int(s.get("end", 0))
-        st = max(0, st)
-        ed = max(st, ed)
+        lab = s.label
+        st = max(0, s.start)
+        ed = max(st, s.end)
 
-        snippet = s.get("text") or raw[st:ed]
+        snippet = s.text or raw[st:ed]
         snippet = normalize_text(snippet)
         snippet = clean_snippet(snippet)
 
@@ -121,7 +128,7 @@ for fname, spans in preds.items():
                 continue
             snippet = clean_snippet(sn2)
 
-        found = find_best_match(ntext, snippet, st)
+        found = find_best_match(index, snippet, st)
         if found:
             nst, ned = found
         else:
@@ -212,9 +219,8 @@ for fname, spans in preds.items():
                     continue
 
             # require a contextual cue near the PIN (left or right)
-            left = ntext[max(0, nst-20):nst].lower()
-            right = ntext[ned:min(len(ntext), ned+20)].lower()
-            if not re.search(r'\b(pin|pincode|pincode:|pin:|postcode|zip|pin-)\b', left + " " + right):
+            if not (cues.any_word_within("pin", max(0, nst-20), nst)
+                    or cues.any_word_within("pin", ned, min(len(ntext), ned+20))):
                 # allow PIN if it appears at very end of a line (likely part of address)
                 # check a small window around the pin for a newline right after or before
                 window = ntext[max(0, nst-6):min(len(ntext), ned+6)]
@@ -225,74 +231,85 @@ for fname, spans in preds.items():
         if len(real) < 2:
             continue
 
-        new_spans.append({
-            "start": nst, "end": ned,
-            "label": lab, "text": real
-        })
+        new_spans.append(Span(nst, ned, lab, real))
+
+    trace_events.record("align_spans", t0, spans=len(spans))
 
     # -------------------- MERGE ADDRESS SUB-SPANS & FILTER PERSONS --------------------
-    addr_spans = [x for x in new_spans if x['label'] == 'ADDRESS']
-    addr_spans = sorted(addr_spans, key=lambda a: (a['start'], a['end']))
+    t0 = trace_events.start()
+    addr_spans = [x for x in new_spans if x.label == 'ADDRESS']
+    addr_spans = sorted(addr_spans, key=lambda a: (a.start, a.end))
     merged_addr = []
     for a in addr_spans:
         if not merged_addr:
             merged_addr.append(a.copy())
             continue
         last = merged_addr[-1]
-        if a['start'] <= last['end'] or (a['start'] - last['end']) <= 3:
-            last['end'] = max(last['end'], a['end'])
-            last['text'] = ntext[last['start']:last['end']].strip()
+        if a.start <= last.end or (a.start - last.end) <= 3:
+            last.end = max(last.end, a.end)
+            last.text = ntext[last.start:last.end].strip()
         else:
             merged_addr.append(a.copy())
 
-    non_addr = [x for x in new_spans if x['label'] != 'ADDRESS']
+    non_addr = [x for x in new_spans if x.label != 'ADDRESS']
     new_spans = non_addr + merged_addr
 
-    ADDRESS_KEYWORDS = {
-        'apt','apartment','colony','col','road','rd','street','st','vihar',
-        'village','flat','block','sector','enclave','layout','nagar','kalan',
-        'residency','residences','bazar','bazaar','housing','lane','gali',
-        'near','opp','opposite','behind','phase','mandir','park','meadow','heights'
-    }
     filtered = []
-    addr_ranges = [(a['start'], a['end']) for a in merged_addr]
+    addr_ranges = [(a.start, a.end) for a in merged_addr]
 
     for s in new_spans:
-        if s['label'] == 'PERSON':
-            txt = s['text'].lower()
-            if any(kw in txt for kw in ADDRESS_KEYWORDS):
+        if s.label == 'PERSON':
+            txt = s.text.lower()
+            # text is normally the (stripped) slice itself -> answer from the cue index
+            if ntext[s.start:s.end].strip() == s.text:
+                if cues.any_within("address", s.start, s.end):
+                    continue
+            elif any(kw in txt for kw in ADDRESS_KEYWORDS):
                 continue
-            inside = any(s['start'] >= a0 and s['end'] <= a1 for (a0,a1) in addr_ranges)
+            inside = any(s.start >= a0 and s.end <= a1 for (a0,a1) in addr_ranges)
             if inside:
                 continue
             if len(txt) <= 3:
-                left = ntext[max(0, s['start']-4):s['start']].strip()
-                right = ntext[s['end']:s['end']+4].strip()
+                left = ntext[max(0, s.start-4):s.start].strip()
+                right = ntext[s.end:s.end+4].strip()
                 if re.search(r'[:\-\|,]', left + right):
                     continue
         filtered.append(s)
 
     new_spans = filtered
+    trace_events.record("merge_filter", t0)
     # -------------------- END MERGE+FILTER --------------------
 
     # -------------------- REMOVE DUPES --------------------
+    t0 = trace_events.start()
     unique = []
-    for s in sorted(new_spans, key=lambda x: (x['label'], x['start'])):
+    for s in sorted(new_spans, key=lambda x: (x.label, x.start)):
         dup = False
         for u in unique:
-            if s['label'] == u['label'] and iou((s['start'], s['end']), (u['start'], u['end'])) > 0.5:
-                if (s['end'] - s['start']) > (u['end'] - u['start']):
-                    u.update(s)
+            if s.code == u.code and iou((s.start, s.end), (u.start, u.end)) > 0.5:
+                if (s.end - s.start) > (u.end - u.start):
+                    u.start, u.end, u.text = s.start, s.end, s.text
                 dup = True
                 break
         if not dup:
             unique.append(s)
 
-    fixed[fname] = unique
-
-open("preds_fixed.json", "w", encoding="utf-8").write(
-    json.dumps(fixed, ensure_ascii=False, indent=2)
-)
-
-print("wrote preds_fixed.json — now run:")
-print("python debug_preds_gold.py gold.json preds_fixed.json rtis")
+    trace_events.record("dedupe", t0)
+
+    fixed = to_dicts(unique)
+    out.write(fname, fixed)
+    names.append(fname)
+    manifest.record(fname, input_hash, entry=fixed)
+    trace_events.record("fix_preds_file", t_file)
+
+# the output replaces the previous one only if some file changed
+if manifest.stats["stale"] or previous.names() != names:
+    out.close()
+else:
+    out.discard()
+manifest.prune(names)
+manifest.save()
+print(f"incremental: {manifest.stats['stale']} file(s) processed, {manifest.stats['fresh']} unchanged")
+
+print(f"wrote {OUTFILE} — now run:")
+print(f"python debug_preds_gold.py gold.json {OUTFILE} rtis")
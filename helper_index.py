@@ -1,22 +1,17 @@
 # helper_index.py (FIXED — UNICODE NORMALIZED + FUZZY SEARCH)
 
 import re
-import unicodedata
+from textnorm import DEFAULT
 
 file = "rtis/sample33.txt" # change this for other files
 
-def normalize(s: str) -> str:
-    # NFC normalize, remove zero-width chars, replace fancy quotes/dashes
-    s = unicodedata.normalize("NFKC", s)
-    s = s.replace("\u200c", "").replace("\u200d", "").replace("\ufeff", "")
-    s = s.replace("“", '"').replace("”", '"')
-    s = s.replace("‘", "'").replace("’", "'")
-    s = s.replace("—", "-").replace("–", "-")
-    return s
+# NFKC, remove zero-width chars, replace fancy quotes/dashes, fold line endings;
+# raw_offsets[i] is where normalized char i sits in the file
+normalize = DEFAULT.normalize
 
 # load + normalize
 raw_text = open(file, encoding="utf-8", errors="replace").read()
-text = normalize(raw_text)
+text, raw_offsets = DEFAULT.normalize_with_map(raw_text)
 
 target = input("Enter a keyword or number to search: ").strip()
 target_norm = normalize(target)
@@ -26,6 +21,7 @@ idx = text.lower().find(target_norm.lower())
 if idx != -1:
     print("\nExact-ish match found after normalization!")
     print(f"Start: {idx}, End: {idx + len(target_norm)}")
+    print(f"Raw file offsets: {raw_offsets[idx]}-{raw_offsets[idx + len(target_norm)]}")
     print("Extracted:", repr(text[idx:idx+len(target_norm)]))
     exit()
 
@@ -35,6 +31,7 @@ fuzzy = re.search(pattern, text, flags=re.IGNORECASE)
 if fuzzy:
     print("\nFuzzy match found!")
     print(f"Start: {fuzzy.start()}, End: {fuzzy.end()}")
+    print(f"Raw file offsets: {raw_offsets[fuzzy.start()]}-{raw_offsets[fuzzy.end()]}")
     print("Extracted:", repr(text[fuzzy.start():fuzzy.end()]))
     exit()
 
@@ -0,0 +1,124 @@
+# hf_batch.py
+# Cross-document dynamic batching for the XLM-R token classifier (CPU).
+# Each document is tokenized whole (a long one overflows into max_length rows),
+# rows are bucketed by token length and each batch is padded only to its own
+# longest member. The tags of a document's rows are decoded together, grouped the
+# way the "simple" aggregation of the HF pipeline groups them, so an entity may run
+# across a line break or a row edge. hf_spans() is this engine with one document.
+# The model is either a PyTorch token classifier or an onnx_backend.OnnxTokenClassifier.
+import time
+from itertools import chain
+
+import numpy as np
+
+from span_types import Span
+
+
+def _entity_type(label):
+    if label.startswith("B-") or label.startswith("I-"):
+        return label[2:]
+    return label
+
+
+class BatchedTokenClassifier:
+    """
+    Wrap a token-classification model + fast tokenizer for batched CPU inference.
+    model: a PyTorch model, or anything with .config and logits(ids, mask) on
+    numpy arrays (onnx_backend.OnnxTokenClassifier); torch is only imported for the former.
+
+    stats (cumulative over predict() calls):
+      tokens  - real (non-pad) tokens run through the model
+      padded  - pad tokens added to fill batches
+      seconds - time spent in tokenization + forward passes
+    """
+
+    def __init__(self, model, tokenizer, batch_size=16, max_length=512, device=None):
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.torch = hasattr(model, "parameters")
+        if self.torch:
+            # device=None: run wherever the model already lives (CPU on our hosts)
+            self.model = model.eval()
+            self.device = device or next(model.parameters()).device
+            if device is not None:
+                self.model.to(device)
+        else:
+            self.model, self.device = model, "cpu"
+        self.id2label = {int(k): v for k, v in model.config.id2label.items()}
+        self.stats = {"tokens": 0, "padded": 0, "seconds": 0.0}
+
+    # ---------- rows: (doc index, row number, token ids, char offsets) ----------
+    def _rows(self, texts):
+        """Tokenize every document; documents longer than max_length overflow into extra rows."""
+        rows = []
+        for di, text in enumerate(texts):
+            if not text.strip():
+                continue
+            enc = self.tokenizer(text, truncation=True, max_length=self.max_length,
+                                 return_overflowing_tokens=True, return_offsets_mapping=True)
+            for k, (ids, offsets) in enumerate(zip(enc["input_ids"], enc["offset_mapping"])):
+                rows.append((di, k, ids, offsets))
+        return rows
+
+    def _decode(self, tagged):
+        """Spans of one document from its (label id, (start, end)) tokens, in text order."""
+        spans, cur = [], None
+        for pid, (st, ed) in tagged:
+            if st == ed:  # special / pad token
+                continue
+            label = self.id2label.get(pid, "O")
+            if label == "O":
+                cur = None
+                continue
+            etype = _entity_type(label)
+            if cur is not None and cur.label == etype and not label.startswith("B-"):
+                cur.end = ed
+            else:
+                cur = Span(st, ed, etype)
+                spans.append(cur)
+        return spans
+
+    def predict(self, texts):
+        """Return one span list per text."""
+        t0 = time.perf_counter()
+        tagged = [{} for _ in texts]  # doc -> row number -> tagged tokens
+        rows = self._rows(texts)
+        # bucket by length: neighbours in this order have similar token counts
+        rows.sort(key=lambda r: len(r[2]))
+        pad_id = self.tokenizer.pad_token_id
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i:i + self.batch_size]
+            width = len(batch[-1][2])
+            ids = np.full((len(batch), width), pad_id, dtype=np.int64)
+            mask = np.zeros((len(batch), width), dtype=np.int64)
+            for j, (_, _, row_ids, _) in enumerate(batch):
+                ids[j, :len(row_ids)] = row_ids
+                mask[j, :len(row_ids)] = 1
+                self.stats["tokens"] += len(row_ids)
+                self.stats["padded"] += width - len(row_ids)
+            preds = self._logits(ids, mask).argmax(-1).tolist()
+            for (di, k, row_ids, offsets), pred in zip(batch, preds):
+                tagged[di][k] = list(zip(pred[:len(row_ids)], offsets))
+        out = [self._decode(chain.from_iterable(doc[k] for k in sorted(doc))) for doc in tagged]
+        self.stats["seconds"] += time.perf_counter() - t0
+        return out
+
+    def _logits(self, ids, mask):
+        if not self.torch:
+            return self.model.logits(ids, mask)
+        import torch
+        with torch.inference_mode():
+            out = self.model(input_ids=torch.from_numpy(ids).to(self.device),
+                             attention_mask=torch.from_numpy(mask).to(self.device))
+        return out.logits.float().cpu().numpy()
+
+    def report(self):
+        """tokens/s and the share of padded positions, for logging after a run."""
+        total = self.stats["tokens"] + self.stats["padded"]
+        secs = self.stats["seconds"] or float("nan")
+        return {
+            "tokens": self.stats["tokens"],
+            "tokens_per_s": self.stats["tokens"] / secs,
+            "padding_waste": self.stats["padded"] / total if total else 0.0,
+        }
@@ -1,23 +1,48 @@
 # inference_model.py
-from transformers import pipeline, XLMRobertaTokenizerFast, XLMRobertaForTokenClassification
+from transformers import XLMRobertaTokenizerFast, XLMRobertaForTokenClassification
 import sys, pathlib, json
 
+from hf_batch import BatchedTokenClassifier
+
 MODEL_DIR = "xlm_rti_ner_final_more"  # folder you downloaded/unzipped
-tokenizer = XLMRobertaTokenizerFast.from_pretrained("xlm-roberta-base")
-model = XLMRobertaForTokenClassification.from_pretrained(MODEL_DIR)
+# CPU backend: "torch" (eager fp32) or "onnx" / "onnx-int8" (ONNX Runtime export of
+# MODEL_DIR, see onnx_backend.py); also selectable with --backend
+BACKEND = "torch"
+ONNX_DIR = "xlm_rti_ner_onnx"
+if "--backend" in sys.argv:
+    BACKEND = sys.argv[sys.argv.index("--backend") + 1]
 
 # Replace LABELS with the same list you used during training (B/I + O)
 LABELS = ["O","B-PERSON","I-PERSON","B-ADDRESS","I-ADDRESS","B-PHONE","I-PHONE","B-EMAIL","I-EMAIL","B-AADHAAR","I-AADHAAR","B-PAN","I-PAN","B-PIN","I-PIN","B-DATE","I-DATE","B-FILE","I-FILE"]
-model.config.id2label = {i: LABELS[i] for i in range(len(LABELS))}
-model.config.label2id = {v:k for k,v in model.config.id2label.items()}
 
-ner = pipeline("token-classification", model=model, tokenizer=tokenizer, aggregation_strategy="simple", device=-1) # device=-1 uses CPU
+if BACKEND == "torch":
+    tokenizer = XLMRobertaTokenizerFast.from_pretrained("xlm-roberta-base")
+    model = XLMRobertaForTokenClassification.from_pretrained(MODEL_DIR)
+    model.config.id2label = {i: LABELS[i] for i in range(len(LABELS))}
+    model.config.label2id = {v:k for k,v in model.config.id2label.items()}
+else:
+    import onnx_backend
+    loaded = onnx_backend.load(BACKEND, ONNX_DIR)
+    if loaded is None:
+        sys.exit(f"export first: python onnx_backend.py {MODEL_DIR} --out {ONNX_DIR} --int8")
+    model, tokenizer = loaded
+
+# batched CPU engine over the model (either backend): documents bucketed by token length
+engine = BatchedTokenClassifier(model, tokenizer, batch_size=16)
 
 def infer_text(text):
-    return ner(text)
+    """span_types.Span list of one text (the engine with a batch of one)."""
+    return engine.predict([text])[0]
+
+def infer_texts(texts):
+    """One span_types.Span list per text, batched; see engine.report() for tokens/s."""
+    return engine.predict(texts)
 
 if __name__ == "__main__":
     import sys
     s = "राहुल वर्मा, फोन 9876543210, email rahul@example.com, Address: 12 MG Road"
+    print("Backend:", BACKEND)
     print("Input:", s)
     print("NER:", infer_text(s))
+    print("Batched:", infer_texts([s, "Applicant: Ramesh Iyer\nPhone: 9488801122"]))
+    print("Engine:", engine.report())
@@ -0,0 +1,79 @@
+# langid.py
+# Deterministic language / script identification for RTI documents, replacing
+# langdetect (slow, random without a seed, loads its profiles at import). The
+# script comes from Unicode block ratios (script_runs.script_histogram); within
+# Devanagari, Hindi and Marathi are told apart by small marker lexicons, and Latin
+# text full of romanized Hindi function words is "hinglish".
+import re
+
+from script_runs import script_histogram
+
+# dominant script -> language when there is nothing finer to decide
+SCRIPT_LANG = {"latin": "en", "devanagari": "hi", "bengali": "bn", "gurmukhi": "pa", "gujarati": "gu",
+               "oriya": "or", "tamil": "ta", "telugu": "te", "kannada": "kn", "malayalam": "ml",
+               "arabic": "ur"}
+
+# a document is "mixed" when no script has this share of its letters
+DOMINANT_SHARE = 0.8
+# lexicon checks look at the start of the document only, so their cost is bounded
+LEXICON_CHARS = 20_000
+
+MARATHI_WORDS = frozenset("""
+आहे आहेत आणि नाही मला माझे माझा माझी माझ्या तुम्ही आपण करावी द्यावी द्यावे मिळावी
+पत्ता अर्जदार माहिती येथे होते होती केले केली
+""".split())
+MARATHI_SUFFIXES = ("च्या", "ाचे", "ाची", "ाचा", "ामध्ये")
+HINDI_WORDS = frozenset("""
+है हैं और नहीं का की के में से को मुझे मेरा मेरी हमें आप पता आवेदक जानकारी था थी गया गई
+किया दिया लिए तक यह वह
+""".split())
+
+HINGLISH_WORDS = frozenset("""
+hai hain ka ki ke ko se mein mujhe mera meri mere naam aur nahi nahin kya kripya chahiye
+pichle saal wala wali wale bhai batao diya gaya gayi karein karna kiya liye tak jankari
+avedak pata anurodh hamare humein aap yeh woh tha thi hua hui raha rahi abhi sabhi kaun
+kitna kab kyun kaise
+""".split())
+HINGLISH_MIN_HITS = 2
+HINGLISH_SHARE = 0.05  # of the Latin words
+
+_DEVANAGARI_WORD = re.compile(r"[ऀ-ॣ०-ॿ]+")
+_LATIN_WORD = re.compile(r"[a-z]+")
+
+
+def _devanagari_lang(text):
+    words = _DEVANAGARI_WORD.findall(text[:LEXICON_CHARS])
+    mr = sum(w in MARATHI_WORDS or w.endswith(MARATHI_SUFFIXES) for w in words)
+    hi = sum(w in HINDI_WORDS for w in words)
+    return "mr" if mr > hi else "hi"
+
+
+def _latin_lang(text):
+    words = _LATIN_WORD.findall(text[:LEXICON_CHARS].lower())
+    hits = sum(w in HINGLISH_WORDS for w in words)
+    return "hinglish" if hits >= HINGLISH_MIN_HITS and hits >= HINGLISH_SHARE * len(words) else "en"
+
+
+def identify(text):
+    """
+    {"lang": ..., "script": ...} for a (normalized) document. lang: "en",
+    "hinglish", "hi", "mr", "bn", "ta", ... or "unknown" (no letters); script: the
+    dominant script, or "mixed" if none has DOMINANT_SHARE of the letters.
+    """
+    if text.isascii():
+        if not re.search(r"[A-Za-z]", text):
+            return {"lang": "unknown", "script": "common"}
+        return {"lang": _latin_lang(text), "script": "latin"}
+    hist = script_histogram(text)
+    letters = {s: n for s, n in hist.items() if n and s in SCRIPT_LANG}
+    if not letters:
+        return {"lang": "unknown", "script": "other" if hist["other"] else "common"}
+    top = max(letters, key=letters.get)
+    script = top if letters[top] >= DOMINANT_SHARE * sum(letters.values()) else "mixed"
+    if top == "devanagari":
+        lang = _devanagari_lang(text)
+    elif top == "latin":
+        lang = _latin_lang(text)
+    else:
+        lang = SCRIPT_LANG[top]
+    return {"lang": lang, "script": script}
@@ -0,0 +1,123 @@
+# manifest.py
+# Incremental corpus runs. Each stage (redact_demo_updated, fix_preds, clean_preds,
+# apply_redaction) records per input file the hash of what it read, the stage's
+# tool version and what it wrote; on the next run files whose record still matches
+# are skipped and their previous outputs are kept.
+import json
+import hashlib
+import pathlib
+
+DEFAULT_PATH = ".manifest.json"
+
+
+def content_hash(*parts):
+    """sha256 over strings / bytes / JSON-serializable values (dict key order ignored)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        elif not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+def file_hash(path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def tool_version(*sources, config=None):
+    """Version of a stage: its source files plus whatever configuration shapes its output."""
+    here = pathlib.Path(__file__).resolve().parent
+    return content_hash(*((here / s).read_bytes() for s in sources), config)[:16]
+
+
+def _stat(path):
+    st = pathlib.Path(path).stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+class Manifest:
+    """
+    Records of one stage inside the shared manifest file.
+
+    item = {"input": hash of everything the file's result depends on,
+            "outputs": {path: [size, mtime_ns]} of per-file outputs written,
+            "entry": hash of the file's entry in an aggregated output (preds*.json),
+            "meta": anything the stage needs to report without recomputing}
+
+    A record is fresh when the input hash matches and the outputs are still the
+    ones written (an overwrite by another tool changes size / mtime, an edit of
+    the aggregated JSON changes the entry hash). A new tool version drops all records.
+    """
+
+    def __init__(self, stage, version, path=DEFAULT_PATH):
+        self.stage = stage
+        self.version = version
+        self.path = pathlib.Path(path)
+        data = self._load()
+        section = data.get(stage, {})
+        self.items = section.get("items", {}) if section.get("version") == version else {}
+        self.stats = {"fresh": 0, "stale": 0}
+
+    def _load(self):
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def known(self, key, input_hash):
+        """Whether `key` was recorded with this input (fresh() also checks entry and outputs)."""
+        item = self.items.get(key)
+        return item is not None and item["input"] == input_hash
+
+    def fresh(self, key, input_hash, entry=None):
+        item = self.items.get(key)
+        ok = self.known(key, input_hash)
+        if ok and "entry" in item:
+            ok = entry is not None and content_hash(entry) == item["entry"]
+        if ok:
+            try:
+                ok = all(_stat(p) == st for p, st in item["outputs"].items())
+            except OSError:
+                ok = False
+        self.stats["fresh" if ok else "stale"] += 1
+        return ok
+
+    def meta(self, key):
+        return self.items[key].get("meta")
+
+    def record(self, key, input_hash, outputs=(), entry=None, meta=None):
+        item = {"input": input_hash, "outputs": {str(p): _stat(p) for p in outputs}}
+        if entry is not None:
+            item["entry"] = content_hash(entry)
+        if meta is not None:
+            item["meta"] = meta
+        self.items[key] = item
+
+    def prune(self, keys):
+        """Forget files that are no longer part of the corpus."""
+        keys = set(keys)
+        for key in [k for k in self.items if k not in keys]:
+            del self.items[key]
+
+    def save(self):
+        # other stages may have saved since we loaded: only replace our section
+        data = self._load()
+        data[self.stage] = {"version": self.version, "items": self.items}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def load_json(path, default=None):
+    """Previous aggregated output, or `default` if there is none yet."""
+    try:
+        return json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {} if default is None else default
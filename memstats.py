@@ -0,0 +1,315 @@
+# memstats.py
+# Memory accounting and RSS budgets for the pipeline stages of trace_events.
+# Accounting (enable_accounting) records, for every stage, the tracemalloc peak
+# above the allocations live when it started (nested stages included) and the
+# RSS delta, per stage and per document: stage aggregates and the documents with
+# the highest peaks go to a JSON run report, every (document, stage) row to
+# <report>.docs.jsonl next to it. tracemalloc slows allocation-heavy Python code
+# down noticeably, so this is a diagnostic mode.
+# A budget (set_budget) needs no tracemalloc: check() compares the current RSS
+# with it after every document and, when over, spills the predictions collected
+# so far to disk (SpillDict) and halves every batch size read through batch(), so
+# a long run slows down instead of being OOM-killed. CPython rarely hands freed
+# memory back to the OS, so RSS may not fall after an action; it stops growing.
+import os
+import sys
+import json
+import time
+import heapq
+import tempfile
+import threading
+import tracemalloc
+
+import trace_events
+
+TOP_DOCUMENTS = 20   # (document, stage) rows with the highest peaks kept in the report
+COOLDOWN_DOCS = 32   # documents between two budget actions, for them to take effect
+MAX_SCALE = 64       # batch sizes are divided by at most this
+
+_ACCOUNTING = None
+_REPORT = None
+_BUDGET_MB = None
+_SCALE = 1
+_ACTIONS = []
+_SINCE = COOLDOWN_DOCS
+_STARTED = time.perf_counter()
+
+
+# -------------------- RSS --------------------
+_PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+
+
+def rss_kb():
+    """Current resident set size (Linux); elsewhere the peak so far, the closest portable figure."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_KB
+    except OSError:
+        return int(peak_rss_mb() * 1024)
+
+
+def reset_peak_rss():
+    """Start a new peak-RSS window (Linux only); False where that is not possible."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+# -------------------- ACCOUNTING --------------------
+class MemoryAccounting:
+    """
+    trace_events observer. Peaks nest: before a child stage starts, the parent's
+    peak so far is saved and tracemalloc's peak reset; when the child ends, its
+    peak is handed up, so every stage reports the highest point reached inside it.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows  # JSONL file or, in a worker, a list handed back by drain()
+        self.stages = {}
+        self.top = []     # heap of (peak_kb, doc, stage)
+        self.peak = 0
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def enter(self, args):
+        rss = rss_kb()  # before the peak is reset: reading it allocates too
+        stack = self._stack()
+        current, peak = tracemalloc.get_traced_memory()
+        doc = args.get("doc")
+        if stack:
+            parent = stack[-1]
+            parent[2] = max(parent[2], peak)
+            doc = doc or parent[0]
+        tracemalloc.reset_peak()
+        frame = [doc, current, current, rss]
+        stack.append(frame)
+        return frame
+
+    def exit(self, name, args, frame):
+        _, peak = tracemalloc.get_traced_memory()
+        rss = rss_kb()
+        stack = self._stack()
+        # start() / record() stages need not nest strictly: drop whatever was left open inside
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i] is frame:
+                del stack[i:]
+                break
+        doc, start, seen, rss0 = frame
+        seen = max(seen, peak)
+        if stack:
+            stack[-1][2] = max(stack[-1][2], seen)
+        self.peak = max(self.peak, seen)
+        tracemalloc.reset_peak()
+
+        peak_kb, rss_delta_kb = (seen - start) // 1024, rss - rss0
+        doc = args.get("doc") or doc
+        s = self.stages.get(name)
+        if s is None:
+            s = self.stages[name] = {"count": 0, "peak_kb_max": 0, "peak_kb_sum": 0,
+                                     "rss_delta_kb_max": 0, "rss_delta_kb_sum": 0}
+        s["count"] += 1
+        s["peak_kb_max"] = max(s["peak_kb_max"], peak_kb)
+        s["peak_kb_sum"] += peak_kb
+        s["rss_delta_kb_max"] = max(s["rss_delta_kb_max"], rss_delta_kb)
+        s["rss_delta_kb_sum"] += rss_delta_kb
+        if doc is not None:
+            self.add_rows([{"doc": doc, "stage": name, "peak_kb": peak_kb, "rss_delta_kb": rss_delta_kb,
+                            "rss_kb": rss}])
+        return {"peak_kb": peak_kb, "rss_delta_kb": rss_delta_kb}
+
+    def add_rows(self, rows):
+        for row in rows:
+            item = (row["peak_kb"], row["doc"], row["stage"])
+            if len(self.top) < TOP_DOCUMENTS:
+                heapq.heappush(self.top, item)
+            elif item > self.top[0]:
+                heapq.heapreplace(self.top, item)
+        if isinstance(self.rows, list):
+            self.rows.extend(rows)
+        else:
+            self.rows.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
+
+    def merge_stages(self, stages):
+        for name, other in stages.items():
+            s = self.stages.setdefault(name, dict.fromkeys(other, 0))
+            for k, v in other.items():
+                s[k] = max(s[k], v) if k.endswith("_max") else s[k] + v
+
+
+def _rows_path(report):
+    return os.path.splitext(report)[0] + ".docs.jsonl"
+
+
+def enable_accounting(report=None):
+    """Account every stage; save_report() writes to `report` (None: collect for drain(), e.g. in a worker)."""
+    global _ACCOUNTING, _REPORT
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _REPORT = report
+    rows = open(_rows_path(report), "w", encoding="utf-8") if report else []
+    _ACCOUNTING = MemoryAccounting(rows)
+    trace_events.observe(_ACCOUNTING)
+
+
+def accounting_enabled():
+    return _ACCOUNTING is not None
+
+
+# -------------------- BUDGET --------------------
+def set_budget(mb):
+    """RSS budget in MB that check() enforces (None: no budget)."""
+    global _BUDGET_MB
+    _BUDGET_MB = mb
+
+
+def budget_mb():
+    return _BUDGET_MB
+
+
+def batch(n):
+    """Batch size n, shrunk by every budget action so far (at least 1)."""
+    return max(1, n // _SCALE)
+
+
+def check(store=None):
+    """
+    Called after every document: when RSS is over budget, spill `store` (a
+    SpillDict, if given) and halve the batch sizes. Returns the action taken, or None.
+    """
+    global _SCALE, _SINCE
+    if _BUDGET_MB is None:
+        return None
+    _SINCE += 1
+    if _SINCE < COOLDOWN_DOCS:
+        return None
+    rss = rss_kb() / 1024
+    if rss <= _BUDGET_MB:
+        return None
+    _SINCE = 0
+    action = {"pid": os.getpid(), "seconds": round(time.perf_counter() - _STARTED, 3), "rss_mb": round(rss, 1)}
+    if isinstance(store, SpillDict):
+        action["spilled"] = store.spill()
+    if _SCALE < MAX_SCALE:
+        _SCALE *= 2
+        action["batch_scale"] = 1 / _SCALE
+    _ACTIONS.append(action)
+    print(f"memstats: RSS {rss:.0f} MB over the {_BUDGET_MB:g} MB budget: "
+          f"{action.get('spilled', 0)} predictions spilled, batch sizes x{1 / _SCALE:g}", file=sys.stderr)
+    return action
+
+
+class SpillDict:
+    """
+    Dict of JSON values that spill() moves to a temporary JSONL file in `dir`;
+    spilled values are read back (one seek each) when looked up, as plain JSON
+    (default= as in json.dumps converts other objects, e.g. Spans, on the way out).
+    """
+
+    def __init__(self, dir=None, default=None):
+        self.dir = dir
+        self.default = default
+        self.mem = {}
+        self.offsets = {}
+        self.fh = None
+
+    def __setitem__(self, key, value):
+        self.mem[key] = value
+        self.offsets.pop(key, None)
+
+    def __getitem__(self, key):
+        if key in self.mem:
+            return self.mem[key]
+        self.fh.seek(self.offsets[key])
+        return json.loads(self.fh.readline())
+
+    def __contains__(self, key):
+        return key in self.mem or key in self.offsets
+
+    def __len__(self):
+        return len(self.mem) + len(self.offsets)
+
+    def spill(self):
+        """Move every in-memory value to disk; returns how many were moved."""
+        if self.fh is None:
+            self.fh = tempfile.TemporaryFile("w+b", prefix="preds_spill_", dir=self.dir)
+        self.fh.seek(0, os.SEEK_END)
+        for key, value in self.mem.items():
+            self.offsets[key] = self.fh.tell()
+            self.fh.write(json.dumps(value, ensure_ascii=False, default=self.default).encode("utf-8") + b"\n")
+        n = len(self.mem)
+        self.mem = {}  # a fresh dict: deleting keys would not shrink the old one
+        return n
+
+    def close(self):
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
+
+
+# -------------------- WORKERS + REPORT --------------------
+def drain():
+    """This process's accounting since the last drain (a worker hands it to its parent)."""
+    acc = _ACCOUNTING
+    part = {"actions": _ACTIONS[:]}
+    _ACTIONS.clear()
+    if acc is not None:
+        part.update(stages=acc.stages, rows=acc.rows, peak=acc.peak)
+        acc.stages, acc.rows, acc.peak = {}, [], 0
+    return part
+
+
+def merge(part):
+    """Add accounting drained in another process."""
+    _ACTIONS.extend(part["actions"])
+    if _ACCOUNTING is not None and "stages" in part:
+        _ACCOUNTING.merge_stages(part["stages"])
+        _ACCOUNTING.add_rows(part["rows"])
+        _ACCOUNTING.peak = max(_ACCOUNTING.peak, part["peak"])
+
+
+def save_report(path=None, **run):
+    """Write the run report (JSON); `run` adds fields such as the number of documents."""
+    path = path or _REPORT
+    if path is None:
+        return
+    acc = _ACCOUNTING
+    report = {**run, "seconds": round(time.perf_counter() - _STARTED, 3),
+              "rss_budget_mb": _BUDGET_MB, "batch_scale": 1 / _SCALE,
+              "rss_peak_mb": round(peak_rss_mb(), 1), "rss_end_mb": round(rss_kb() / 1024, 1),
+              "budget_actions": _ACTIONS}
+    if acc is not None:
+        acc.peak = max(acc.peak, tracemalloc.get_traced_memory()[1])
+        report["tracemalloc_peak_mb"] = round(acc.peak / (1 << 20), 1)
+        report["stages"] = {name: {"count": s["count"], "peak_kb_max": s["peak_kb_max"],
+                                   "peak_kb_mean": round(s["peak_kb_sum"] / s["count"], 1),
+                                   "rss_delta_kb_max": s["rss_delta_kb_max"],
+                                   "rss_delta_kb_sum": s["rss_delta_kb_sum"]}
+                            for name, s in sorted(acc.stages.items())}
+        report["top_documents"] = [{"doc": doc, "stage": stage, "peak_kb": peak}
+                                   for peak, doc, stage in sorted(acc.top, reverse=True)]
+        if not isinstance(acc.rows, list):
+            acc.rows.flush()
+            report["documents"] = _rows_path(path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
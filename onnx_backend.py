@@ -0,0 +1,110 @@
+# onnx_backend.py
+# ONNX Runtime CPU backend for the XLM-R token classifier. export() converts a
+# checkpoint folder (default xlm_rti_ner_final_more/) to ONNX, optionally with a
+# dynamically quantized int8 copy; OnnxTokenClassifier runs it in place of the
+# PyTorch model inside hf_batch.BatchedTokenClassifier.
+#
+#   python onnx_backend.py xlm_rti_ner_final_more --out xlm_rti_ner_onnx --int8
+#
+# Output folder: model.onnx (fp32), model.int8.onnx (with --int8), config.json
+# (id2label) and the tokenizer, so inference needs neither torch nor the network.
+import sys
+import inspect
+import pathlib
+
+MODEL_DIR = "xlm_rti_ner_final_more"
+ONNX_DIR = "xlm_rti_ner_onnx"
+TOKENIZER = "xlm-roberta-base"
+OPSET = 14
+
+# backend name -> model file inside ONNX_DIR
+BACKENDS = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+
+
+# -------------------- EXPORT --------------------
+def export(model_dir=MODEL_DIR, out_dir=ONNX_DIR, int8=False, tokenizer=TOKENIZER, opset=OPSET):
+    """Write model.onnx (and model.int8.onnx if int8) plus config / tokenizer to out_dir."""
+    import torch
+    from transformers import AutoTokenizer, XLMRobertaForTokenClassification
+
+    out = pathlib.Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    model = XLMRobertaForTokenClassification.from_pretrained(model_dir).eval()
+    model.config.save_pretrained(out)
+    tok = AutoTokenizer.from_pretrained(tokenizer)
+    tok.save_pretrained(out)
+
+    # a short dummy batch; batch and sequence axes stay dynamic
+    enc = tok(["Applicant: Ramesh Iyer", "फोन 9876543210"], padding=True, return_tensors="pt")
+    dynamic = {0: "batch", 1: "sequence"}
+    # dynamic_axes is the TorchScript exporter's API; torch >= 2.9 defaults to the
+    # torch.export-based one (which also needs onnxscript)
+    legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.inference_mode():
+        torch.onnx.export(
+            model, (enc["input_ids"], enc["attention_mask"]), str(out / BACKENDS["onnx"]),
+            input_names=["input_ids", "attention_mask"], output_names=["logits"],
+            dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic, "logits": dynamic},
+            opset_version=opset, do_constant_folding=True, **legacy)
+    if int8:
+        quantize(out / BACKENDS["onnx"], out / BACKENDS["onnx-int8"])
+    return out
+
+
+def quantize(src, dst):
+    """Dynamic int8 quantization: weights stored as int8, activations quantized per batch."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(str(src), str(dst), weight_type=QuantType.QInt8)
+
+
+# -------------------- INFERENCE --------------------
+class OnnxTokenClassifier:
+    """
+    An exported token classifier in an ONNX Runtime CPU session. Offers what
+    BatchedTokenClassifier needs from a model: .config (id2label) and
+    logits(input_ids, attention_mask) on int64 numpy arrays.
+    """
+
+    def __init__(self, path, threads=None):
+        import onnxruntime as ort
+        from transformers import AutoConfig
+
+        path = pathlib.Path(path)
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.path = path
+        self.config = AutoConfig.from_pretrained(path.parent)
+        self.session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+
+    def logits(self, input_ids, attention_mask):
+        return self.session.run(["logits"], {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+
+
+def load(backend, onnx_dir=ONNX_DIR, threads=None):
+    """(model, tokenizer) for an ONNX backend name, or None if unavailable."""
+    path = pathlib.Path(onnx_dir) / BACKENDS[backend]
+    if not path.exists():
+        print(f"No ONNX model '{path}' found — run onnx_backend.py to export it.", file=sys.stderr)
+        return None
+    try:
+        from transformers import AutoTokenizer
+        return OnnxTokenClassifier(path, threads), AutoTokenizer.from_pretrained(onnx_dir)
+    except Exception as e:
+        print("Failed to load ONNX model:", e, file=sys.stderr)
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Export the XLM-R NER checkpoint to ONNX.")
+    parser.add_argument("model_dir", nargs="?", default=MODEL_DIR)
+    parser.add_argument("--out", default=ONNX_DIR)
+    parser.add_argument("--int8", action="store_true", help="also write a dynamically quantized int8 model")
+    parser.add_argument("--tokenizer", default=TOKENIZER)
+    parser.add_argument("--opset", type=int, default=OPSET)
+    args = parser.parse_args()
+    out = export(args.model_dir, args.out, args.int8, args.tokenizer, args.opset)
+    for f in sorted(out.glob("*.onnx")):
+        print(f"{f}  {f.stat().st_size / 1e6:.1f} MB")
@@ -2,12 +2,17 @@ import json
 import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
-from collections import defaultdict
+
+import pred_store
+from span_match import match_corpus
 
 
 def load_json(path):
     return json.loads(Path(path).read_text(encoding="utf-8"))
 
+def load_spans(path):
+    return pred_store.load(path)  # JSON or .spans store
+
 def overlap(a, b):
     return not (a[1] <= b[0] or b[1] <= a[0])
 
@@ -18,61 +23,26 @@ def compute_metrics_and_confusion(gold, preds):
     labels = set()
     for gspans in gold.values():
         for s in gspans:
-            labels.add(s["label"])
+            labels.add(s.label)
     for pspans in preds.values():
         for s in pspans:
-            labels.add(s["label"])
+            labels.add(s.label)
 
     labels = sorted(labels)
     label_to_idx = {l:i for i,l in enumerate(labels)}
 
-    # Initialize counters
-    tp = {l:0 for l in labels}
-    fp = {l:0 for l in labels}
-    fn = {l:0 for l in labels}
+    # tp / fp / fn and overlapping pairs per label (sort-merge sweep, see span_match.py)
+    counts, n_pairs = match_corpus(gold, preds)
+    tp = {l: counts[l]["tp"] if l in counts else 0 for l in labels}
+    fp = {l: counts[l]["fp"] if l in counts else 0 for l in labels}
+    fn = {l: counts[l]["fn"] if l in counts else 0 for l in labels}
 
-    # Confusion matrix: rows = gold, cols = predicted
+    # Confusion matrix: rows = gold, cols = predicted. Only same-label overlaps
+    # are counted (every overlapping pair, not just the matched ones), so it is
+    # diagonal; unmatched predictions have no "NONE" row to go to
     cm = np.zeros((len(labels), len(labels)), dtype=int)
-
-    for fname, gspans in gold.items():
-        pspans = preds.get(fname, [])
-
-        matched = set()
-
-        for g in gspans:
-            g_range = (g["start"], g["end"])
-            gl = g["label"]
-            matched_pred_label = None
-
-            for i, p in enumerate(pspans):
-                if i in matched:
-                    continue
-                if p["label"] == gl and overlap(g_range, (p["start"], p["end"])):
-                    matched.add(i)
-                    tp[gl] += 1
-                    matched_pred_label = gl
-                    break
-
-            if matched_pred_label is None:
-                fn[gl] += 1
-
-        # unmatched predictions = FP
-        for i, p in enumerate(pspans):
-            if i not in matched:
-                fp[p["label"]] += 1
-                # confusion: predicted p["label"], but true is NONE
-                # we won't add to matrix because "NONE" isn't a label
-
-        # confusion matrix fill for matched predictions
-        # (we need to re-loop for exact matches)
-        for g in gspans:
-            g_range = (g["start"], g["end"])
-            gl = g["label"]
-            for p in pspans:
-                if p["label"] == gl and overlap(g_range,(p["start"],p["end"])):
-                    gi = label_to_idx[gl]
-                    pj = label_to_idx[gl]
-                    cm[gi, pj] += 1
+    for l, n in n_pairs.items():
+        cm[label_to_idx[l], label_to_idx[l]] = n
 
     # Compute per-label metrics
     metrics = {}
@@ -135,9 +105,9 @@ def confusion_matrix_plot(labels, cm, outfile):
 # Main
 # ---------------------------
 
-def main():
-    gold = load_json("gold.json")
-    preds = load_json("preds_fixed.json")
+def main(gold_path="gold.json", preds_path="preds_fixed.json"):
+    gold = load_spans(gold_path)
+    preds = load_spans(preds_path)
 
     labels, metrics, cm = compute_metrics_and_confusion(gold, preds)
 
@@ -154,4 +124,5 @@ def main():
     print("Saved plots to 'plots/' folder.")
 
 if __name__ == "__main__":
-    main()
+    import sys
+    main(*sys.argv[1:3])  # python plots.py [gold.json] [preds_fixed.json | preds_fixed.spans]
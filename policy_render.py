@@ -0,0 +1,89 @@
+# policy_render.py
+# Linear-time replacement renderer shared by apply_redaction.py and
+# apply_redaction_safe.py. It reproduces, piece by piece, what
+#     for st, ed in spans (descending start):  s = s[:st] + repl + s[ed:]
+# produces, without copying the whole document once per span.
+import re
+
+BRACKET_GAP = re.compile(r"\]\s*\[")
+
+
+class SegmentRenderer:
+    """
+    Replacements must come in non-increasing start order (as the policy scripts
+    apply them). At any point the current string is text[:m] + tail, where
+    tail is kept as a stack of pieces (top = leftmost) that are either
+    replacement strings or (a, b) ranges of the original text.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.m = len(text)
+        self.tail = []
+        self.tail_len = 0
+
+    def __len__(self):
+        return self.m + self.tail_len
+
+    def _push(self, piece, n):
+        if n:
+            self.tail.append(piece)
+            self.tail_len += n
+
+    def _take_front(self, n):
+        """Remove the first n chars of tail and return them as a string."""
+        got = []
+        while n > 0 and self.tail:
+            piece = self.tail.pop()
+            if isinstance(piece, tuple):
+                a, b = piece
+                k = min(n, b - a)
+                got.append(self.text[a:a + k])
+                if a + k < b:
+                    self.tail.append((a + k, b))
+            else:
+                k = min(n, len(piece))
+                got.append(piece[:k])
+                if k < len(piece):
+                    self.tail.append(piece[k:])
+            self.tail_len -= k
+            n -= k
+        return "".join(got)
+
+    def replace(self, st, ed, repl):
+        """s = s[:st] + repl + s[ed:]; repl may be a callable taking s[st:ed]."""
+        if st > self.m:
+            raise ValueError("replacements must come in non-increasing start order")
+        if ed <= self.m:
+            snippet = self.text[st:ed] if callable(repl) else None
+            self._push((ed, self.m), self.m - ed)
+        else:
+            head = self.text[st:self.m]
+            rest = self._take_front(ed - self.m)
+            snippet = head + rest
+        if callable(repl):
+            repl = repl(snippet)
+        self.m = st
+        self._push(repl, len(repl))
+
+    def pieces(self):
+        yield self.text[:self.m]
+        for piece in reversed(self.tail):
+            yield self.text[piece[0]:piece[1]] if isinstance(piece, tuple) else piece
+
+    def render(self):
+        """Final string with the "] [" tidy-up applied."""
+        return BRACKET_GAP.sub("] [", "".join(self.pieces()))
+
+    def write(self, fh):
+        """Stream the same output as render() to a file handle, piece by piece."""
+        pending = ""
+        for piece in self.pieces():
+            pending += piece
+            # hold back a trailing "]" + whitespace: it may still join the next "["
+            cut = pending.rfind("]")
+            if cut == -1 or pending[cut + 1:].strip():
+                cut = len(pending)
+            fh.write(BRACKET_GAP.sub("] [", pending[:cut]))
+            pending = pending[cut:]
+        fh.write(BRACKET_GAP.sub("] [", pending))
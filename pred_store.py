@@ -0,0 +1,408 @@
+# pred_store.py
+# Binary columnar prediction store: {file name: [span, ...]} (preds*.json,
+# gold.json) as one memory-mapped file instead of pretty-printed JSON. Opening it
+# reads a fixed header and the document names only; the spans of one document are
+# slices of flat arrays, so looking a document up costs the same whatever the
+# size of the corpus, and documents never asked for are never read.
+#
+# Layout (little-endian, every section 8-byte aligned):
+#   header        magic, n_docs, n_spans, (offset, nbytes) of each section below
+#   labels        JSON list of label names; span codes index it
+#   name_offsets  int64[n_docs + 1] into names (UTF-8)
+#   doc_offsets   int64[n_docs + 1]: document i has spans doc_offsets[i]:doc_offsets[i+1]
+#   starts, ends  int32[n_spans]
+#   codes         uint8[n_spans]
+#   has_text      uint8[n_spans]: 1 if the span has a "text" field
+#   text_offsets  int64[n_spans + 1] into texts (UTF-8)
+# Documents keep their JSON order, so json -> store -> json gives back the same
+# file (indent=2, ensure_ascii=False, as the pipeline writes them).
+#
+# JSON Lines (.jsonl): one {"file": name, "spans": [...]} record per line, written
+# as each document is done and read back one record at a time, so neither side
+# holds the corpus. Readers take any of the three formats (iter_preds, Records);
+# two record streams are joined on file name with join_on_file.
+# Usage: python pred_store.py preds_fixed.json preds_fixed.spans   (any two of .json / .spans / .jsonl)
+import os
+import sys
+import json
+import mmap
+import array
+import struct
+import itertools
+from collections.abc import Mapping
+
+from span_types import LABEL_NAMES, Span, coded, from_dicts, json_default, label_code, to_dicts
+
+EXT = ".spans"
+JSONL_EXT = ".jsonl"
+MAGIC = b"RTISPAN1"
+SECTIONS = ("labels", "name_offsets", "names", "doc_offsets", "starts", "ends", "codes", "has_text",
+            "text_offsets", "texts")
+_HEADER = struct.Struct("<8sQQ" + "QQ" * len(SECTIONS))
+_SWAP = sys.byteorder != "little"
+_FIELDS = {"start", "end", "label", "text"}
+
+
+def is_store(path):
+    return str(path).endswith(EXT)
+
+
+def is_jsonl(path):
+    return str(path).endswith(JSONL_EXT)
+
+
+# -------------------- WRITE --------------------
+def _column(typecode, values=()):
+    col = array.array(typecode, values)
+    if _SWAP:
+        col.byteswap()
+    return col.tobytes()
+
+
+def _check(d):
+    """Span from a JSON dict, refusing anything the store could not give back as it was."""
+    if not _FIELDS.issuperset(d) or "text" in d and not isinstance(d["text"], str) \
+            or not all(type(d.get(k)) is int for k in ("start", "end")) or not isinstance(d.get("label"), str):
+        raise ValueError(f"span not storable (int start / end, str label, optional str text): {d!r}")
+    return Span.from_dict(d)
+
+
+def write(path, preds):
+    """Write {file name: [Span or span dict, ...]} (or its (name, spans) items) to `path`."""
+    names, name_offsets, doc_offsets = [], [0], [0]
+    starts, ends, codes, has_text = array.array("i"), array.array("i"), bytearray(), bytearray()
+    texts, text_offsets = [], [0]
+    labels, file_codes = [], {}  # only the labels in use, numbered in order of appearance
+    for fname, spans in preds.items() if isinstance(preds, Mapping) else preds:
+        name = fname.encode("utf-8")
+        names.append(name)
+        name_offsets.append(name_offsets[-1] + len(name))
+        for s in spans:
+            if isinstance(s, dict):
+                s = _check(s)
+            code = file_codes.get(s.code)
+            if code is None:
+                code = file_codes[s.code] = len(labels)
+                labels.append(LABEL_NAMES[s.code])
+                if code == 256:
+                    raise ValueError("more than 256 span labels")
+            starts.append(s.start)
+            ends.append(s.end)
+            codes.append(code)
+            has_text.append(s.text is not None)
+            text = b"" if s.text is None else s.text.encode("utf-8")
+            texts.append(text)
+            text_offsets.append(text_offsets[-1] + len(text))
+        doc_offsets.append(len(starts))
+
+    if _SWAP:
+        starts.byteswap()
+        ends.byteswap()
+    body = {"labels": json.dumps(labels, ensure_ascii=False).encode("utf-8"),
+            "name_offsets": _column("q", name_offsets), "names": b"".join(names),
+            "doc_offsets": _column("q", doc_offsets), "starts": starts.tobytes(), "ends": ends.tobytes(),
+            "codes": bytes(codes), "has_text": bytes(has_text),
+            "text_offsets": _column("q", text_offsets), "texts": b"".join(texts)}
+    table, pos = [], _HEADER.size
+    for name in SECTIONS:
+        pos += -pos % 8
+        table += [pos, len(body[name])]
+        pos += len(body[name])
+    with open(path, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, len(names), len(starts), *table))
+        for name in SECTIONS:
+            fh.write(b"\0" * (-fh.tell() % 8))
+            fh.write(body[name])
+
+
+# -------------------- READ --------------------
+class PredStore(Mapping):
+    """
+    Read-only {file name: [Span, ...]} over a memory-mapped store file. Lookups
+    build the Spans of that one document; iteration follows the stored order.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        head = _HEADER.unpack_from(self._mm)
+        if head[0] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path}: not a prediction store")
+        self.n_docs, self.n_spans = head[1], head[2]
+        self._sections = dict(zip(SECTIONS, zip(head[3::2], head[4::2])))
+        self._view = memoryview(self._mm)
+        labels = json.loads(bytes(self._bytes("labels")).decode("utf-8"))
+        self._codes = [label_code(label) for label in labels]  # file code -> process code
+        self._doc_offsets = self._array("doc_offsets", "q")
+        self._starts = self._array("starts", "i")
+        self._ends = self._array("ends", "i")
+        self._file_codes = self._bytes("codes")
+        self._has_text = self._bytes("has_text")
+        self._text_offsets = self._array("text_offsets", "q")
+        self._texts = self._bytes("texts")
+        name_offsets, names = self._array("name_offsets", "q"), self._bytes("names")
+        self._index = {bytes(names[name_offsets[i]:name_offsets[i + 1]]).decode("utf-8"): i
+                       for i in range(self.n_docs)}
+
+    def _bytes(self, name):
+        off, n = self._sections[name]
+        return self._view[off:off + n]
+
+    def _array(self, name, typecode):
+        if _SWAP:
+            col = array.array(typecode, self._bytes(name))
+            col.byteswap()
+            return col
+        return self._bytes(name).cast(typecode)
+
+    def __getitem__(self, fname):
+        i = self._index[fname]
+        a, b = self._doc_offsets[i], self._doc_offsets[i + 1]
+        codes, has_text, toff, texts = self._codes, self._has_text, self._text_offsets, self._texts
+        return [coded(st, ed, codes[c], str(texts[toff[j]:toff[j + 1]], "utf-8") if has_text[j] else None)
+                for j, st, ed, c in zip(range(a, b), self._starts[a:b].tolist(), self._ends[a:b].tolist(),
+                                        self._file_codes[a:b].tolist())]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return self.n_docs
+
+    def __contains__(self, fname):
+        return fname in self._index
+
+    def close(self):
+        for name in ("_doc_offsets", "_starts", "_ends", "_file_codes", "_has_text", "_text_offsets",
+                     "_texts", "_view"):
+            col = getattr(self, name)
+            if isinstance(col, memoryview):
+                col.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load(path):
+    """
+    {file name: [Span, ...]} from a store file (memory-mapped), a JSON file (read
+    whole) or a JSONL file (read whole too: for one pass over it use iter_preds).
+    """
+    if is_store(path):
+        return PredStore(path)
+    if is_jsonl(path):
+        return dict(iter_jsonl(path))
+    with open(path, encoding="utf-8") as f:
+        return {fname: from_dicts(spans) for fname, spans in json.load(f).items()}
+
+
+def path_from_argv(default, flag="--preds", argv=None):
+    """Input predictions given as `flag FILE` on the command line, else `default`."""
+    argv = sys.argv if argv is None else argv
+    if flag not in argv:
+        return default
+    i = argv.index(flag)
+    if i + 1 >= len(argv):
+        sys.exit(f"{flag} needs a file name")
+    return argv[i + 1]
+
+
+# -------------------- PRETTY JSON --------------------
+def json_item(key, value, first, indent=2, default=None):
+    """One `key: value` entry of json.dump(dict, ensure_ascii=False, indent=indent), with what precedes it."""
+    pad = " " * indent
+    return (("{\n" if first else ",\n") + pad + json.dumps(key, ensure_ascii=False) + ": "
+            + json.dumps(value, ensure_ascii=False, indent=indent, default=default).replace("\n", "\n" + pad))
+
+
+def json_end(n_items):
+    """What closes a dict of n_items entries written with json_item."""
+    return "{}" if n_items == 0 else "\n}"
+
+
+def dump_json_items(items, fh, indent=2, default=None):
+    """json.dump(dict(items), fh, ensure_ascii=False, indent=indent, default=default), one item at a time."""
+    n = 0
+    for key, value in items:
+        fh.write(json_item(key, value, n == 0, indent, default))
+        n += 1
+    fh.write(json_end(n))
+
+
+# -------------------- JSONL --------------------
+def jsonl_record(fname, spans):
+    """One JSONL line: {"file": fname, "spans": [...]} (Spans or span dicts)."""
+    return json.dumps({"file": fname, "spans": spans}, ensure_ascii=False, default=json_default) + "\n"
+
+
+def iter_jsonl(path, dicts=False):
+    """
+    (file name, [Span, ...]) per record of a JSONL file, one line at a time
+    (dicts=True: the span dicts as read). A last line cut off by a crash is skipped.
+    """
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if not line.endswith("\n"):
+                    print(f"{path}:{n}: skipping truncated last record", file=sys.stderr)
+                    return
+                raise ValueError(f"{path}:{n}: not a JSON record") from None
+            yield record["file"], record["spans"] if dicts else from_dicts(record["spans"])
+
+
+def iter_preds(path, dicts=False):
+    """(file name, spans) of a .json, .spans or .jsonl file; only JSONL is never held whole."""
+    if is_jsonl(path):
+        return iter_jsonl(path, dicts)
+    if is_store(path):
+        store = PredStore(path)
+        return ((fname, to_dicts(spans) if dicts else spans) for fname, spans in store.items())
+    with open(path, encoding="utf-8") as f:
+        preds = json.load(f)
+    return iter(preds.items()) if dicts else ((fname, from_dicts(spans)) for fname, spans in preds.items())
+
+
+class Records:
+    """
+    (file name, [Span, ...]) of a predictions file, for several passes: a JSON
+    file is parsed once and kept, a store stays mapped, JSONL is re-read each pass.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._preds = None if is_jsonl(path) else load(path)
+
+    def __iter__(self):
+        return iter_jsonl(self.path) if self._preds is None else iter(self._preds.items())
+
+    def names(self):
+        return (fname for fname, _ in self) if self._preds is None else iter(self._preds)
+
+
+def join_on_file(left, right):
+    """
+    (file name, left spans, right spans) for every file of either (name, spans)
+    stream, None on the side a file is missing from. Streams are read in lockstep
+    and a record waits only until its partner turns up, so files written in the
+    same order are joined in constant memory; files of one side only come last.
+    """
+    pending = ({}, {})
+    for pair in itertools.zip_longest(left, right):
+        for side, item in enumerate(pair):
+            if item is None:
+                continue
+            fname, spans = item
+            other = pending[1 - side]
+            if fname in other:
+                partner = other.pop(fname)
+                yield (fname, spans, partner) if side == 0 else (fname, partner, spans)
+            else:
+                pending[side][fname] = spans
+    for fname, spans in pending[0].items():
+        yield fname, spans, None
+    for fname, spans in pending[1].items():
+        yield fname, None, spans
+
+
+class PreviousOutput:
+    """
+    A stage's previous output file read forward alongside the new run (which sees
+    the files in the same order): get() skips ahead to the file asked for, keeping
+    skipped records only in case they are asked for later.
+    """
+
+    def __init__(self, path):
+        """`path` None or missing: no previous output."""
+        self._it = iter_preds(path, dicts=True) if path and os.path.exists(path) else iter(())
+        self._skipped = {}
+        self._names = []
+
+    def _next(self):
+        for fname, spans in self._it:
+            self._names.append(fname)
+            return fname, spans
+        return None, None
+
+    def get(self, fname):
+        if fname in self._skipped:
+            return self._skipped.pop(fname)
+        while True:
+            name, spans = self._next()
+            if name is None or name == fname:
+                return spans
+            self._skipped[name] = spans
+
+    def names(self):
+        """Every file name of the previous output, in its order (reads the rest of it)."""
+        while self._next()[0] is not None:
+            pass
+        self._skipped.clear()
+        return self._names
+
+
+class PredWriter:
+    """
+    Writes (file name, spans) records one at a time to a .json, .jsonl or .spans
+    file (Spans or span dicts). They go to path.tmp, which close() moves over path
+    and discard() deletes, so an interrupted run leaves the old file as it was. A
+    store has to be laid out whole: its records are collected until close().
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.tmp = self.path + ".tmp"
+        self.n = 0
+        self._held = [] if is_store(path) else None
+        self._fh = None if is_store(path) else open(self.tmp, "w", encoding="utf-8")
+
+    def write(self, fname, spans):
+        if self._held is not None:
+            self._held.append((fname, spans))
+        elif is_jsonl(self.path):
+            self._fh.write(jsonl_record(fname, spans))
+        else:
+            self._fh.write(json_item(fname, spans, self.n == 0, default=json_default))
+        self.n += 1
+
+    def close(self):
+        if self._held is not None:
+            write(self.tmp, self._held)
+        else:
+            if not is_jsonl(self.path):
+                self._fh.write(json_end(self.n))
+            self._fh.close()
+        os.replace(self.tmp, self.path)
+
+    def discard(self):
+        if self._fh is not None:
+            self._fh.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+# -------------------- CONVERT --------------------
+def convert(src, dst):
+    """Any of .json / .spans / .jsonl to another, by file extension; spans go through unchanged."""
+    kind = lambda path: EXT if is_store(path) else JSONL_EXT if is_jsonl(path) else ".json"
+    if kind(src) == kind(dst):
+        raise ValueError(f"convert between two formats: {src} -> {dst}")
+    out = PredWriter(dst)
+    for fname, spans in iter_preds(src, dicts=True):
+        out.write(fname, spans)
+    out.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(f"Usage: python pred_store.py preds.json preds{EXT}   (.json / {EXT} / {JSONL_EXT}, either way)")
+    convert(sys.argv[1], sys.argv[2])
+    print(f"wrote {sys.argv[2]}")
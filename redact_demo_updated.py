@@ -2,51 +2,127 @@
 import re
 import json
 import pathlib
-import unicodedata
+import os
 import sys
+import heapq
+import inspect
+import functools
+import contextlib
+import importlib.metadata
+
+from rule_scanner import MultiPatternScanner
+from span_resolve import TieredDeduper, dedupe_levels, dedupe_spans
+from span_types import Span, coded, json_default, to_dicts
+
+from detector_registry import DetectorRegistry
+from span_cache import SpanCache, file_fingerprint, fingerprint, text_key
+from manifest import Manifest, file_hash, load_json, tool_version
+from textnorm import normalize_text
+import trace_events
+import memstats
+import pred_store
 
 # optional: HF model for bilingual inference (only if you downloaded/placed the model)
 USE_XLM = True  # set False if you don't want to try loading HF model
+HF_MODEL_DIR = pathlib.Path("xlm_rti_ner_final")
+HF_TOKENIZER = "xlm-roberta-base"
+# "torch" (eager fp32) or an ONNX Runtime export: "onnx" / "onnx-int8" (see onnx_backend.py)
+HF_BACKEND = "torch"
+ONNX_DIR = pathlib.Path("xlm_rti_ner_onnx")
+
+# redaction levels, lowest first; each adds the spans of one more detector layer
+LEVELS = ["light", "medium", "strong"]
+
+# spaCy and transformers take seconds to import and load, so nothing heavy happens
+# at import time: detectors are loaded on first use, and only for the levels asked for
+DETECTORS = DetectorRegistry({
+    "light": (),
+    "medium": ("spacy",),
+    "strong": ("spacy", "hf_engine"),
+})
 
-# imports with safe fallbacks
-try:
-    import spacy
-except Exception as e:
-    print("spacy not installed. Run `pip install spacy` and `python -m spacy download en_core_web_sm`.", file=sys.stderr)
-    raise
-
-try:
-    from langdetect import detect as lang_detect
-except Exception:
-    def lang_detect(_): return "en"
-
-# optional transformers pipeline
-HF_PIPELINE = None
-if USE_XLM:
+def levels_upto(level):
+    """LEVELS up to and including `level`."""
+    return LEVELS[:LEVELS.index(level) + 1]
+
+def lang_detect(text):
+    """{"lang": ..., "script": ...} of a document (deterministic, see langid.py)."""
+    from langid import identify
+    return identify(text)
+
+def load_hf_model():
+    """(model, tokenizer) of the XLM-R checkpoint on CPU, or None if unavailable."""
     try:
-        from transformers import pipeline, XLMRobertaTokenizerFast, XLMRobertaForTokenClassification
-        MODEL_DIR = pathlib.Path("xlm_rti_ner_final")
-        if MODEL_DIR.exists():
-            print("Loading XLM-R inference pipeline from", MODEL_DIR)
-            try:
-                # load tokenizer/model; pipeline will handle id2label if saved, otherwise user may need to set id2label
-                HF_PIPELINE = pipeline("token-classification", model=str(MODEL_DIR), tokenizer="xlm-roberta-base", aggregation_strategy="simple", device=0)
-            except Exception as e:
-                print("Failed to load HF pipeline:", e, file=sys.stderr)
-                HF_PIPELINE = None
-        else:
-            print("No model folder 'xlm_rti_ner_final' found — skipping HF pipeline.")
-            HF_PIPELINE = None
+        from transformers import AutoModelForTokenClassification, AutoTokenizer
     except Exception as e:
         print("transformers not installed or load failed:", e, file=sys.stderr)
-        HF_PIPELINE = None
+        return None
+    if not HF_MODEL_DIR.exists():
+        print(f"No model folder '{HF_MODEL_DIR}' found — skipping XLM-R.")
+        return None
+    print("Loading XLM-R model from", HF_MODEL_DIR)
+    try:
+        # from_pretrained keeps the weights on CPU; id2label comes from the saved config
+        return (AutoModelForTokenClassification.from_pretrained(HF_MODEL_DIR).eval(),
+                AutoTokenizer.from_pretrained(HF_TOKENIZER))
+    except Exception as e:
+        print("Failed to load XLM-R model:", e, file=sys.stderr)
+        return None
+
+# batched CPU engine over the model (every strong-mode XLM-R call, see hf_batch.py)
+HF_BATCH_SIZE = 16     # rows per forward pass
+HF_DOC_BATCH = 64      # documents gathered before running the engine
+HF_THREADS = None      # ONNX Runtime intra-op threads (None: one per core)
+
+@DETECTORS.loader("hf_engine")
+def load_hf_engine():
+    """The batched XLM-R engine on the selected CPU backend, or None if unavailable."""
+    if not USE_XLM:
+        return None
+    if HF_BACKEND == "torch":
+        loaded = load_hf_model()
+    else:
+        import onnx_backend
+        loaded = onnx_backend.load(HF_BACKEND, ONNX_DIR, HF_THREADS)
+        if loaded is not None:
+            print("Loading XLM-R", HF_BACKEND, "model from", ONNX_DIR)
+    if loaded is None:
+        return None
+    from hf_batch import BatchedTokenClassifier
+    return BatchedTokenClassifier(*loaded, batch_size=HF_BATCH_SIZE)
+
+def ner_unused_components(nlp):
+    """Pipeline components that neither are NER nor feed it (e.g. a tok2vec NER listens to)."""
+    keep = {"ner"}
+    for name, proc in nlp.pipeline:
+        if "ner" in getattr(proc, "listening_components", []):
+            keep.add(name)
+    return [name for name in nlp.pipe_names if name not in keep]
 
-# Load small English spaCy model (used conservatively)
-try:
-    nlp = spacy.load("en_core_web_sm")
-except Exception as e:
-    print("spaCy model not found. Try: python -m spacy download en_core_web_sm", file=sys.stderr)
-    raise
+@DETECTORS.loader("spacy")
+def load_spacy():
+    """Small English spaCy model (used conservatively), NER only."""
+    try:
+        import spacy
+    except Exception:
+        print("spacy not installed. Run `pip install spacy` and `python -m spacy download en_core_web_sm`.", file=sys.stderr)
+        raise
+    try:
+        nlp = spacy.load("en_core_web_sm")
+    except Exception:
+        print("spaCy model not found. Try: python -m spacy download en_core_web_sm", file=sys.stderr)
+        raise
+    # only doc.ents is used: tagger, parser, lemmatizer, attribute_ruler... just cost time
+    for name in ner_unused_components(nlp):
+        nlp.disable_pipe(name)
+    return nlp
+
+# corpus-level spaCy defaults (nlp.pipe)
+SPACY_BATCH_SIZE = 64
+SPACY_N_PROCESS = 1
+# en_core_web_sm only sees the Latin-script runs of a document (see script_runs.py);
+# XLM-R, being multilingual, always gets the whole text
+SPACY_LATIN_ONLY = True
 
 # India-specific regex patterns (extended)
 PATTERNS = {
@@ -67,18 +143,32 @@ PATTERNS = {
     )
 }
 
+# first character class of every PATTERNS match; lets the scanner skip labels cheaply
+PATTERN_FIRST_CHARS = {
+    "FILE": "Ff",
+    "AADHAAR": r"\d",
+    "PAN": "A-Z",
+    "PHONE": r"+\d",
+    "PIN": r"\d",
+    "EMAIL": r"\w.+\-",
+    "PASSPORT": "A-Z",
+    "VOTER_ID": "A-Z",
+    "DATE": r"\d",
+}
+
+# all PATTERNS compiled into one single-pass scanner (see rule_scanner.py)
+RULE_SCANNER = MultiPatternScanner(PATTERNS, PATTERN_FIRST_CHARS)
+
+# streaming mode (very large documents): detectors run on line-aligned windows of
+# STREAM_WINDOW chars plus STREAM_OVERLAP chars of context on each side
+STREAM_WINDOW = 100_000
+STREAM_OVERLAP = 2_000
+STREAM_BLOCK = 1 << 16  # chars read from disk at a time
+
 # address/applicant line heuristics (multi-line)
 ADDR_LINE = re.compile(r'(?mi)^(?:Address|Address:|R\/o|R/O|R/o|पता|Add:|Address)\s*[:\-]?\s*(.+)$')
 APPLICANT_LINE = re.compile(r'(?mi)^(?:Applicant|APPLICANT|आवेदक)\s*[:\-]?\s*(.+)$')
 
-def normalize_text(s: str) -> str:
-    s = unicodedata.normalize("NFKC", s)
-    s = s.replace("\u200c","").replace("\u200d","").replace("\ufeff","")
-    s = s.replace("“",'\"').replace("”",'\"').replace("’","'").replace("‘","'")
-    s = s.replace("—","-").replace("–","-")
-    s = s.replace("\r\n","\n").replace("\r","\n")
-    return s
-
 def _regex_span_bounds(m):
     """Return span for a match; prefer first capturing group if present."""
     try:
@@ -89,37 +179,27 @@ def _regex_span_bounds(m):
     return m.start(), m.end()
 
 def rule_spans(text):
-    """Return regex-based spans (list of dicts)."""
-    spans = []
-    for label, pat in PATTERNS.items():
-        for m in pat.finditer(text):
-            st, ed = _regex_span_bounds(m)
-            # PIN filter: ensure matched token is exactly 6 digits
-            if label == "PIN":
-                token = text[st:ed].strip()
-                if not re.fullmatch(r'\d{6}', token):
-                    continue
-            spans.append({"start": st, "end": ed, "label": label})
-    return spans
+    """Return regex-based spans (list of Spans), all labels found in one pass over text."""
+    # PIN needs no extra filter: \b\d{6}\b can only ever match exactly 6 digits
+    return RULE_SCANNER.spans(text)
 
 def line_spans(text):
     spans = []
     for m in APPLICANT_LINE.finditer(text):
         s = m.start(1); e = m.end(1)
-        spans.append({"start": s, "end": e, "label": "PERSON"})
+        spans.append(Span(s, e, "PERSON"))
     for m in ADDR_LINE.finditer(text):
         s = m.start(1); e = m.end(1)
-        spans.append({"start": s, "end": e, "label": "ADDRESS"})
+        spans.append(Span(s, e, "ADDRESS"))
         pin_m = re.search(r'\b\d{6}\b', m.group(1))
         if pin_m:
             pin_start = s + pin_m.start()
             pin_end = s + pin_m.end()
-            spans.append({"start": pin_start, "end": pin_end, "label": "PIN"})
+            spans.append(Span(pin_start, pin_end, "PIN"))
     return spans
 
-def spacy_spans(text):
-    """Use spaCy NER conservatively (PERSON, GPE/LOC->ADDRESS, DATE)."""
-    doc = nlp(text)
+def doc_spans(doc, text):
+    """Map a spaCy Doc's entities to our spans (PERSON, GPE/LOC->ADDRESS, DATE), conservatively."""
     LABEL_MAP = {"GPE": "ADDRESS", "LOC": "ADDRESS", "PERSON": "PERSON", "ORG": "ORG", "DATE": "DATE"}
     spans = []
     for ent in doc.ents:
@@ -129,161 +209,702 @@ def spacy_spans(text):
         label = LABEL_MAP.get(ent.label_, ent.label_)
         if label == "ADDRESS":
             if ("," in ent_text) or any(ch.isdigit() for ch in ent_text) or len(ent_text.strip()) > 12:
-                spans.append({"start": ent.start_char, "end": ent.end_char, "label": label})
+                spans.append(Span(ent.start_char, ent.end_char, label))
         elif label == "DATE":
             if PATTERNS["DATE"].search(ent_text):
-                spans.append({"start": ent.start_char, "end": ent.end_char, "label": label})
+                spans.append(Span(ent.start_char, ent.end_char, label))
         else:
-            spans.append({"start": ent.start_char, "end": ent.end_char, "label": label})
+            spans.append(Span(ent.start_char, ent.end_char, label))
     return spans
 
+def spacy_view(text):
+    """(text spaCy should see, pieces for script_runs.map_spans or None)."""
+    if not SPACY_LATIN_ONLY:
+        return text, None
+    from script_runs import latin_view
+    return latin_view(text)
+
+def view_spans(doc, pieces):
+    """doc_spans() of a spaCy Doc over a spacy_view(), in offsets of the original text."""
+    spans = doc_spans(doc, doc.text)
+    if pieces is None:
+        return spans
+    from script_runs import map_spans
+    return map_spans(spans, pieces)
+
+def spacy_spans(text):
+    """Use spaCy NER conservatively (PERSON, GPE/LOC->ADDRESS, DATE)."""
+    view, pieces = spacy_view(text)
+    return view_spans(DETECTORS.get("spacy")(view), pieces)
+
+def spacy_spans_batch(texts, batch_size=SPACY_BATCH_SIZE, n_process=SPACY_N_PROCESS):
+    """Corpus-level spacy_spans: yields one span list per text, batched through nlp.pipe."""
+    views = (spacy_view(text) for text in texts)
+    for doc, pieces in DETECTORS.get("spacy").pipe(views, as_tuples=True, batch_size=batch_size, n_process=n_process):
+        yield view_spans(doc, pieces)
+
 def hf_spans(text):
-    """Use HF pipeline (if loaded) to extract spans. Map entity_group to label if possible."""
-    if HF_PIPELINE is None:
-        return []
-    try:
-        res = HF_PIPELINE(text)
-    except Exception as e:
-        print("HF pipeline error:", e, file=sys.stderr)
-        return []
-    out = []
-    for ent in res:
-        # aggregation_strategy returns entity_group like 'PERSON' or 'LABEL_0'
-        label = ent.get("entity_group") or ent.get("entity")
-        if isinstance(label, str) and label.startswith("LABEL_"):
-            # try to convert numeric LABEL_ to model labels if possible
-            try:
-                idx = int(label.split("_",1)[1])
-                cfg_map = getattr(HF_PIPELINE.model.config, "id2label", {})
-                label = cfg_map.get(idx, label)
-            except Exception:
-                pass
-        # Normalize label to a small set if needed
-        # We expect labels like B-PERSON/I-PERSON or PERSON depending on checkpoint saving.
-        if label and label.startswith("B-"):
-            label = label.split("-",1)[1]
-        if label and label.startswith("I-"):
-            label = label.split("-",1)[1]
-        out.append({"start": ent["start"], "end": ent["end"], "label": label if label else "O"})
-    return out
+    """XLM-R spans of one document: the batched engine with a batch of one, so single
+    documents and corpus / server runs decode the model's tags the same way."""
+    return hf_spans_batch([text])[0]
+
+def hf_spans_batch(texts):
+    """hf_spans for many documents at once: length-bucketed, padded per batch (see hf_batch)."""
+    engine = DETECTORS.get("hf_engine")
+    if engine is None:
+        return [[] for _ in texts]
+    engine.batch_size = memstats.batch(HF_BATCH_SIZE)  # shrinks when over the RSS budget
+    return engine.predict(texts)
 
 def combine_and_dedupe(spans, text_len):
-    """Combine list of spans (dicts) and remove duplicates/invalids conservatively."""
-    good = []
-    for s in spans:
-        st, ed = s.get("start"), s.get("end")
-        label = s.get("label", "O")
-        if not (isinstance(st,int) and isinstance(ed,int) and 0 <= st < ed <= text_len):
-            continue
-        good.append({"start": st, "end": ed, "label": label})
-    # sort by start then -length so longer spans keep precedence
-    good = sorted(good, key=lambda x: (x["start"], -(x["end"]-x["start"])))
-    unique = []
-    for s in good:
-        st, ed, lab = s["start"], s["end"], s["label"]
-        overlap = False
-        for u in unique:
-            # if same label close to existing, skip (merge-like)
-            if not (ed <= u["start"] or st >= u["end"]):  # overlap
-                # allow containing span to replace smaller if same label
-                if lab == u["label"] and (abs(st - u["start"]) < 3 or abs(ed - u["end"]) < 3):
-                    overlap = True
-                    break
-                # otherwise prefer existing larger span -> skip
-                if (u["end"]-u["start"]) >= (ed-st):
-                    overlap = True
-                    break
-        if not overlap:
-            unique.append(s)
-    return unique
+    """Combine list of Spans and remove duplicates/invalids conservatively (see span_resolve)."""
+    return dedupe_spans(spans, text_len)
 
 def apply_redactions(text, spans):
     """Apply redactions replacing exact char spans with [REDACTED-LABEL]."""
     out = []
     last = 0
-    for s in sorted(spans, key=lambda x: x["start"]):
-        st, ed, lab = s["start"], s["end"], s["label"]
+    for s in sorted(spans, key=lambda x: x.start):
+        st, ed, lab = s.start, s.end, s.label
         out.append(text[last:st])
         out.append(f"[REDACTED-{lab}]")
         last = ed
     out.append(text[last:])
     return "".join(out)
 
-def redact_text_levels(text):
+def render_levels(text, level_spans):
+    """
+    apply_redactions() for several span lists in one walk over the text: spans of
+    all levels are merged by start and each level appends to its own output.
+    """
+    outs = [[] for _ in level_spans]
+    last = [0] * len(level_spans)
+    # (start, level, order): equal starts keep each level's own order
+    events = heapq.merge(*(
+        [(s.start, lv, i, s) for i, s in enumerate(sorted(spans, key=lambda x: x.start))]
+        for lv, spans in enumerate(level_spans)
+    ))
+    for st, lv, _, s in events:
+        outs[lv].append(text[last[lv]:st])
+        outs[lv].append(f"[REDACTED-{s.label}]")
+        last[lv] = s.end
+    for lv, out in enumerate(outs):
+        out.append(text[last[lv]:])
+    return ["".join(out) for out in outs]
+
+def redact_text_levels(text, s_spans=None, hf_s=None, level="strong", rule_s=None):
     """
     Returns dict of {'light': text, 'medium': text, 'strong': text}
     - light: regex only
     - medium: regex + spaCy (conservative)
     - strong: regex + spaCy + HF (if available)
     Also returns preds dict for evaluation using strong (or medium if HF not available).
+    s_spans / hf_s / rule_s: spaCy / XLM-R / regex+line spans if already computed
+    (e.g. by the batch functions or the span cache).
+    level: highest level to produce; detectors of higher levels are never loaded
+    and preds are those of `level`.
     """
     text_len = len(text)
-    r_spans = rule_spans(text)
-    l_spans = line_spans(text)
-    s_spans = spacy_spans(text)
+    levels = levels_upto(level)
+    if rule_s is None:
+        with trace_events.stage("rule_spans"):
+            rule_s = rule_spans(text)
+        with trace_events.stage("line_spans"):
+            rule_s = rule_s + line_spans(text)
+    increments = [rule_s]
+    if "medium" in levels:
+        if s_spans is None:
+            with trace_events.stage("spacy_spans"):
+                s_spans = spacy_spans(text)
+        increments.append(s_spans)
+    if "strong" in levels:
+        # strong falls back to medium if no HF model (hf_spans returns [])
+        if hf_s is None:
+            with trace_events.stage("hf_spans"):
+                hf_s = hf_spans(text)
+        increments.append(hf_s)
 
-    combined_light = combine_and_dedupe(r_spans + l_spans, text_len)
-    combined_medium = combine_and_dedupe(r_spans + l_spans + s_spans, text_len)
+    # each level extends the one below: one sort, one sweep per level
+    with trace_events.stage("combine"):
+        combined = dedupe_levels(increments, text_len)
+    with trace_events.stage("render"):
+        redacted = render_levels(text, combined)
 
-    if HF_PIPELINE:
-        hf_s = hf_spans(text)
-        combined_strong = combine_and_dedupe(r_spans + l_spans + s_spans + hf_s, text_len)
-    else:
-        combined_strong = combined_medium  # fallback if no HF model
+    # choose preds for evaluation (highest level produced)
+    preds_for_eval = combined[-1]
+
+    return dict(zip(levels, redacted)), preds_for_eval
+
+# -------------------- STREAMING MODE --------------------
+def iter_normalized(fh, block=STREAM_BLOCK):
+    """
+    Read a text file handle in blocks and yield normalize_text() pieces whose
+    concatenation equals normalize_text(whole file). Pieces are only cut right after
+    a newline (or, for very long lines, right before a space): NFKC never composes
+    across those characters, so normalizing piecewise gives the same result.
+    """
+    pending = ""
+    while True:
+        chunk = fh.read(block)
+        if not chunk:
+            if pending:
+                yield normalize_text(pending)
+            return
+        pending += chunk
+        cut = pending.rfind("\n") + 1 or max(pending.rfind(" "), 0)
+        if cut:
+            yield normalize_text(pending[:cut])
+            pending = pending[cut:]
+
+def _line_start_after(buf, i, limit):
+    """First line start at or after i (and <= limit), else None."""
+    j = buf.find("\n", i, limit)
+    return None if j == -1 else j + 1
+
+def iter_windows(pieces, window=STREAM_WINDOW, overlap=STREAM_OVERLAP):
+    """
+    Yield (ctx_lo, window_text, own_lo, own_hi) over a stream of normalized text.
+
+    [own_lo, own_hi) tile the document; each window adds up to `overlap` chars of
+    context on both sides. All four offsets fall on line starts whenever the lines
+    are shorter than the overlap, so ^/$/\\b see the same neighbours as in a
+    whole-document run and regex/line spans starting inside the owned range come
+    out identical (given no single match is longer than the overlap).
+    Only about window + 4*overlap chars are buffered at any time.
+    """
+    pieces = iter(pieces)
+    buf, buf_start, own_lo, eof = "", 0, 0, False
+    while True:
+        while not eof and buf_start + len(buf) < own_lo + window + 3 * overlap:
+            try:
+                buf += next(pieces)
+            except StopIteration:
+                eof = True
+        buf_end = buf_start + len(buf)
+        if own_lo >= buf_end:
+            return
+        target = own_lo + window
+        if target >= buf_end:
+            own_hi = buf_end
+        else:
+            # end the owned range on a line start (else a space, else hard cut)
+            rel = _line_start_after(buf, target - buf_start, target - buf_start + overlap)
+            if rel is None:
+                sp = buf.find(" ", target - buf_start, target - buf_start + overlap)
+                rel = sp if sp != -1 else target - buf_start
+            own_hi = buf_start + rel
+        lo = max(own_lo - overlap, buf_start)
+        nl = buf.rfind("\n", 0, lo - buf_start)
+        ctx_lo = buf_start + nl + 1 if nl != -1 else buf_start
+        hi = min(own_hi + overlap, buf_end)
+        rel = _line_start_after(buf, hi - buf_start, len(buf))
+        ctx_hi = buf_start + rel if rel is not None else buf_end
+        yield ctx_lo, buf[ctx_lo - buf_start:ctx_hi - buf_start], own_lo, own_hi
+        own_lo = own_hi
+        drop = max(buf_start, own_lo - 2 * overlap)
+        buf, buf_start = buf[drop - buf_start:], drop
 
-    red_light = apply_redactions(text, combined_light)
-    red_medium = apply_redactions(text, combined_medium)
-    red_strong = apply_redactions(text, combined_strong)
+class _StreamRenderer:
+    """apply_redactions() writing to a file handle as soon as text is final."""
 
-    # choose preds for evaluation (strong if available else medium)
-    preds_for_eval = combined_strong if HF_PIPELINE else combined_medium
+    def __init__(self, fh):
+        self.fh = fh
+        self.pos = 0  # everything before pos has been written
 
-    return {"light": red_light, "medium": red_medium, "strong": red_strong}, preds_for_eval
+    def emit(self, spans, text, base):
+        # spans arrive sorted by start and (being deduped) with increasing ends
+        for s in spans:
+            st, ed, lab = s.start, s.end, s.label
+            if st > self.pos:
+                self.fh.write(text[self.pos - base:st - base])
+            self.fh.write(f"[REDACTED-{lab}]")
+            self.pos = ed
 
-def main():
+    def flush_to(self, end, text, base):
+        # no later span can start before `end`
+        if end > self.pos:
+            self.fh.write(text[self.pos - base:end - base])
+            self.pos = end
+
+def redact_file_streaming(path, outdir, window=STREAM_WINDOW, overlap=STREAM_OVERLAP, level="strong"):
+    """
+    Streaming counterpart of redact_text_levels() for documents too large to hold
+    in memory (or above spaCy's max_length). Every detector runs per window, spans
+    get whole-document offsets, and the light/medium/strong files are written as
+    the windows are processed. Offsets are exact at the light level only: regex
+    and line spans, and so the light preds and file, equal a whole-document run
+    (see iter_windows for the conditions; tests/test_streaming.py). spaCy and
+    XLM-R only see the window, so medium/strong spans can differ near a window
+    edge, as XLM-R's already do near the edge of its 512-token rows. Returns
+    (preds_for_eval, labels found by regex, language / script of the first window).
+    """
+    path, outdir = pathlib.Path(path), pathlib.Path(outdir)
+    levels = levels_upto(level)
+    deduper = TieredDeduper(len(levels))
+    handles = [open(outdir / f"{path.stem}_{lv}.txt", "w", encoding="utf-8") for lv in levels]
+    renderers = [_StreamRenderer(fh) for fh in handles]
+    preds, found, lang = [], set(), None
+    try:
+        with open(path, encoding="utf-8") as fh:
+            for ctx_lo, wtext, own_lo, own_hi in iter_windows(iter_normalized(fh), window, overlap):
+                if lang is None:
+                    lang = lang_detect(wtext)
+
+                def owned(spans):
+                    out = []
+                    for sp in spans:
+                        st = sp.start + ctx_lo
+                        if own_lo <= st < own_hi:
+                            out.append(coded(st, sp.end + ctx_lo, sp.code))
+                    return out
+
+                with trace_events.stage("rule_spans", doc=path.name, window=own_lo):
+                    r_spans = owned(rule_spans(wtext))
+                found.update(sp.label for sp in r_spans)
+                with trace_events.stage("line_spans", doc=path.name, window=own_lo):
+                    increments = [r_spans + owned(line_spans(wtext))]
+                if "medium" in levels:
+                    with trace_events.stage("spacy_spans", doc=path.name, window=own_lo):
+                        increments.append(owned(spacy_spans(wtext)))
+                if "strong" in levels:
+                    # strong falls back to medium if no HF model, as in redact_text_levels
+                    with trace_events.stage("hf_spans", doc=path.name, window=own_lo):
+                        increments.append(owned(hf_spans(wtext)))
+
+                with trace_events.stage("combine", doc=path.name, window=own_lo):
+                    kept = deduper.feed(increments, ctx_lo + len(wtext))
+                with trace_events.stage("render", doc=path.name, window=own_lo):
+                    for rend, spans in zip(renderers, kept):
+                        rend.emit(spans, wtext, ctx_lo)
+                        rend.flush_to(own_hi, wtext, ctx_lo)
+                deduper.forget_before(own_hi)
+                preds.extend(kept[-1])
+    finally:
+        for fh in handles:
+            fh.close()
+    return preds, found, lang or lang_detect("")
+
+def _groups(items, size):
+    """Lists of size() items; size is asked again for every group (see memstats.batch)."""
+    n = size()
+    group = []
+    for item in items:
+        group.append(item)
+        if len(group) >= n:
+            yield group
+            group = []
+            n = size()
+    if group:
+        yield group
+
+def _read_normalized(paths):
+    for p in paths:
+        with trace_events.stage("read", doc=p.name):
+            raw = p.read_text(encoding="utf-8")
+        with trace_events.stage("normalize", doc=p.name):
+            text = normalize_text(raw)
+        yield text, p
+
+# -------------------- CORPUS DETECTION + SPAN CACHE --------------------
+def _dist_version(name):
+    try:
+        return importlib.metadata.version(name)
+    except Exception:
+        return None
+
+@functools.lru_cache(maxsize=None)
+def detector_fingerprints():
+    """
+    Span-cache fingerprint of every detector's configuration. Computed from
+    sources, package versions and model files on disk, so no model is loaded.
+    """
+    here = pathlib.Path(__file__).resolve().parent
+    return {
+        "regex": fingerprint([(k, p.pattern, p.flags) for k, p in PATTERNS.items()],
+                             (here / "rule_scanner.py").read_bytes()),
+        "lines": fingerprint(APPLICANT_LINE.pattern, ADDR_LINE.pattern, inspect.getsource(line_spans)),
+        "spacy": fingerprint(_dist_version("spacy"), _dist_version("en_core_web_sm"),
+                             inspect.getsource(doc_spans), PATTERNS["DATE"].pattern, SPACY_LATIN_ONLY,
+                             (here / "script_runs.py").read_bytes()),
+        "hf": fingerprint(USE_XLM, file_fingerprint(HF_MODEL_DIR), HF_TOKENIZER, _dist_version("transformers"),
+                          _dist_version("torch"), (here / "hf_batch.py").read_bytes(), *(
+                              [] if HF_BACKEND == "torch" else
+                              [HF_BACKEND, file_fingerprint(ONNX_DIR), _dist_version("onnxruntime")])),
+    }
+
+def level_detectors(level):
+    """Raw span detectors whose output `level` is built from."""
+    return ["regex", "lines", "spacy", "hf"][:len(levels_upto(level)) + 1]
+
+def _detect_missing(group, need, batch_size, n_process):
+    """Fill in the detections of `need` that the (text, path, detections) of a group lack."""
+    for text, p, d in group:
+        if "regex" not in d:
+            with trace_events.stage("rule_spans", doc=p.name):
+                d["regex"] = rule_spans(text)
+        if "lines" not in d:
+            with trace_events.stage("line_spans", doc=p.name):
+                d["lines"] = line_spans(text)
+    batched = {"spacy": lambda texts: spacy_spans_batch(texts, batch_size, n_process),
+               "hf": hf_spans_batch}
+    for name, detect in batched.items():
+        todo = [(text, d) for text, _, d in group if name in need and name not in d]
+        if todo:
+            # one event per batch: the detector runs over all its documents at once
+            with trace_events.stage(f"{name}_spans_batch", docs=len(todo)):
+                for (_, d), spans in zip(todo, detect([text for text, _ in todo])):
+                    d[name] = spans
+
+def detect_corpus(paths, level="strong", cache=None, batch_size=SPACY_BATCH_SIZE, n_process=SPACY_N_PROCESS):
+    """
+    Yields groups of (text, path, detections): detections maps every detector of
+    level_detectors(level) to its raw spans. Without a cache spaCy streams over the
+    whole corpus through one nlp.pipe. With a SpanCache each group is looked up
+    first and only the misses reach a detector (and get stored), so a rerun over
+    unchanged files loads no model at all.
+    """
+    need = level_detectors(level)
+    if cache is None:
+        docs = ((text, p, {}) for text, p in _read_normalized(paths))
+        if "spacy" in need:
+            # spaCy runs over the whole corpus in batches; files are read lazily
+            nlp = DETECTORS.get("spacy")
+            views = ((*spacy_view(text), text, p) for text, p in _read_normalized(paths))
+            docs = ((text, p, {"spacy": view_spans(doc, pieces)}) for doc, (pieces, text, p) in
+                    nlp.pipe(((v, ctx) for v, *ctx in views), as_tuples=True,
+                             batch_size=batch_size, n_process=n_process))
+            # nlp.pipe works a batch ahead: most of each batch shows up on its first document
+            docs = trace_events.traced("spacy_pipe", docs)
+        for group in _groups(docs, lambda: memstats.batch(HF_DOC_BATCH)):
+            # XLM-R runs once per group of documents, batched across them
+            _detect_missing(group, need, batch_size, n_process)
+            yield group
+        return
+
+    fps = detector_fingerprints()
+    # spaCy misses are piped per group: keep at least one batch per worker process
+    for group in _groups(_read_normalized(paths),
+                         lambda: memstats.batch(max(HF_DOC_BATCH, batch_size * n_process))):
+        group = [(text, p, {}) for text, p in group]
+        with trace_events.stage("span_cache_get", docs=len(group)):
+            keys = [text_key(text) for text, _, _ in group]
+            for key, (_, _, d) in zip(keys, group):
+                for name in need:
+                    spans = cache.get(key, name, fps[name])
+                    if spans is not None:
+                        d[name] = spans
+        missing = [[name for name in need if name not in d] for _, _, d in group]
+        _detect_missing(group, need, memstats.batch(batch_size), n_process)
+        with trace_events.stage("span_cache_put", docs=len(group)):
+            for key, names, (_, _, d) in zip(keys, missing, group):
+                for name in names:
+                    cache.put(key, name, fps[name], d[name])
+            cache.commit()
+        yield group
+
+def redact_document(text, p, det, level, outdir):
+    """
+    Redact one document from its detections (see detect_corpus) and write its
+    per-level files. Returns (preds_for_eval, regex presence log, language / script).
+    """
+    with trace_events.stage("redact_document", doc=p.name):
+        with trace_events.stage("lang_detect"):
+            lang = lang_detect(text)
+
+        redacted_map, preds_for_eval = redact_text_levels(
+            text, det.get("spacy"), det.get("hf"), level=level, rule_s=det["regex"] + det["lines"])
+
+        # save redacted files per level
+        with trace_events.stage("write"):
+            for lv, out_text in redacted_map.items():
+                out_file = pathlib.Path(outdir) / f"{p.stem}_{lv}.txt"
+                out_file.write_text(out_text, encoding="utf-8")
+
+    # quick presence log (a label has a regex span iff its pattern matches)
+    found = dict.fromkeys(PATTERNS, False)
+    found.update((sp.label, True) for sp in det["regex"])
+    return preds_for_eval, found, lang
+
+# -------------------- PARALLEL CORPUS RUNNER --------------------
+# Documents are split into chunks and redacted by a process pool; each worker
+# loads spaCy / XLM-R once in its initializer and keeps them for all its chunks.
+CHUNK_SIZE = 32
+_WORKER = {}
+
+def _init_worker(level, outdir, batch_size, hf_batch_size, hf_backend, threads, cache_path, cache_bytes,
+                 trace=False, mem_accounting=False, rss_budget_mb=None):
+    global HF_BATCH_SIZE, HF_BACKEND, HF_THREADS
+    if trace:
+        trace_events.enable()  # events go back to the parent with each chunk
+    if mem_accounting:
+        memstats.enable_accounting()  # so do the memory figures
+    memstats.set_budget(rss_budget_mb)  # per process: each worker shrinks its own batches
+    # OMP / MKL were sized from the environment the worker was spawned with (see _thread_env)
+    HF_BATCH_SIZE, HF_BACKEND, HF_THREADS = hf_batch_size, hf_backend, threads
+    DETECTORS.ensure(level)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    _WORKER.update(level=level, outdir=outdir, batch_size=batch_size,
+                   cache=SpanCache(cache_path, cache_bytes) if cache_path else None)
+
+def _redact_chunk(paths):
+    w = _WORKER
+    out = []
+    for group in detect_corpus([pathlib.Path(p) for p in paths], w["level"], w["cache"], w["batch_size"], 1):
+        for text, p, det in group:
+            out.append((p.name, *redact_document(text, p, det, w["level"], w["outdir"])))
+            memstats.check()
+    return out, trace_events.drain(), memstats.drain()
+
+# read by OpenMP / MKL / OpenBLAS once, when numpy / torch load them
+THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+@contextlib.contextmanager
+def _thread_env(threads):
+    """
+    THREAD_ENV set to `threads` while worker processes are spawned: a worker
+    imports numpy (script_runs, span_types) while unpickling its initializer,
+    before _init_worker runs, so the thread count has to be in the environment
+    it starts with. The parent's environment is restored afterwards.
+    """
+    saved = {k: os.environ.get(k) for k in THREAD_ENV}
+    os.environ.update(dict.fromkeys(THREAD_ENV, str(threads)))
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+def run_parallel(paths, level="strong", outdir="outputs", workers=4, chunk_size=CHUNK_SIZE,
+                 cache=None, batch_size=SPACY_BATCH_SIZE):
+    """
+    Yields (name, preds_for_eval, found, lang) for every path, in input order
+    whatever order the workers finish in, so merged outputs are deterministic.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    cache_args = (cache.path, cache.max_bytes) if cache is not None else (None, 0)
+    chunks = [[str(p) for p in paths[i:i + chunk_size]] for i in range(0, len(paths), chunk_size)]
+    # spawn: workers start clean instead of inheriting (possibly threaded) parent state;
+    # one core's worth of BLAS / torch / ONNX Runtime threads each, not one pool per worker
+    with _thread_env(threads), ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker,
+            initargs=(level, str(outdir), batch_size, HF_BATCH_SIZE, HF_BACKEND, threads,
+                      *cache_args, trace_events.enabled(), memstats.accounting_enabled(),
+                      memstats.budget_mb())) as pool:
+        for results, events, mem in pool.map(_redact_chunk, chunks):
+            trace_events.extend(events)
+            memstats.merge(mem)
+            yield from results
+
+def redact_tool_version(level, stream):
+    """Manifest version of this stage: sources, detector fingerprints and run mode."""
+    return tool_version("redact_demo_updated.py", "rule_scanner.py", "span_resolve.py", "hf_batch.py", "textnorm.py",
+                        "script_runs.py", "langid.py",
+                        config=[detector_fingerprints(), level, stream, STREAM_WINDOW, STREAM_OVERLAP])
+
+# per-document {"lang", "script"} next to preds.json; eval_script.py reports per language from it
+PREDS_LANG = "preds_lang.json"
+# JSONL mode: documents between two manifest saves, so a rerun after a crash keeps
+# the records appended before it
+MANIFEST_SAVE_EVERY = 500
+
+def _resume_jsonl(path, manifest, hashes):
+    """
+    Rewrite the JSONL predictions `path` keeping only the records of files the
+    manifest finds fresh, and return their names. The copy replaces the file only
+    once complete.
+    """
+    kept = set()
+    if not os.path.exists(path):
+        return kept
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as out:
+        for name, spans in pred_store.iter_jsonl(path, dicts=True):
+            if name in hashes and name not in kept and manifest.fresh(name, hashes[name], spans):
+                out.write(pred_store.jsonl_record(name, spans))
+                kept.add(name)
+    os.replace(tmp, path)
+    return kept
+
+def main(stream=False, batch_size=SPACY_BATCH_SIZE, n_process=SPACY_N_PROCESS, level="strong", cache=None,
+         incremental=None, workers=1, chunk_size=CHUNK_SIZE, jsonl=None):
+    """
+    Redact rtis/*.txt and write preds.json at the end, or with jsonl=FILE append
+    one {"file", "spans"} record per document to FILE as soon as it is done.
+    """
     dpath = pathlib.Path("rtis")
     outdir = pathlib.Path("outputs")
     outdir.mkdir(exist_ok=True)
     examples = sorted(dpath.glob("*.txt"))
-    results = []
-    preds = {}
+    found_by_file = {}
+    # under an RSS budget, predictions move to a spill file next to preds.json when it is exceeded;
+    # in JSONL mode they are not kept at all
+    preds = None if jsonl else memstats.SpillDict(".", default=json_default) if memstats.budget_mb() else {}
+    sink = None  # JSONL mode: the predictions file, appended to and flushed per document
+    langs = {}
 
     if not examples:
         print("No .txt files found in ./rtis. Put demo files there and re-run.")
         return
 
-    for p in examples:
-        raw = p.read_text(encoding="utf-8")
-        text = normalize_text(raw)
-        try:
-            lang = lang_detect(text)
-        except Exception:
-            lang = "en"
-        print(f"{p.name}: detected language -> {lang}")
+    # incremental=True: files whose content, tool version and outputs are unchanged
+    # keep their previous preds.json entry and redacted files; False reprocesses
+    # everything but still records the manifest; None runs without one
+    todo = examples
+    manifest = None
+    old_names = None
+    kept = ()
+    if incremental is not None:
+        manifest = Manifest("redact_demo_updated", redact_tool_version(level, stream))
+        hashes = {p.name: file_hash(p) for p in examples}
+    if jsonl and incremental:
+        # records left by an earlier (maybe interrupted) run stay if still fresh
+        kept = _resume_jsonl(jsonl, manifest, hashes)
+        todo = [p for p in examples if p.name not in kept]
+        for name in kept:
+            found_by_file[name] = manifest.meta(name)["found"]
+            langs[name] = manifest.meta(name)["lang"]
+    elif incremental is not None and not jsonl:
+        old_preds = load_json("preds.json") if incremental else {}
+        todo = []
+        for p in examples:
+            if incremental and manifest.fresh(p.name, hashes[p.name], old_preds.get(p.name)):
+                preds[p.name] = old_preds[p.name]
+                found_by_file[p.name] = manifest.meta(p.name)["found"]
+                langs[p.name] = manifest.meta(p.name)["lang"]
+            else:
+                todo.append(p)
+        old_names = list(old_preds)
+        del old_preds
+    if jsonl:
+        sink = open(jsonl, "a" if kept else "w", encoding="utf-8")
+    n_done = 0
 
-        redacted_map, preds_for_eval = redact_text_levels(text)
+    def done(p, preds_for_eval, found, lang):
+        nonlocal n_done
+        print(f"{p.name}: detected language -> {lang['lang']} ({lang['script']} script)")
+        if sink is not None:
+            sink.write(pred_store.jsonl_record(p.name, preds_for_eval))
+            sink.flush()
+        else:
+            preds[p.name] = preds_for_eval
+        found_by_file[p.name] = found
+        langs[p.name] = lang
+        n_done += 1
+        if manifest is not None:
+            outputs = [outdir / f"{p.stem}_{lv}.txt" for lv in levels_upto(level)]
+            manifest.record(p.name, hashes[p.name], outputs, entry=to_dicts(preds_for_eval),
+                            meta={"found": found, "lang": lang})
+            if sink is not None and n_done % MANIFEST_SAVE_EVERY == 0:
+                manifest.save()
+        memstats.check(preds)
 
-        # save redacted files per level
-        for level, out_text in redacted_map.items():
-            out_file = outdir / f"{p.stem}_{level}.txt"
-            out_file.write_text(out_text, encoding="utf-8")
+    if stream:
+        for p in todo:
+            # bounded memory: windows in, redacted text out as it is produced
+            with trace_events.stage("redact_file_streaming", doc=p.name):
+                preds_for_eval, found_labels, lang = redact_file_streaming(p, outdir, level=level)
+            done(p, preds_for_eval, {k: k in found_labels for k in PATTERNS}, lang)
+        groups = ()
+    elif workers > 1:
+        by_name = {p.name: p for p in todo}
+        for name, preds_for_eval, found, lang in run_parallel(todo, level, outdir, workers, chunk_size,
+                                                                cache, batch_size):
+            done(by_name[name], preds_for_eval, found, lang)
+        groups = ()
+    else:
+        groups = detect_corpus(todo, level, cache, batch_size, n_process)
 
-        # attach preds (convert spans to simple dicts)
-        preds[p.name] = preds_for_eval
+    for group in groups:
+        for text, p, det in group:
+            done(p, *redact_document(text, p, det, level, outdir))
 
-        # quick presence log
-        found = {k: bool(v.search(text)) for k, v in PATTERNS.items()}
-        results.append({"file": p.name, "found": found})
+    # corpus order, whichever files were recomputed
+    names = [p.name for p in examples]
+    results = [{"file": p.name, "found": found_by_file[p.name]} for p in examples]
 
-    # Save predictions for evaluation
-    with open("preds.json", "w", encoding="utf-8") as f:
-        json.dump(preds, f, ensure_ascii=False, indent=2)
+    # Save predictions for evaluation (left untouched if nothing changed); written
+    # entry by entry, so spilled predictions are read back one at a time
+    if sink is not None:
+        sink.close()  # JSONL: every record is on disk already
+    elif manifest is None or todo or old_names != names:
+        with trace_events.stage("write_preds", docs=len(names)), open("preds.json", "w", encoding="utf-8") as f:
+            pred_store.dump_json_items(((name, preds[name]) for name in names), f, default=json_default)
+    if isinstance(preds, memstats.SpillDict):
+        preds.close()
+    langs = {p.name: langs[p.name] for p in examples}
+    if load_json(PREDS_LANG) != langs:
+        with open(PREDS_LANG, "w", encoding="utf-8") as f:
+            json.dump(langs, f, ensure_ascii=False, indent=2)
+    if manifest is not None:
+        manifest.prune(names)
+        manifest.save()
+        print(f"incremental: {len(todo)} file(s) processed, {len(examples) - len(todo)} unchanged")
 
     print(json.dumps(results, indent=2))
     print("\n✅ Redacted files saved in 'outputs/' folder!")
-    print("✅ Predictions saved to preds.json for evaluation.")
-    if HF_PIPELINE:
-        print("✅ XLM-R pipeline was used for 'strong' level (if model loaded).")
+    print(f"✅ Predictions saved to {jsonl or 'preds.json'} for evaluation.")
+    if DETECTORS.is_loaded("hf_engine") and DETECTORS.get("hf_engine"):
+        print("✅ XLM-R model was used for 'strong' level.")
+    if cache is not None:
+        print("span cache: {hits} hits, {misses} misses, {evicted} evicted".format(**cache.stats))
+    hf_engine = DETECTORS.get("hf_engine") if DETECTORS.is_loaded("hf_engine") else None
+    if hf_engine and hf_engine.stats["tokens"]:
+        rep = hf_engine.report()
+        print(f"XLM-R: {rep['tokens']} tokens, {rep['tokens_per_s']:.0f} tokens/s, "
+              f"padding waste {rep['padding_waste']:.1%}")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Redact rtis/*.txt at light/medium/strong levels.")
+    parser.add_argument("--stream", action="store_true",
+                        help="process each file in overlapping windows (for very large RTI documents)")
+    parser.add_argument("--batch-size", type=int, default=SPACY_BATCH_SIZE, help="documents per nlp.pipe batch")
+    parser.add_argument("--n-process", type=int, default=SPACY_N_PROCESS, help="spaCy worker processes")
+    parser.add_argument("--hf-batch-size", type=int, default=HF_BATCH_SIZE, help="XLM-R rows per forward pass")
+    parser.add_argument("--hf-backend", choices=["torch", "onnx", "onnx-int8"], default=HF_BACKEND,
+                        help="XLM-R CPU backend (onnx*: export first with onnx_backend.py)")
+    parser.add_argument("--level", choices=LEVELS, default="strong",
+                        help="highest level to produce; models of higher levels are never loaded")
+    parser.add_argument("--cache", default=".span_cache.sqlite",
+                        help="span cache file (detector output keyed by text + detector fingerprint)")
+    parser.add_argument("--cache-mb", type=float, default=256, help="span cache size budget (LRU eviction)")
+    parser.add_argument("--no-cache", action="store_true", help="always run every detector")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes, each with its own spaCy / XLM-R (1 = run in this process)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="documents per worker task")
+    parser.add_argument("--jsonl", nargs="?", const="preds.jsonl", metavar="FILE",
+                        help="append each document's predictions to FILE (JSON Lines, default preds.jsonl) "
+                             "as soon as it is done, instead of writing preds.json at the end")
+    parser.add_argument("--full", action="store_true",
+                        help="reprocess every file (default: skip files unchanged since the last run)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write per-stage timings as Chrome trace-event JSON (open in Perfetto)")
+    parser.add_argument("--mem-report", metavar="FILE",
+                        help="account tracemalloc peak and RSS delta per stage and document into a JSON "
+                             "run report (slows the run down)")
+    parser.add_argument("--rss-budget-mb", type=float,
+                        help="when RSS exceeds this, spill predictions to disk and halve batch sizes")
+    args = parser.parse_args()
+    if args.trace:
+        trace_events.enable(args.trace)
+    if args.mem_report:
+        memstats.enable_accounting(args.mem_report)
+    memstats.set_budget(args.rss_budget_mb)
+    HF_BATCH_SIZE = args.hf_batch_size  # read when the engine is first loaded
+    HF_BACKEND = args.hf_backend
+    cache = None if args.no_cache else SpanCache(args.cache, int(args.cache_mb * (1 << 20)))
+    try:
+        main(stream=args.stream, batch_size=args.batch_size, n_process=args.n_process,
+             level=args.level, cache=cache, incremental=not args.full,
+             workers=args.workers, chunk_size=args.chunk_size, jsonl=args.jsonl)
+    finally:
+        if cache is not None:
+            cache.close()
+        trace_events.save()
+        memstats.save_report(level=args.level, workers=args.workers, stream=args.stream)
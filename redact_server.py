@@ -0,0 +1,200 @@
+# redact_server.py
+# Long-running local redaction service: spaCy / XLM-R stay loaded between requests
+# and concurrent requests are redacted together in small batches.
+#
+#   python redact_server.py --port 8765 --warm strong --max-wait-ms 5 --max-batch 32
+#
+# POST /redact  {"text": "...", "level": "medium", "normalize": true}
+#           ->  {"level": "medium", "redacted": "...", "spans": [{start, end, label}, ...]}
+#               (offsets refer to the normalized text unless "normalize" is false)
+# GET  /health  -> loaded detectors and batching counters
+#
+# Binds to 127.0.0.1 and never touches the network: Hugging Face downloads are
+# switched off, so the XLM-R checkpoint and tokenizer must already be on disk.
+import os
+import sys
+import json
+import time
+import queue
+import threading
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import redact_demo_updated as R
+from span_types import json_default
+
+DEFAULT_PORT = 8765
+MAX_BATCH = 32        # requests redacted together at most
+MAX_WAIT_MS = 5.0     # how long the first request of a batch waits for company
+
+
+# -------------------- BATCHED REDACTION --------------------
+def redact_batch(items):
+    """
+    [(text, level), ...] -> [(redacted_text, spans), ...] for already-normalized
+    texts; spaCy and XLM-R each run once over the texts whose level needs them.
+    """
+    s_spans = [None] * len(items)
+    hf_s = [None] * len(items)
+    need_spacy = [i for i, (_, lv) in enumerate(items) if lv != "light"]
+    need_hf = [i for i, (_, lv) in enumerate(items) if lv == "strong"]
+    if need_spacy:
+        for i, spans in zip(need_spacy, R.spacy_spans_batch([items[i][0] for i in need_spacy])):
+            s_spans[i] = spans
+    if need_hf:
+        for i, spans in zip(need_hf, R.hf_spans_batch([items[i][0] for i in need_hf])):
+            hf_s[i] = spans
+    out = []
+    for (text, level), s, h in zip(items, s_spans, hf_s):
+        redacted_map, spans = R.redact_text_levels(text, s, h, level=level)
+        out.append((redacted_map[level], spans))
+    return out
+
+
+class MicroBatcher:
+    """
+    Collects requests from any number of threads and runs them through
+    redact_batch() on one worker thread (the models are not shared across threads).
+    A batch closes when it holds max_batch requests or max_wait_ms after its
+    first request arrived, whichever comes first.
+    """
+
+    def __init__(self, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "largest_batch": 0}
+        self.worker = threading.Thread(target=self._loop, name="redact-batcher", daemon=True)
+        self.worker.start()
+
+    def submit(self, text, level):
+        fut = Future()
+        self.queue.put((text, level, fut))
+        return fut
+
+    def _loop(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch):
+        self.stats["requests"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        try:
+            results = redact_batch([(text, level) for text, level, _ in batch])
+        except Exception as e:
+            for _, _, fut in batch:
+                fut.set_exception(e)
+            return
+        for (_, _, fut), res in zip(batch, results):
+            fut.set_result(res)
+
+
+# -------------------- HTTP --------------------
+class RedactHandler(BaseHTTPRequestHandler):
+    server_version = "RTIRedact/1.0"
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=json_default).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._reply(404, {"error": "not found"})
+        loaded = [name for name in ("spacy", "hf_engine") if R.DETECTORS.is_loaded(name)]
+        self._reply(200, {"status": "ok", "loaded": loaded, **self.server.batcher.stats})
+
+    def do_POST(self):
+        if self.path != "/redact":
+            return self._reply(404, {"error": "not found"})
+        try:
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            text, level = req["text"], req.get("level", "strong")
+            if not isinstance(text, str) or level not in R.LEVELS:
+                raise ValueError(f"need a string 'text' and a 'level' in {R.LEVELS}")
+        except (ValueError, KeyError, TypeError) as e:
+            return self._reply(400, {"error": str(e)})
+        if req.get("normalize", True):
+            text = R.normalize_text(text)
+        try:
+            redacted, spans = self.server.batcher.submit(text, level).result()
+        except Exception as e:
+            return self._reply(500, {"error": str(e)})
+        self._reply(200, {"level": level, "redacted": redacted, "spans": spans})
+
+    def log_message(self, fmt, *args):
+        pass  # one line per request would dominate the cost of light mode
+
+
+class RedactHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog; the default 5 resets bursts of clients
+
+
+def make_server(host="127.0.0.1", port=DEFAULT_PORT, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+    """HTTP server with its own MicroBatcher; port 0 picks a free port."""
+    server = RedactHTTPServer((host, port), RedactHandler)
+    server.batcher = MicroBatcher(max_batch, max_wait_ms)
+    return server
+
+
+# -------------------- CLIENT --------------------
+class RedactClient:
+    """Minimal client for a running redact_server (stdlib only)."""
+
+    def __init__(self, url=f"http://127.0.0.1:{DEFAULT_PORT}", timeout=60):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def redact(self, text, level="strong", normalize=True):
+        body = json.dumps({"text": text, "level": level, "normalize": normalize}).encode("utf-8")
+        req = urllib.request.Request(self.url + "/redact", data=body,
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return json.loads(resp.read())
+
+    def health(self):
+        with urllib.request.urlopen(self.url + "/health", timeout=self.timeout) as resp:
+            return json.loads(resp.read())
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve light/medium/strong redaction over local HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--warm", choices=R.LEVELS, default="strong",
+                        help="load the detectors of this level before accepting requests")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="requests per batch")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="latency window for collecting a batch")
+    parser.add_argument("--hf-backend", choices=["torch", "onnx", "onnx-int8"], default=R.HF_BACKEND,
+                        help="XLM-R CPU backend (see onnx_backend.py)")
+    args = parser.parse_args()
+    R.HF_BACKEND = args.hf_backend
+    R.DETECTORS.ensure(args.warm)
+    server = make_server(args.host, args.port, args.max_batch, args.max_wait_ms)
+    print(f"redact_server listening on http://{args.host}:{server.server_address[1]} "
+          f"(warm: {args.warm}, batch <= {args.max_batch}, wait <= {args.max_wait_ms} ms)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
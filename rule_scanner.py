@@ -0,0 +1,85 @@
+# rule_scanner.py
+# Single-pass scanner for the regex layer: finds every label of a PATTERNS dict
+# in one left-to-right walk instead of one finditer() per label.
+import re
+
+from span_types import coded, label_code
+
+_INLINE_FLAGS = ((re.I, "i"), (re.M, "m"), (re.S, "s"), (re.X, "x"))
+
+
+def _scoped(pat):
+    """Return pattern source wrapped so its own flags survive inside a combined pattern."""
+    flags = "".join(ch for f, ch in _INLINE_FLAGS if pat.flags & f)
+    return f"(?{flags}:{pat.pattern})" if flags else f"(?:{pat.pattern})"
+
+
+class MultiPatternScanner:
+    """
+    Combine {label: compiled_regex} into one pattern of optional lookaheads:
+
+        (?:(?=(?P<_L0>pat0)))?(?:(?=(?P<_L1>pat1)))?...  + "at least one matched"
+
+    The combined pattern only stops at positions where some label can start, and
+    reports every label that matches there, so overlapping hits of different
+    labels (e.g. a FILE number that is also a PIN) are all kept. Per label we
+    remember where its last match ended, which reproduces finditer()'s
+    non-overlapping semantics exactly.
+
+    first_chars optionally maps a label to a character class (without the
+    brackets) that every match of that label starts with. The class is checked
+    before the label's lookahead is entered, which is what makes the single pass
+    cheaper than one finditer() per label. It must be a superset of the real
+    first characters, otherwise matches are lost.
+    """
+
+    def __init__(self, patterns, first_chars=None):
+        first_chars = first_chars or {}
+        self.labels = list(patterns)
+        self.codes = [label_code(label) for label in self.labels]
+        parts, slots = [], []
+        gidx = 1
+        for i, (label, pat) in enumerate(patterns.items()):
+            pre = f"(?=[{first_chars[label]}])" if label in first_chars else ""
+            parts.append(f"(?:{pre}(?=(?P<_L{i}>{_scoped(pat)})))?")
+            # (outer group, first inner group or None, last inner group)
+            inner = gidx + 1 if pat.groups else None
+            slots.append((label, gidx, inner, gidx + pat.groups))
+            gidx += 1 + pat.groups
+        # fail unless at least one lookahead captured something
+        cond = "(?!)"
+        for i in reversed(range(len(patterns))):
+            cond = f"(?(_L{i})|{cond})"
+        # every pattern here starts with \b: test it once instead of once per label
+        guard = r"\b" if all(p.pattern.startswith(r"\b") for p in patterns.values()) else ""
+        if all(label in first_chars for label in patterns):
+            guard += "(?=[" + "".join(first_chars[label] for label in patterns) + "])"
+        self._slots = slots
+        self._combined = re.compile(guard + "".join(parts) + cond)
+
+    def scan(self, text):
+        """Return {label: [(start, end), ...]} in the order finditer() would yield them."""
+        hits = {label: [] for label in self.labels}
+        next_ok = {label: 0 for label in self.labels}
+        slots = self._slots
+        for m in self._combined.finditer(text):
+            pos = m.start()
+            regs = m.regs
+            for label, outer, inner, last in slots:
+                end = regs[outer][1]
+                if end == -1 or pos < next_ok[label]:
+                    continue
+                next_ok[label] = end
+                # same rule as redact_demo_updated._regex_span_bounds: prefer group 1 if any group matched
+                if inner is not None and any(regs[g][0] != -1 for g in range(inner, last + 1)):
+                    hits[label].append(regs[inner])
+                else:
+                    hits[label].append(regs[outer])
+        return hits
+
+    def spans(self, text):
+        """Flat list of Spans grouped by label in PATTERNS order (rule_spans() layout)."""
+        out = []
+        for code, bounds in zip(self.codes, self.scan(text).values()):
+            out.extend(coded(st, ed, code) for st, ed in bounds)
+        return out
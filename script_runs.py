@@ -0,0 +1,125 @@
+# script_runs.py
+# Split a document into runs of one Unicode script, so each detector only sees
+# the text it was trained on: en_core_web_sm gets the Latin runs, XLM-R the whole
+# document. Scripts come from a code-point -> script lookup table applied to the
+# whole text at once with numpy, not from a per-character Python loop.
+import re
+from bisect import bisect_right
+
+import numpy as np
+
+from span_types import coded
+
+SCRIPTS = ["common", "latin", "devanagari", "bengali", "gurmukhi", "gujarati", "oriya",
+           "tamil", "telugu", "kannada", "malayalam", "arabic", "other"]
+COMMON, LATIN, OTHER = 0, 1, len(SCRIPTS) - 1
+
+# (first, last) code points per script; anything not listed (and everything
+# outside the BMP) is "other". Digits, punctuation, spaces, symbols, combining
+# diacritics and the danda are "common": they belong to whatever surrounds them.
+_RANGES = {
+    "common": [(0x00, 0x40), (0x5B, 0x60), (0x7B, 0xBF), (0xD7, 0xD7), (0xF7, 0xF7),
+               (0x02B0, 0x036F), (0x0964, 0x0965), (0x2000, 0x206F), (0x20A0, 0x20CF),
+               (0x2100, 0x214F), (0x3000, 0x303F), (0xFE00, 0xFE0F), (0xFEFF, 0xFEFF)],
+    "latin": [(0x41, 0x5A), (0x61, 0x7A), (0xAA, 0xAA), (0xB5, 0xB5), (0xBA, 0xBA),
+              (0xC0, 0xD6), (0xD8, 0xF6), (0xF8, 0x024F), (0x1E00, 0x1EFF), (0x2C60, 0x2C7F),
+              (0xA720, 0xA7FF), (0xFF21, 0xFF3A), (0xFF41, 0xFF5A)],
+    "devanagari": [(0x0900, 0x0963), (0x0966, 0x097F), (0x1CD0, 0x1CFF), (0xA8E0, 0xA8FF)],
+    "bengali": [(0x0980, 0x09FF)],
+    "gurmukhi": [(0x0A00, 0x0A7F)],
+    "gujarati": [(0x0A80, 0x0AFF)],
+    "oriya": [(0x0B00, 0x0B7F)],
+    "tamil": [(0x0B80, 0x0BFF)],
+    "telugu": [(0x0C00, 0x0C7F)],
+    "kannada": [(0x0C80, 0x0CFF)],
+    "malayalam": [(0x0D00, 0x0D7F)],
+    "arabic": [(0x0600, 0x06FF), (0x0750, 0x077F), (0xFB50, 0xFDFF), (0xFE70, 0xFEFE)],
+}
+
+_TABLE = np.full(0x10000, OTHER, dtype=np.uint8)  # 0xFFFF (a noncharacter) stays "other"
+for _name, _ranges in _RANGES.items():
+    for _lo, _hi in _ranges:
+        _TABLE[_lo:_hi + 1] = SCRIPTS.index(_name)
+
+_ASCII_LETTER = re.compile(r"[A-Za-z]")
+
+
+def script_codes(text):
+    """uint8 array: index into SCRIPTS of every character of text."""
+    cp = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    return _TABLE[np.minimum(cp, 0xFFFF)]
+
+
+def script_histogram(text):
+    """{script: number of characters} over SCRIPTS."""
+    counts = np.bincount(script_codes(text), minlength=len(SCRIPTS))
+    return dict(zip(SCRIPTS, counts.tolist()))
+
+
+def script_runs(text):
+    """
+    [(start, end, script), ...] covering text. "common" characters join the Latin
+    run next to them (so "Address: 12 MG Road" stays one run), otherwise the run
+    before them; the text is only "common" if it has no letters at all.
+    """
+    n = len(text)
+    if not n:
+        return []
+    if text.isascii():
+        return [(0, n, "latin" if _ASCII_LETTER.search(text) else "common")]
+    codes = script_codes(text)
+    lab = np.where(codes == COMMON, LATIN, codes)
+    starts = np.concatenate(([0], np.flatnonzero(lab[1:] != lab[:-1]) + 1))
+    ends = np.append(starts[1:], n)
+    letters = np.add.reduceat((codes == LATIN).astype(np.int32), starts)
+    out = []
+    for a, b, s, k in zip(starts.tolist(), ends.tolist(), lab[starts].tolist(), letters.tolist()):
+        if s == LATIN and not k:  # punctuation / digits between two non-Latin runs
+            s = out[-1][2] if out else COMMON
+        if out and out[-1][2] == s:
+            out[-1][1] = b
+        else:
+            out.append([a, b, s])
+    if len(out) > 1 and out[0][2] == COMMON:
+        out[1][0] = 0
+        del out[0]
+    return [(a, b, SCRIPTS[s]) for a, b, s in out]
+
+
+# -------------------- LATIN VIEW --------------------
+def latin_view(text, sep="\n\n"):
+    """
+    (view, pieces): the Latin runs of text joined by sep, and pieces
+    [(view_start, raw_start, length), ...] locating each run in text.
+    """
+    runs = [(a, b) for a, b, s in script_runs(text) if s == "latin"]
+    if runs == [(0, len(text))]:
+        return text, [(0, 0, len(text))]
+    parts, pieces, pos = [], [], 0
+    for a, b in runs:
+        if parts:
+            parts.append(sep)
+            pos += len(sep)
+        parts.append(text[a:b])
+        pieces.append((pos, a, b - a))
+        pos += b - a
+    return "".join(parts), pieces
+
+
+def map_spans(spans, pieces):
+    """Spans on a latin_view() view -> the same spans on the original text.
+    Spans are clipped to the run they start in; spans starting in a separator are dropped."""
+    if len(pieces) == 1 and pieces[0][:2] == (0, 0):
+        return spans
+    starts = [p[0] for p in pieces]
+    out = []
+    for sp in spans:
+        k = bisect_right(starts, sp.start) - 1
+        if k < 0:
+            continue
+        view_start, raw, length = pieces[k]
+        st = sp.start - view_start
+        if st >= length:
+            continue
+        out.append(coded(raw + st, raw + min(sp.end - view_start, length), sp.code, sp.text))
+    return out
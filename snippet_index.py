@@ -0,0 +1,189 @@
+# snippet_index.py
+# Realignment of span snippets onto a normalized document (fix_preds.py /
+# clean_preds.py). A 4-gram position map of the document, built once per
+# document, answers the exact and whitespace-relaxed searches from the positions
+# of the snippet's rarest 4-gram instead of a scan of the whole text per span,
+# and the longest-prefix-near-an-offset search from the positions of its first
+# 4 characters inside the window instead of one find() per prefix width. Every
+# answer is the one str.find gives (the first occurrence), so offsets do not
+# move. Short documents are cheaper to scan than to index: below SCAN_BELOW
+# characters the same queries run on str.find.
+import re
+
+Q = 4                  # gram length = shortest snippet prefix the windowed search accepts
+SCAN_BELOW = 100_000   # shorter documents (chars) are searched with str.find: building the
+                       # map pays off from about here (5 spans / 1000 chars, bench_snippet_index.py)
+MAX_ALPHABET = 55108   # distinct characters whose 4-grams still pack into an int64
+WS_RUN = re.compile(r'\s+')
+
+
+def common_prefix(a, b):
+    """Length of the common prefix of two strings."""
+    n = min(len(a), len(b))
+    if a[:n] == b[:n]:
+        return n
+    lo, hi = 0, n  # a[:lo] == b[:lo], a[:hi] != b[:hi]
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+class SnippetIndex:
+    """Substring queries on one document; the 4-gram map is built on first use."""
+
+    def __init__(self, text, scan_below=SCAN_BELOW):
+        self.text = text
+        self.scan = len(text) < scan_below
+        self.grams = None
+
+    def _build(self):
+        import numpy as np
+        self.np = np
+        text = self.text
+        codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype="<u4")
+        # characters ranked by code point: a lookup table over the code points used
+        present = np.zeros(int(codes.max()) + 1 if len(codes) else 1, dtype=bool)
+        present[codes] = True
+        alphabet = np.flatnonzero(present)
+        if len(alphabet) > MAX_ALPHABET:
+            self.scan = True
+            return
+        self.alphabet = {chr(c): i for i, c in enumerate(alphabet.tolist())}
+        self.sigma = max(len(alphabet), 1)
+        keys = self._pack((np.cumsum(present, dtype=np.int64) - 1)[codes])
+        # positions grouped by 4-gram, ascending within a group (stable sort)
+        self.pos = np.argsort(keys, kind="stable")
+        keys = keys[self.pos]
+        starts = np.flatnonzero(np.diff(keys, prepend=-1))
+        self.keys = keys[starts]
+        self.firsts = self.pos[starts]
+        self.bounds = np.append(starts, len(keys)).tolist()
+        self.grams = {text[p:p + Q]: g for g, p in enumerate(self.firsts.tolist())}
+
+    def _pack(self, ranks):
+        """int64 key of every 4-gram of a rank sequence."""
+        m = len(ranks) - Q + 1
+        keys = ranks[:max(m, 0)].copy()
+        for i in range(1, Q):
+            keys = keys * self.sigma + ranks[i:i + m]
+        return keys
+
+    def _indexed(self):
+        """Build the map on first use; False if this document is searched with str.find."""
+        if self.grams is None and not self.scan:
+            self._build()
+        return not self.scan
+
+    def _find_short(self, s):
+        """text.find(s) for len(s) < Q: the 4-grams starting with s are one run of keys."""
+        ranks = [self.alphabet.get(c) for c in s]
+        if None in ranks:
+            return -1
+        lo = hi = 0
+        for i in range(Q):
+            lo = lo * self.sigma + (ranks[i] if i < len(s) else 0)
+            hi = hi * self.sigma + (ranks[i] if i < len(s) else self.sigma - 1)
+        np = self.np
+        a, b = np.searchsorted(self.keys, lo), np.searchsorted(self.keys, hi, side="right")
+        # the last Q - 1 offsets start no 4-gram
+        tail = self.text.find(s, max(len(self.text) - Q + 1, 0))
+        first = int(self.firsts[a:b].min()) if b > a else -1
+        return tail if first == -1 else first
+
+    def find(self, s):
+        """text.find(s): first offset of a non-empty s, or -1."""
+        if not self._indexed():
+            return self.text.find(s)
+        if len(s) < Q:
+            return self._find_short(s)
+        # every occurrence of s holds its rarest 4-gram at the same offset j
+        grams, bounds = self.grams, self.bounds
+        best = None
+        for i in range(len(s) - Q + 1):
+            g = grams.get(s[i:i + Q])
+            if g is None:
+                return -1
+            n = bounds[g + 1] - bounds[g]
+            if best is None or n < best[0]:
+                best = n, i, g
+        _, j, g = best
+        text = self.text
+        for p in self.pos[bounds[g]:bounds[g + 1]].tolist():
+            if p >= j and text.startswith(s, p - j):
+                return p - j
+        return -1
+
+    def prefix_near(self, s, lo, hi, max_len):
+        """
+        (offset, w) for the longest prefix s[:w], Q <= w <= max_len, that occurs
+        within text[lo:hi], at its first offset there; None if none does.
+        Same as trying text.find(s[:w], lo, hi) for w = max_len, max_len - 1, ...
+        """
+        top = min(max_len, len(s))
+        if top < Q:
+            return None
+        if not self._indexed():
+            for w in range(top, Q - 1, -1):
+                idx = self.text.find(s[:w], lo, hi)
+                if idx != -1:
+                    return idx, w
+            return None
+        g = self.grams.get(s[:Q])
+        if g is None:
+            return None
+        # str.find bounds are slice bounds
+        lo, hi, _ = slice(lo, hi).indices(len(self.text))
+        if hi - lo < Q:
+            return None
+        np = self.np
+        starts = self.pos[self.bounds[g]:self.bounds[g + 1]]
+        starts = starts[np.searchsorted(starts, lo):np.searchsorted(starts, hi - Q, side="right")]
+        # s[:w] occurs at p for every w up to the common prefix there: take the
+        # longest such w that fits before hi, at the first p reaching it
+        best, s = None, s[:top]
+        for p in starts.tolist():
+            w = min(common_prefix(self.text[p:p + top], s), hi - p)
+            if best is None or w > best[1]:
+                best = p, w
+                if w == top:
+                    break
+        return best
+
+    def extend(self, p, s):
+        """End of the match of s at p: p plus the common prefix of text[p:] and s."""
+        return p + common_prefix(self.text[p:p + len(s)], s)
+
+
+def best_match(index, snippet, approx_start, max_prefix, radius, strip_first=False, extend=False):
+    """
+    (start, end) of a span's snippet in the indexed document, or None: the first
+    exact occurrence, else of the whitespace-collapsed snippet, else the longest
+    prefix (max_prefix down to Q chars) starting within `radius` of approx_start,
+    grown as far as text and snippet still agree if `extend`.
+    strip_first: search for the stripped snippet already in the exact step.
+    """
+    if not snippet:
+        return None
+    s = snippet.strip()
+    if strip_first and not s:
+        return None
+    exact = s if strip_first else snippet
+    idx = index.find(exact)
+    if idx != -1:
+        return idx, idx + len(exact)
+    if not s:
+        return None
+    s2 = WS_RUN.sub(' ', s)
+    idx = index.find(s2)
+    if idx != -1:
+        return idx, idx + len(s2)
+    found = index.prefix_near(s, max(0, approx_start - radius), min(len(index.text), approx_start + radius),
+                              max_prefix)
+    if found is None:
+        return None
+    idx, w = found
+    return idx, index.extend(idx, s) if extend else idx + w
@@ -0,0 +1,121 @@
+# span_cache.py
+# Content-addressed on-disk cache of raw detector output. An entry is keyed by
+# (hash of the normalized text, detector name, detector fingerprint), so a change
+# to the text, to PATTERNS or to a model version simply misses; stale entries are
+# never read again and age out under the LRU size budget. A hit only reads: the
+# recency it refreshes is written with the next commit, and only when older than
+# TOUCH_AFTER, so a warm rerun with several workers on one file takes no write lock.
+import json
+import time
+import hashlib
+import sqlite3
+import pathlib
+
+from span_types import from_dicts, json_default
+
+DEFAULT_PATH = ".span_cache.sqlite"
+DEFAULT_MAX_BYTES = 256 << 20
+TOUCH_AFTER = 3600.0  # seconds: a hit refreshes last_used only if it is older (LRU at that resolution)
+
+
+def text_key(text):
+    """Hash of an (already normalized) document text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def fingerprint(*parts):
+    """Short stable hash of a detector's configuration (strings / bytes / reprs)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = repr(part).encode("utf-8")
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()[:16]
+
+
+def file_fingerprint(*paths):
+    """(name, size, mtime) of every file under the given paths; cheap for model weights."""
+    out = []
+    for path in paths:
+        path = pathlib.Path(path)
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for f in files:
+            if f.is_file():
+                st = f.stat()
+                out.append((str(f), st.st_size, st.st_mtime_ns))
+    return out
+
+
+class SpanCache:
+    """
+    SQLite table of span lists. get()/put() work on one (text_hash, detector,
+    fingerprint) key; commit() persists pending writes and evicts the least
+    recently used entries while the payload total exceeds max_bytes.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES, touch_after=TOUCH_AFTER):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.touch_after = touch_after
+        self._touched = {}  # key -> time of a hit whose last_used is still to be written
+        # timeout: parallel workers may share one cache file
+        self.db = sqlite3.connect(self.path, timeout=60)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS spans ("
+            " text_hash TEXT, detector TEXT, fingerprint TEXT,"
+            " payload BLOB, size INTEGER, last_used REAL,"
+            " PRIMARY KEY (text_hash, detector, fingerprint))")
+        self.db.execute("CREATE INDEX IF NOT EXISTS spans_lru ON spans (last_used)")
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def get(self, text_hash, detector, fp):
+        row = self.db.execute(
+            "SELECT payload, last_used FROM spans WHERE text_hash=? AND detector=? AND fingerprint=?",
+            (text_hash, detector, fp)).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        now = time.time()
+        if now - row[1] > self.touch_after:
+            self._touched[(text_hash, detector, fp)] = now
+        return from_dicts(json.loads(row[0]))
+
+    def put(self, text_hash, detector, fp, spans):
+        payload = json.dumps(spans, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+        self.db.execute(
+            "INSERT OR REPLACE INTO spans VALUES (?, ?, ?, ?, ?, ?)",
+            (text_hash, detector, fp, payload, len(payload), time.time()))
+        self._touched.pop((text_hash, detector, fp), None)
+
+    def size(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM spans").fetchone()[0]
+
+    def evict(self):
+        total = self.size()
+        if total <= self.max_bytes:
+            return 0
+        drop = []
+        for key, size in self.db.execute(
+                "SELECT rowid, size FROM spans ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            drop.append((key,))
+            total -= size
+        self.db.executemany("DELETE FROM spans WHERE rowid=?", drop)
+        self.stats["evicted"] += len(drop)
+        return len(drop)
+
+    def commit(self):
+        if self._touched:
+            self.db.executemany(
+                "UPDATE spans SET last_used=? WHERE text_hash=? AND detector=? AND fingerprint=?",
+                [(t, *key) for key, t in self._touched.items()])
+            self._touched.clear()
+        self.evict()
+        self.db.commit()
+
+    def close(self):
+        self.commit()
+        self.db.close()
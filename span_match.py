@@ -0,0 +1,95 @@
+# span_match.py
+# Gold vs predicted span matching shared by eval_script.py and plots.py. Spans of
+# a file are sorted by start and swept once: every same-label overlapping
+# (gold, pred) pair is found while only the spans still open at the current
+# position are looked at. Matching then follows the original greedy rule on
+# those pairs alone: gold spans in list order, each taking the first (lowest
+# index) unmatched prediction of its label that overlaps it. Spans are
+# span_types.Span objects; labels are compared by code.
+from collections import Counter, defaultdict
+
+from span_types import LABEL_NAMES
+
+
+def overlap_pairs(gold, preds):
+    """[(gold index, pred index), ...] of every same-label pair of overlapping spans."""
+    # events (start, side, index, end) per label; labels missing on one side never pair
+    by_label = {}
+    for i, s in enumerate(gold):
+        by_label.setdefault(s.code, ([], []))[0].append((s.start, 0, i, s.end))
+    for i, s in enumerate(preds):
+        sides = by_label.get(s.code)
+        if sides is not None:
+            sides[1].append((s.start, 1, i, s.end))
+    pairs = []
+    for g_events, p_events in by_label.values():
+        if not p_events:
+            continue
+        if len(g_events) == 1 or len(p_events) == 1:
+            # one span against the rest: nothing to sweep
+            for g_start, _, gi, g_end in g_events:
+                for p_start, _, pi, p_end in p_events:
+                    if g_end > p_start and p_end > g_start:
+                        pairs.append((gi, pi))
+            continue
+        active = ([], [])  # per side: (start, end, index) of spans that may still overlap
+        for start, side, i, end in sorted(g_events + p_events):
+            open_ = active[1 - side]
+            if open_:
+                # everything later starts at >= start: spans ending by now are done
+                open_[:] = [o for o in open_ if o[1] > start]
+                for o_start, _, j in open_:
+                    if end > o_start:
+                        pairs.append((i, j) if side == 0 else (j, i))
+            active[side].append((start, end, i))
+    return pairs
+
+
+def greedy_match(n_gold, pairs):
+    """Index of the prediction matched to each gold span (None if unmatched)."""
+    candidates = defaultdict(list)
+    for gi, pi in pairs:
+        candidates[gi].append(pi)
+    taken = set()
+    out = [None] * n_gold
+    for gi in sorted(candidates):
+        for pi in sorted(candidates[gi]):
+            if pi not in taken:
+                taken.add(pi)
+                out[gi] = pi
+                break
+    return out
+
+
+def match_corpus(gold, preds):
+    """
+    ({label: {"tp", "fp", "fn"}}, {label: overlapping pairs}) over the files of
+    gold; predictions for files missing from gold are ignored. A label only
+    appears in the counts if it has a gold span or an unmatched prediction.
+    """
+    return match_docs((fname, g_spans, preds.get(fname)) for fname, g_spans in gold.items())
+
+
+def match_docs(docs):
+    """match_corpus over (file name, gold spans, predicted spans or None) triples, one at a time;
+    triples without gold (None) are skipped."""
+    # matched pairs share their label, so per-label totals and tp give fp / fn
+    n_gold, n_pred, tp, n_pairs = Counter(), Counter(), Counter(), Counter()
+    for fname, g_spans, p_spans in docs:
+        if g_spans is None:
+            continue
+        n_gold.update(s.code for s in g_spans)
+        if not p_spans:
+            continue
+        n_pred.update(s.code for s in p_spans)
+        pairs = overlap_pairs(g_spans, p_spans)
+        if pairs:
+            n_pairs.update(g_spans[gi].code for gi, _ in pairs)
+            tp.update(g_spans[gi].code for gi, pi in enumerate(greedy_match(len(g_spans), pairs))
+                      if pi is not None)
+    counts = {}
+    for code in set(n_gold) | set(n_pred):
+        fp = n_pred[code] - tp[code]
+        if n_gold[code] or fp:
+            counts[LABEL_NAMES[code]] = {"tp": tp[code], "fp": fp, "fn": n_gold[code] - tp[code]}
+    return counts, {LABEL_NAMES[code]: n for code, n in n_pairs.items()}
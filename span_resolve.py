@@ -0,0 +1,252 @@
+# span_resolve.py
+# Shared span resolution (merge / containment / label priority) in O(n log n).
+# Used by redact_demo_updated.combine_and_dedupe and clean_preds.py; results are
+# identical to the old pairwise loops, only the search for conflicting spans changed.
+# Spans are span_types.Span objects.
+import heapq
+from bisect import bisect_left, bisect_right
+
+from span_types import coded
+
+# label priority (higher = more authoritative). adjust as needed.
+LABEL_PRIORITY = {
+    "AADHAAR": 9, "PAN": 9, "PASSPORT": 9, "VOTER_ID": 8, "PHONE": 8, "EMAIL": 8,
+    "PIN": 7, "FILE": 7, "DATE": 6, "ADDRESS": 5, "PERSON": 4, "ORG": 3, "OTHER":1
+}
+
+INF = float("inf")
+
+
+# -------------------- DEDUPE (redact_demo_updated) --------------------
+class SpanDeduper:
+    """
+    Sweep-line state of combine_and_dedupe, so spans can be fed in batches whose
+    starts never go backwards (streaming mode) with the same result as one call.
+
+    Kept spans are visited by start, so every kept span has a larger start and a
+    larger end than the one kept before it, and the kept spans that still cover
+    the current start get strictly longer. That means only the last kept span
+    can be "longer than s", and the same-label "near" test only has to look at
+    the handful of kept spans whose start or end lies within 2 of s.
+    """
+
+    def __init__(self):
+        self.unique, self.starts, self.ends = [], [], []
+
+    def offer(self, s):
+        """Sweep one validated span (in (start, -length) order); True if it is kept."""
+        unique, starts, ends = self.unique, self.starts, self.ends
+        st, ed, lab = s.start, s.end, s.code
+        # kept spans overlapping s are exactly the suffix with end > st
+        first = bisect_right(ends, st)
+        if first < len(unique):
+            last = unique[-1]
+            # otherwise prefer existing larger span -> skip
+            if last.end - last.start >= ed - st:
+                return False
+            # same label close to existing (start or end within 2) -> skip (merge-like)
+            near = range(max(first, bisect_right(starts, st - 3)), bisect_right(starts, st))
+            near_end = range(max(first, bisect_right(ends, ed - 3)), bisect_left(ends, ed + 3))
+            if any(unique[i].code == lab for i in near) or any(unique[i].code == lab for i in near_end):
+                return False
+        unique.append(s)
+        starts.append(st)
+        ends.append(ed)
+        return True
+
+    def feed(self, spans, text_len):
+        """Validate, sort and sweep one batch; return the spans of it that are kept."""
+        good = _valid_spans(spans, text_len)
+        # sort by start then -length so longer spans keep precedence
+        good = sorted(good, key=lambda x: (x.start, -(x.end-x.start)))
+        return [s for s in good if self.offer(s)]
+
+    def forget_before(self, pos):
+        """Drop kept spans ending at or before pos; later batches all start at >= pos."""
+        n = bisect_right(self.ends, pos)
+        if n:
+            del self.unique[:n], self.starts[:n], self.ends[:n]
+
+
+def _valid_spans(spans, text_len):
+    good = []
+    for s in spans:
+        st, ed = s.start, s.end
+        if not (isinstance(st,int) and isinstance(ed,int) and 0 <= st < ed <= text_len):
+            continue
+        # kept spans carry no text; span objects are shared, never modified
+        good.append(s if s.text is None else coded(st, ed, s.code))
+    return good
+
+
+def dedupe_spans(spans, text_len):
+    """Combine list of Spans and remove duplicates/invalids conservatively."""
+    return SpanDeduper().feed(spans, text_len)
+
+
+class TieredDeduper:
+    """
+    dedupe_spans for nested redaction levels (light < medium < strong < ...), where
+    level k sees the spans of increments 0..k. All increments are validated and
+    sorted once; each span is then swept by the deduper of its own level and every
+    level above it. Ties on (start, length) keep increment order, so level k gets
+    exactly dedupe_spans(increments[0] + ... + increments[k]).
+    """
+
+    def __init__(self, n_levels):
+        self.levels = [SpanDeduper() for _ in range(n_levels)]
+
+    def feed(self, increments, text_len):
+        tagged = []
+        for k, spans in enumerate(increments):
+            for i, s in enumerate(_valid_spans(spans, text_len)):
+                tagged.append((s.start, s.start - s.end, k, i, s))
+        tagged.sort(key=lambda t: t[:4])
+        kept = [[] for _ in self.levels]
+        for _, _, k, _, s in tagged:
+            for lv in range(k, len(self.levels)):
+                if self.levels[lv].offer(s):
+                    kept[lv].append(s)
+        return kept
+
+    def forget_before(self, pos):
+        for d in self.levels:
+            d.forget_before(pos)
+
+
+def dedupe_levels(increments, text_len):
+    """[dedupe_spans(increments[0] + ... + increments[k], text_len) for each k], in one sort."""
+    return TieredDeduper(len(increments)).feed(increments, text_len)
+
+
+# -------------------- CONTAINMENT (clean_preds) --------------------
+def drop_contained(spans, priority=LABEL_PRIORITY):
+    """
+    Drop every span that lies inside another span (t is not s) whose label has >=
+    priority. Sweep by start keeping, per priority value, the two largest ends seen
+    so far (two, so a span never counts as its own container).
+    """
+    order = sorted(range(len(spans)), key=lambda i: spans[i].start)
+    best = {}  # priority -> [(end, idx), (end, idx)] top two ends so far
+    levels = []  # distinct priorities, descending
+    contained = [False] * len(spans)
+    pos = 0
+    while pos < len(order):
+        # add the whole group of spans sharing this start before querying any of them
+        grp_end = pos
+        st = spans[order[pos]].start
+        while grp_end < len(order) and spans[order[grp_end]].start == st:
+            i = order[grp_end]
+            p = priority.get(spans[i].label, 0)
+            top = best.get(p)
+            if top is None:
+                best[p] = top = []
+                levels.append(p)
+                levels.sort(reverse=True)
+            top.append((spans[i].end, i))
+            top.sort(reverse=True)
+            del top[2:]
+            grp_end += 1
+        for k in range(pos, grp_end):
+            i = order[k]
+            p = priority.get(spans[i].label, 0)
+            ed = spans[i].end
+            for lv in levels:
+                if lv < p:
+                    break
+                top = best[lv]
+                # largest end among the *other* spans of this priority
+                other = top[0] if top[0][1] != i else (top[1] if len(top) > 1 else None)
+                if other is not None and other[0] >= ed:
+                    contained[i] = True
+                    break
+        pos = grp_end
+    return [s for i, s in enumerate(spans) if not contained[i]]
+
+
+# -------------------- CROSS-LABEL OVERLAPS (clean_preds) --------------------
+class _LeftmostBelow:
+    """Segment tree over list slots: leftmost slot whose value is < x, with point updates."""
+
+    def __init__(self, capacity):
+        size = 1
+        while size < max(1, capacity):
+            size *= 2
+        self.size = size
+        self.tree = [INF] * (2 * size)
+
+    def set(self, i, value):
+        i += self.size
+        self.tree[i] = value
+        i //= 2
+        while i:
+            self.tree[i] = min(self.tree[2*i], self.tree[2*i+1])
+            i //= 2
+
+    def leftmost_below(self, x):
+        if self.tree[1] >= x:
+            return -1
+        i = 1
+        while i < self.size:
+            i = 2*i if self.tree[2*i] < x else 2*i + 1
+        return i - self.size
+
+
+def resolve_overlaps(spans, text, priority=LABEL_PRIORITY):
+    """
+    Final pass: ensure no overlaps across labels, resolved by priority.
+    Sort by start; for overlaps keep span with higher priority, or longer span if
+    equal; a lower-priority span sticking out of its conflict is clipped (left
+    piece preferred). The conflict is always the first kept span (by list position)
+    that overlaps, exactly as a linear scan of the kept list would find it.
+
+    Because starts only grow, a kept span whose end is <= the current start can
+    never conflict again; the remaining "live" spans overlap s iff their start is
+    < s's end, so the first conflict is the leftmost live slot with start < end.
+    """
+    spans = sorted(spans, key=lambda x: (x.start, - (x.end-x.start)))
+    nonover = []
+    # every span adds at most one slot
+    live = _LeftmostBelow(len(spans))
+    expiry = []  # (end, slot, version) heap
+    version = []
+
+    def put(slot, span):
+        if slot == len(nonover):
+            nonover.append(span)
+            version.append(0)
+        else:
+            nonover[slot] = span
+            version[slot] += 1
+        live.set(slot, span.start)
+        heapq.heappush(expiry, (span.end, slot, version[slot]))
+
+    def clipped(s, st, ed):
+        return coded(st, ed, s.code, text[st:ed].strip())
+
+    for s in spans:
+        while expiry and expiry[0][0] <= s.start:
+            _, slot, ver = heapq.heappop(expiry)
+            if version[slot] == ver:
+                live.set(slot, INF)
+        i = live.leftmost_below(s.end)
+        if i == -1:
+            put(len(nonover), s)
+            continue
+        u = nonover[i]
+        p_s = priority.get(s.label,0)
+        p_u = priority.get(u.label,0)
+        if p_s > p_u:
+            put(i, s)
+        elif p_s < p_u:
+            # fully inside higher priority -> drop, else keep the outside piece
+            if s.end <= u.end and s.start >= u.start:
+                pass
+            elif s.start < u.start:
+                put(len(nonover), clipped(s, s.start, u.start))
+            elif s.end > u.end:
+                put(len(nonover), clipped(s, u.end, s.end))
+        elif s.end-s.start > u.end-u.start:
+            # equal priority: keep longer span
+            put(i, s)
+    return nonover
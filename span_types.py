@@ -0,0 +1,126 @@
+# span_types.py
+# Compact span representation shared by the detectors, span_resolve, span_match /
+# eval_script and the policy renderers. A Span has __slots__ (no per-span dict),
+# int offsets, a one-byte label code into the process-wide label table and an
+# optional text (only the post-processing scripts fill it in). JSON files keep the
+# {"start", "end", "label"[, "text"]} dicts: spans are converted where they are
+# read (from_dicts) and written (to_dicts, or json_default as json.dump's default=).
+# to_array / from_array give the same spans as a NumPy structured array (int32
+# offsets, uint8 label codes) for flat storage.
+
+# label table: codes are small ints, fixed for the labels the pipeline knows and
+# handed out in order of first use for any other label (e.g. from a model config)
+LABEL_NAMES = ["O", "PERSON", "ADDRESS", "PHONE", "EMAIL", "AADHAAR", "PAN", "PASSPORT", "VOTER_ID",
+               "PIN", "DATE", "FILE", "ORG", "OTHER"]
+_CODES = {name: code for code, name in enumerate(LABEL_NAMES)}
+
+
+def label_code(label):
+    """Code of `label`, added to the table on first use (at most 256 labels, one byte each)."""
+    code = _CODES.get(label)
+    if code is None:
+        if len(LABEL_NAMES) == 256:
+            raise ValueError(f"more than 256 span labels (adding {label!r})")
+        code = _CODES[label] = len(LABEL_NAMES)
+        LABEL_NAMES.append(label)
+    return code
+
+
+class Span:
+    """Character span [start, end) with an interned label; `text` is None unless set."""
+    __slots__ = ("start", "end", "code", "text")
+
+    def __init__(self, start, end, label, text=None):
+        self.start = start
+        self.end = end
+        try:
+            self.code = _CODES[label]
+        except KeyError:
+            self.code = label_code(label)
+        self.text = text
+
+    @property
+    def label(self):
+        return LABEL_NAMES[self.code]
+
+    @label.setter
+    def label(self, label):
+        self.code = label_code(label)
+
+    def copy(self):
+        return coded(self.start, self.end, self.code, self.text)
+
+    def to_dict(self):
+        d = {"start": self.start, "end": self.end, "label": LABEL_NAMES[self.code]}
+        if self.text is not None:
+            d["text"] = self.text
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["start"], d["end"], d["label"], d.get("text"))
+
+    def __eq__(self, other):
+        if not isinstance(other, Span):
+            return NotImplemented
+        return (self.start, self.end, self.code, self.text) == (other.start, other.end, other.code, other.text)
+
+    __hash__ = None  # mutable
+
+    def __repr__(self):
+        text = "" if self.text is None else f", {self.text!r}"
+        return f"Span({self.start}, {self.end}, {self.label!r}{text})"
+
+    def __reduce__(self):
+        # pickle the label, not the code: other processes may number labels differently
+        return Span, (self.start, self.end, self.label, self.text)
+
+
+_new = Span.__new__
+
+
+def coded(start, end, code, text=None):
+    """Span from a label code already in the table (skips the lookup)."""
+    s = _new(Span)
+    s.start = start
+    s.end = end
+    s.code = code
+    s.text = text
+    return s
+
+
+def from_dicts(dicts):
+    return [Span(d["start"], d["end"], d["label"], d.get("text")) for d in dicts]
+
+
+def to_dicts(spans):
+    return [s.to_dict() for s in spans]
+
+
+def json_default(obj):
+    """default= for json.dump / json.dumps: writes a Span as its dict."""
+    if isinstance(obj, Span):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# -------------------- ARRAYS --------------------
+def _dtype():
+    import numpy as np
+    return np.dtype([("start", "<i4"), ("end", "<i4"), ("code", "u1")])
+
+
+def to_array(spans):
+    """Structured array (start, end, code) of spans; texts are not kept and codes index
+    this process's LABEL_NAMES, so store the table next to an array kept on disk."""
+    import numpy as np
+    arr = np.empty(len(spans), dtype=_dtype())
+    arr["start"] = [s.start for s in spans]
+    arr["end"] = [s.end for s in spans]
+    arr["code"] = [s.code for s in spans]
+    return arr
+
+
+def from_array(arr):
+    return [coded(st, ed, code) for st, ed, code in zip(arr["start"].tolist(), arr["end"].tolist(),
+                                                           arr["code"].tolist())]
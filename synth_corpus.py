@@ -0,0 +1,330 @@
+# synth_corpus.py
+# Synthetic RTI applications for scaling runs, in the style of rtis/: English,
+# Hindi and Hinglish letters (optional PIO header, applicant block, request
+# paragraphs, signature) carrying PII of every gold label, with the gold spans
+# recorded as they are inserted. As in gold.json, spans refer to the normalized
+# text; the raw files carry noise textnorm removes (CRLF, BOM, curly quotes).
+# Document length is drawn per document from --chars (body paragraphs are added
+# until it is reached); documents are generated lazily, so 1M is fine.
+# Usage: python synth_corpus.py N [--out synth_rtis] [--gold synth_gold.json]
+#        [--langs en,hi,hinglish] [--chars 200-1200] [--seed 0]
+import sys
+import json
+import random
+import string
+import pathlib
+import argparse
+import unicodedata
+
+LANGS = ["en", "hi", "hinglish"]
+LABELS = ["PERSON", "ADDRESS", "PIN", "PHONE", "EMAIL", "AADHAAR", "PAN", "PASSPORT", "VOTER_ID", "DATE", "FILE"]
+
+# -------------------- POOLS --------------------
+FIRST_LATIN = """Ritika Ramesh Mahesh Asha Prabhu Rhea Sravani Karan Arnab Vidhi Irfan Deepak Anjali Suresh
+Pooja Vikram Neha Arjun Kavita Rahul Sunita Manoj Priya Sanjay Meena Farhan Gurpreet Lakshmi Joseph Divya""".split()
+LAST_LATIN = """Singh Patankar Iyer Thomas Sekar Bhatia Dutta Talwar Khan Nair Sharma Verma Gupta Reddy Patel
+Joshi Mehta Das Chauhan Pillai Menon Yadav Mishra Kulkarni Fernandes""".split()
+FIRST_DEV = "रितिका रमेश महेश आशा सुशीला मोहित अनूप राजेश पूजा विक्रम नेहा अर्जुन कविता राहुल सुनीता मनोज प्रिया संजय मीना".split()
+LAST_DEV = "सिंह वर्मा शर्मा गुप्ता यादव मिश्रा जोशी देवी पटेल चौहान".split()
+
+# (locality, city, first three digits of the PIN)
+PLACES_LATIN = [("Gomti Nagar", "Lucknow", "226"), ("Green Park Extn", "Delhi", "110"),
+                ("Anna Street", "Coimbatore", "641"), ("Shree Nivas Colony", "Nashik", "422"),
+                ("Powai", "Mumbai", "400"), ("Sainik Enclave", "Jaipur", "302"), ("MG Road", "Kochi", "682"),
+                ("Mangalagiri Road", "Vijayawada", "520"), ("Sector 2, Rohini", "Delhi", "110"),
+                ("New Vijay Nagar", "Ghaziabad", "201"), ("Salt Lake", "Kolkata", "700"),
+                ("Koramangala", "Bengaluru", "560"), ("Vill. Ratampur, P.O. Khairtal", "Alwar", "301")]
+PLACES_DEV = [("शास्त्री नगर", "जयपुर", "302"), ("गौतम नगर", "भोपाल", "462"), ("गोमती नगर", "लखनऊ", "226"),
+              ("अशोक विहार", "दिल्ली", "110"), ("सिविल लाइंस", "प्रयागराज", "211"), ("कंकड़बाग", "पटना", "800"),
+              ("ग्राम घनौली, तहसील पालमपुर", "कांगड़ा", "176")]
+HOUSE_LATIN = ["", "H.No. ", "Flat ", "C-", "B-", "No. "]
+HOUSE_DEV = ["मकान नं. ", "", "वार्ड "]
+MAIL_DOMAINS = ["gmail.com", "yahoo.co.in", "post.in", "fastmail.in", "company.org", "edu.in", "inbox.org"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+          "November", "December"]
+
+DEPTS = ["Department of Transport", "Municipal Corporation", "Public Works Department", "Department of Education",
+         "Food and Civil Supplies Department", "Urban Development Authority"]
+DEPTS_HI = ["परिवहन विभाग", "नगर निगम", "लोक निर्माण विभाग", "शिक्षा विभाग", "खाद्य एवं नागरिक आपूर्ति विभाग"]
+STATES = ["Uttar Pradesh", "Rajasthan", "Maharashtra", "Delhi", "Kerala", "West Bengal", "Bihar"]
+STATES_HI = ["उत्तर प्रदेश", "राजस्थान", "मध्य प्रदेश", "बिहार", "हिमाचल प्रदेश"]
+ITEMS = ["driving licences", "building permits", "ration cards", "water pipeline inspection reports",
+         "road repair contracts", "sewage cleaning logs", "scholarship disbursements", "NOC approvals"]
+ITEMS_HI = ["ड्राइविंग लाइसेंस", "भवन अनुमति पत्र", "राशन कार्ड", "सड़क मरम्मत अनुबंध", "छात्रवृत्ति भुगतान"]
+ITEMS_HINGLISH = ["safai karamchariyon ki attendance", "building NOC approvals", "ration card", "sadak marammat",
+                  "fogging schedule", "pension payment"]
+SCHEMES = ["Housing Grant Scheme 2021", "Mid-Day Meal Scheme", "Smart City Mission", "Jal Jeevan Mission"]
+
+# -------------------- TEMPLATES --------------------
+# {LABEL} fields become PII with a gold span; other fields are filler. PERSON,
+# ADDRESS, PHONE, ... keep one value per document, DATE and FILE are new each time.
+FIELD_KEYS = {
+    "en": {"PERSON": ["Applicant: ", "Applicant Name: ", "Name: "], "ADDRESS": ["Address: ", "R/o ", "Add: "],
+           "PHONE": ["Phone: ", "Mobile: ", "Mobile No: "], "EMAIL": ["Email: ", "Mail: "],
+           "AADHAAR": ["Aadhaar: ", "Aadhaar No: "], "PAN": ["PAN: ", "PAN No: "],
+           "PASSPORT": ["Passport: ", "Passport No: "], "VOTER_ID": ["Voter ID: ", "EPIC No: "]},
+    "hi": {"PERSON": ["आवेदक: ", "आवेदक का नाम: "], "ADDRESS": ["पता: "], "PHONE": ["मोबाइल: ", "फ़ोन: "],
+           "EMAIL": ["ईमेल: ", "Email: "], "AADHAAR": ["आधार संख्या: "], "PAN": ["पैन: ", "PAN: "],
+           "PASSPORT": ["पासपोर्ट संख्या: "], "VOTER_ID": ["मतदाता पहचान पत्र: "]},
+    "hinglish": {"PERSON": ["Avedak: ", "Naam: ", "Applicant: "], "ADDRESS": ["Pata: ", "Pata- ", "Address: "],
+                 "PHONE": ["Mobile: ", "Phone: "], "EMAIL": ["Email: "], "AADHAAR": ["Aadhar no: "],
+                 "PAN": ["PAN: "], "PASSPORT": ["Passport no: "], "VOTER_ID": ["Voter ID: "]},
+}
+# share of documents carrying each optional identifier line
+ID_RATES = {"EMAIL": 0.6, "AADHAAR": 0.35, "PAN": 0.3, "PASSPORT": 0.15, "VOTER_ID": 0.15}
+
+HEADERS = {
+    "en": "To,\nThe Public Information Officer,\n{dept},\n{state}.\n\n"
+          "Subject: Information under RTI Act, 2005 regarding {item}.\n\nSir/Madam,\n",
+    "hi": "सेवा में,\nलोक सूचना अधिकारी,\n{dept},\n{state}।\n\n"
+          "विषय: सूचना का अधिकार अधिनियम, 2005 के अंतर्गत {item} संबंधी सूचना।\n\nमहोदय/महोदया,\n",
+    "hinglish": "Seva mein,\nPublic Information Officer,\n{dept},\n{state}.\n\n"
+                "Vishay: RTI Act 2005 ke tahat {item} ki jankari.\n\nMahoday,\n",
+}
+PARAGRAPHS = {
+    "en": [
+        "Query: Please provide the number of {item} issued in {city} district between {month} and {month2} {year}.",
+        "Kindly furnish certified copies of the records of {item} for Ward-{ward} for the period {year}-{year2}.",
+        "With reference to my earlier application File No: {FILE} dated {DATE}, no reply has been received till date.",
+        "I had submitted a complaint on {DATE} (File No {FILE}) which is still pending. Please provide its "
+        "present status and the name of the officer handling it.",
+        "Also specify the average processing time and whether the department has any online grievance "
+        "redressal mechanism.",
+        'Please provide a list of beneficiaries under the "{scheme}" along with the amount sanctioned.',
+        "The application fee of Rs. 10 has been paid by postal order dated {DATE}.",
+    ],
+    "hi": [
+        "अनुरोध: कृपया {city} जिले में वर्ष {year} में जारी {item} की संख्या बताएं।",
+        "वार्ड {ward} में {item} से संबंधित सभी दस्तावेज़ों की प्रमाणित प्रतियाँ उपलब्ध कराएं।",
+        "मेरे पूर्व आवेदन File No: {FILE} दिनांक {DATE} का अभी तक कोई उत्तर प्राप्त नहीं हुआ है।",
+        "दिनांक {DATE} को दर्ज शिकायत की वर्तमान स्थिति की जानकारी दें।",
+        'कृपया "{scheme}" के अंतर्गत लाभार्थियों की सूची दी जाए।',
+        "आवेदन शुल्क 10 रुपये पोस्टल ऑर्डर द्वारा जमा किया गया है।",
+    ],
+    "hinglish": [
+        "Query: Mujhe ward {ward} mein {item} ki jankari chahiye.",
+        "Pichle {n} saal ke {item} ki list provide karein.",
+        "Maine File No: {FILE} ke through {DATE} ko application di thi, uska jawab abhi tak nahi aaya.",
+        "Kripya {DATE} se ab tak ke {item} ka pura vivaran dein.",
+        'Anurodh: "{scheme}" ke beneficiaries ki list bhi chahiye.',
+        "Yeh jankari RTI Act 2005 ke tahat maangi ja rahi hai.",
+    ],
+}
+SIGNATURES = {
+    "en": "\nYours faithfully,\n{PERSON}\nDate: {DATE}\n",
+    "hi": "\nभवदीय,\n{PERSON}\nदिनांक: {DATE}\n",
+    "hinglish": "\nDhanyavaad,\n{PERSON}\n",
+}
+PER_DOCUMENT = {"PERSON", "ADDRESS", "PHONE", "EMAIL", "AADHAAR", "PAN", "PASSPORT", "VOTER_ID"}
+
+
+# -------------------- PII VALUES --------------------
+def _digits(rng, k):
+    return "".join(rng.choice(string.digits) for _ in range(k))
+
+
+def _upper(rng, k):
+    return "".join(rng.choice(string.ascii_uppercase) for _ in range(k))
+
+
+def person(rng, lang):
+    if lang == "hi":
+        return f"{rng.choice(FIRST_DEV)} {rng.choice(LAST_DEV)}", []
+    return f"{rng.choice(FIRST_LATIN)} {rng.choice(LAST_LATIN)}", []
+
+
+def address(rng, lang):
+    """Address with its PIN, which also gets a span of its own (as in gold.json)."""
+    if lang == "hi" and rng.random() < 0.7:
+        locality, city, pin = rng.choice(PLACES_DEV)
+        head = f"{rng.choice(HOUSE_DEV)}{rng.randint(1, 120)}, {locality}, {city} "
+        head += rng.choice(["", "पिन "])
+    else:
+        locality, city, pin = rng.choice(PLACES_LATIN)
+        head = f"{rng.choice(HOUSE_LATIN)}{rng.randint(1, 999)}, {locality}, {city}{rng.choice([' ', ' - ', ' PIN- '])}"
+    pin += _digits(rng, 3)
+    return head + pin, [(len(head), len(head) + len(pin), "PIN")]
+
+
+def phone(rng, lang):
+    number = rng.choice("6789") + _digits(rng, 9)
+    return (rng.choice(["", "", "+91 ", "0"]) + number), []
+
+
+def email(rng, lang):
+    local = f"{rng.choice(FIRST_LATIN)}.{rng.choice(LAST_LATIN)}".lower()
+    return f"{local}{rng.choice(['', str(rng.randint(1, 99))])}@{rng.choice(MAIL_DOMAINS)}", []
+
+
+def aadhaar(rng, lang):
+    d = rng.choice("23456789") + _digits(rng, 11)
+    return (f"{d[:4]} {d[4:8]} {d[8:]}" if rng.random() < 0.7 else d), []
+
+
+def pan(rng, lang):
+    return f"{_upper(rng, 3)}P{_upper(rng, 1)}{_digits(rng, 4)}{_upper(rng, 1)}", []
+
+
+def passport(rng, lang):
+    return f"{_upper(rng, 1)}{_digits(rng, 7)}", []
+
+
+def voter_id(rng, lang):
+    return f"{_upper(rng, 3)}{_digits(rng, 7)}", []
+
+
+def date(rng, lang):
+    day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(2015, 2024)
+    if lang == "en" and rng.random() < 0.3:
+        return f"{day} {MONTHS[month - 1]} {year}", []
+    sep = rng.choice("/-")
+    return f"{day:02d}{sep}{month:02d}{sep}{year}", []
+
+
+def file_no(rng, lang):
+    return f"RTI/{rng.choice(['', 'ENV/', 'PWD/', 'EDU/'])}{rng.randint(2015, 2024)}/{rng.randint(1, 999)}", []
+
+
+PII = {"PERSON": person, "ADDRESS": address, "PHONE": phone, "EMAIL": email, "AADHAAR": aadhaar, "PAN": pan,
+       "PASSPORT": passport, "VOTER_ID": voter_id, "DATE": date, "FILE": file_no}
+
+
+# -------------------- DOCUMENTS --------------------
+_FORMATTER = string.Formatter()
+
+
+class SynthDoc:
+    """Normalized text built piece by piece, with gold spans of the PII inserted."""
+
+    def __init__(self, rng, lang):
+        self.rng, self.lang = rng, lang
+        self.parts, self.length, self.spans, self.values = [], 0, [], {}
+
+    def _append(self, s):
+        if not s.isascii():
+            s = unicodedata.normalize("NFKC", s)
+        self.parts.append(s)
+        self.length += len(s)
+        return s
+
+    def add(self, template, **filler):
+        for literal, field, _, _ in _FORMATTER.parse(template):
+            self._append(literal)
+            if field is None:
+                continue
+            if field not in PII:
+                self._append(str(filler[field]))
+                continue
+            if field in PER_DOCUMENT and field in self.values:
+                value, inner = self.values[field]
+            else:
+                value, inner = PII[field](self.rng, self.lang)
+                self.values[field] = value, inner
+            start = self.length
+            value = self._append(value)
+            self.spans.append({"start": start, "end": self.length, "label": field})
+            self.spans.extend({"start": start + a, "end": start + b, "label": label} for a, b, label in inner)
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+
+def _filler(rng, lang):
+    if lang == "hi":
+        items, city = ITEMS_HI, rng.choice(PLACES_DEV)[1]
+        dept, state = rng.choice(DEPTS_HI), rng.choice(STATES_HI)
+    else:
+        items, city = ITEMS if lang == "en" else ITEMS_HINGLISH, rng.choice(PLACES_LATIN)[1]
+        dept, state = rng.choice(DEPTS), rng.choice(STATES)
+    month = rng.randrange(11)
+    year = rng.randint(2015, 2023)
+    return {"item": rng.choice(items), "city": city, "dept": dept, "state": state, "ward": rng.randint(1, 99),
+            "month": MONTHS[month], "month2": MONTHS[rng.randint(month + 1, 11)], "year": year, "year2": year + 1,
+            "n": rng.choice(["do", "teen", "paanch"]), "scheme": rng.choice(SCHEMES)}
+
+
+def make_document(rng, lang, target_chars):
+    """(normalized text, gold spans) of one synthetic RTI application."""
+    doc = SynthDoc(rng, lang)
+    keys = FIELD_KEYS[lang]
+    filler = _filler(rng, lang)  # one department / city / item per letter
+    if rng.random() < 0.5:
+        doc.add(HEADERS[lang], **filler)
+        doc.add("\n")
+    lines = ["PERSON", "ADDRESS"] + ["PHONE"] * (rng.random() < 0.9)
+    lines += [label for label, rate in ID_RATES.items() if rng.random() < rate]
+    for label in lines:
+        doc.add(rng.choice(keys[label]) + "{" + label + "}" + rng.choice(["", "  "]) + "\n")
+    doc.add("\n")
+    # paragraphs in a random order, repeating only once all were used
+    paragraphs = rng.sample(PARAGRAPHS[lang], len(PARAGRAPHS[lang]))
+    for k in range(sys.maxsize):
+        doc.add(paragraphs[k % len(paragraphs)] + "\n", **filler)
+        if doc.length >= target_chars:
+            break
+        doc.add(rng.choice(["", "\n"]))
+    if rng.random() < 0.6:
+        doc.add(SIGNATURES[lang])
+    return doc.text, doc.spans
+
+
+def raw_text(text, rng):
+    """The file as it would arrive: noise that normalize_text() maps back to `text`."""
+    if '"' in text and rng.random() < 0.3:
+        pieces = text.split('"')
+        text = "".join(p + ("“", "”")[k % 2] for k, p in enumerate(pieces[:-1])) + pieces[-1]
+    if rng.random() < 0.3:
+        text = text.replace("\n", "\r\n")
+    if rng.random() < 0.1:
+        text = "\ufeff" + text
+    return text
+
+
+def parse_range(s):
+    """"200-1200" -> (200, 1200); "800" -> (800, 800)."""
+    lo, _, hi = s.partition("-")
+    return int(lo), int(hi or lo)
+
+
+def generate(n, langs=LANGS, chars=(200, 1200), seed=0, start=0):
+    """Yields n dicts {"name", "lang", "raw", "text", "spans"}; the same seed gives the same corpus."""
+    rng = random.Random(seed)
+    for i in range(start, start + n):
+        lang = rng.choice(langs)
+        text, spans = make_document(rng, lang, rng.randint(*chars))
+        yield {"name": f"synth{i:07d}.txt", "lang": lang, "raw": raw_text(text, rng), "text": text, "spans": spans}
+
+
+def write_corpus(docs, out, gold_path):
+    """Raw files into out/, gold spans (normalized offsets) into gold_path; returns the count."""
+    out = pathlib.Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(gold_path, "w", encoding="utf-8") as gold:
+        # one entry per line, written as we go: 1M documents never sit in memory
+        gold.write("{")
+        for doc in docs:
+            (out / doc["name"]).write_bytes(doc["raw"].encode("utf-8"))
+            gold.write(("\n" if count == 0 else ",\n") + json.dumps(doc["name"]) + ": "
+                       + json.dumps(doc["spans"], ensure_ascii=False))
+            count += 1
+        gold.write("\n}\n")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic RTI corpus with gold spans.")
+    parser.add_argument("n", type=int, help="number of documents (1k .. 1M)")
+    parser.add_argument("--out", default="synth_rtis", help="directory for the .txt files")
+    parser.add_argument("--gold", default="synth_gold.json", help="gold spans, same format as gold.json")
+    parser.add_argument("--langs", default=",".join(LANGS), help="comma-separated subset of " + ",".join(LANGS))
+    parser.add_argument("--chars", default="200-1200", help="document length range in characters (min-max)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    langs = args.langs.split(",")
+    unknown = set(langs) - set(LANGS)
+    if unknown:
+        sys.exit(f"unknown language(s): {', '.join(sorted(unknown))}")
+    n = write_corpus(generate(args.n, langs, parse_range(args.chars), args.seed), args.out, args.gold)
+    print(f"{n} documents written to {args.out}/, gold spans to {args.gold}")
@@ -0,0 +1,43 @@
+# tests/conftest.py
+# The pipeline modules are flat top-level scripts: make them importable from tests/.
+import sys
+import pathlib
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope="session")
+def tiny_xlmr(tmp_path_factory):
+    """
+    Folder with a small randomly initialized XLM-R token classifier (the labels of
+    xlm_rti_ner_final_more/, 2 layers) and a unigram tokenizer trained on synthetic
+    RTI text, so nothing is downloaded. Its tags are noise, which is what the
+    decoding / backend parity tests want: many short spans of every label.
+    """
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    from tokenizers import Tokenizer, models, pre_tokenizers, decoders, processors, trainers
+
+    import synth_corpus
+
+    out = tmp_path_factory.mktemp("tiny_xlmr")
+    specials = ["<s>", "<pad>", "</s>", "<unk>"]  # XLM-R ids 0..3
+    tok = Tokenizer(models.Unigram())
+    tok.pre_tokenizer = pre_tokenizers.Metaspace()
+    tok.decoder = decoders.Metaspace()
+    tok.train_from_iterator((d["text"] for d in synth_corpus.generate(300)),
+                            trainers.UnigramTrainer(vocab_size=800, special_tokens=specials, unk_token="<unk>"))
+    tok.post_processor = processors.TemplateProcessing(single="<s> $A </s>", special_tokens=[("<s>", 0), ("</s>", 2)])
+    tokenizer = transformers.PreTrainedTokenizerFast(tokenizer_object=tok, bos_token="<s>", eos_token="</s>",
+                                                     pad_token="<pad>", unk_token="<unk>", model_max_length=512)
+    tokenizer.save_pretrained(out)
+
+    config = transformers.AutoConfig.from_pretrained(ROOT / "xlm_rti_ner_final_more")
+    config.update({"num_hidden_layers": 2, "hidden_size": 64, "num_attention_heads": 4,
+                   "intermediate_size": 128, "vocab_size": tok.get_vocab_size()})
+    torch.manual_seed(0)
+    transformers.XLMRobertaForTokenClassification(config).save_pretrained(out)
+    return out
@@ -0,0 +1,58 @@
+# tests/test_eval_langs.py
+# Per-language evaluation: the {"lang", "script"} that redact_demo_updated.py
+# writes to preds_lang.json is read back by eval_script and splits the counts.
+import json
+
+import pytest
+
+import eval_script
+import pred_store
+from langid import identify
+
+TEXTS = {
+    "en.txt": "I request the information under the RTI Act. My name is Ravi Kumar.",
+    "hi.txt": "मैं सूचना का अधिकार अधिनियम के तहत जानकारी चाहता हूँ। मेरा नाम रवि कुमार है।",
+}
+GOLD = {
+    "en.txt": [{"start": 58, "end": 68, "label": "PERSON"}],
+    "hi.txt": [{"start": 60, "end": 69, "label": "PERSON"}],
+    "other.txt": [{"start": 0, "end": 4, "label": "DATE"}],
+}
+PREDS = {
+    "en.txt": [{"start": 58, "end": 68, "label": "PERSON"}, {"start": 0, "end": 1, "label": "PHONE"}],
+    "hi.txt": [],
+    "other.txt": [{"start": 0, "end": 4, "label": "DATE"}],
+}
+
+
+@pytest.fixture
+def files(tmp_path):
+    langs = {name: identify(text) for name, text in TEXTS.items()}  # as redact_demo_updated.py stores them
+    (tmp_path / "preds_lang.json").write_text(json.dumps(langs, ensure_ascii=False, indent=2), encoding="utf-8")
+    for name, preds in (("gold", GOLD), ("preds", PREDS)):
+        (tmp_path / f"{name}.json").write_text(json.dumps(preds, indent=2), encoding="utf-8")
+    return tmp_path
+
+
+def test_sidecar_fields(files):
+    langs = eval_script.load_json(files / "preds_lang.json")
+    assert langs["en.txt"] == {"lang": "en", "script": "latin"}
+    assert langs["hi.txt"] == {"lang": "hi", "script": "devanagari"}
+
+
+@pytest.mark.parametrize("ext", [".json", pred_store.EXT, pred_store.JSONL_EXT])
+def test_counts_by_lang(files, ext):
+    gold, preds = files / "gold.json", files / "preds.json"
+    if ext != ".json":
+        for path in (gold, preds):
+            pred_store.convert(path, path.with_suffix(ext))
+        gold, preds = gold.with_suffix(ext), preds.with_suffix(ext)
+    by_lang = eval_script.match_files_by_lang(gold, preds, eval_script.load_json(files / "preds_lang.json"))
+    assert by_lang == {
+        "en": {"docs": 1, "tp": 1, "fp": 1, "fn": 0},
+        "hi": {"docs": 1, "tp": 0, "fp": 0, "fn": 1},
+        "unknown": {"docs": 1, "tp": 1, "fp": 0, "fn": 0},
+    }
+    # the languages partition the overall counts
+    _, totals = eval_script.match_files(gold, preds)
+    assert totals == tuple(sum(r[k] for r in by_lang.values()) for k in ("tp", "fp", "fn"))
@@ -0,0 +1,62 @@
+# tests/test_hf_batch.py
+# How XLM-R tags become spans: hf_spans (one document) and hf_spans_batch (a corpus, as main()
+# and redact_server.py call it) run the same batched engine and give the same
+# spans, and the engine groups tags the way the HF pipeline's "simple"
+# aggregation does. Uses the tiny random model from conftest.py.
+import pytest
+
+import synth_corpus
+
+TEXTS = [
+    "Applicant: Ramesh Iyer\nAddress: 12 MG Road,\nBengaluru 560001\nPhone: 9488801122",
+    "",
+    "   \n",
+    "राहुल वर्मा, फोन 9876543210, email rahul@example.com, Address: 12 MG Road",
+] + [d["text"] for d in synth_corpus.generate(20, seed=3)]
+
+
+def as_tuples(spans):
+    return [(s.start, s.end, s.label) for s in spans]
+
+
+@pytest.fixture
+def redact(tiny_xlmr, monkeypatch):
+    import redact_demo_updated as R
+    monkeypatch.setattr(R, "HF_MODEL_DIR", tiny_xlmr)
+    monkeypatch.setattr(R, "HF_TOKENIZER", str(tiny_xlmr))
+    monkeypatch.setattr(R, "HF_BACKEND", "torch")
+    monkeypatch.setattr(R, "HF_BATCH_SIZE", 4)
+    monkeypatch.setattr(R.DETECTORS, "_loaded", {})  # load the engine from tiny_xlmr
+    return R
+
+
+def test_single_and_corpus_paths_agree(redact):
+    long_doc = "\n".join(TEXTS[4:])
+    texts = TEXTS + [long_doc]
+    engine = redact.DETECTORS.get("hf_engine")
+    assert next(engine.model.parameters()).device.type == "cpu"
+    assert len(engine.tokenizer(long_doc)["input_ids"]) > engine.max_length  # overflows into several rows
+
+    batched = [as_tuples(spans) for spans in redact.hf_spans_batch(texts)]
+    assert [as_tuples(redact.hf_spans(text)) for text in texts] == batched
+    assert batched[-1] and not batched[1] and not batched[2]
+
+
+def test_engine_groups_like_pipeline_simple(tiny_xlmr):
+    from transformers import AutoModelForTokenClassification, AutoTokenizer, pipeline
+
+    from hf_batch import BatchedTokenClassifier
+
+    model = AutoModelForTokenClassification.from_pretrained(tiny_xlmr)
+    tokenizer = AutoTokenizer.from_pretrained(tiny_xlmr)
+    ner = pipeline("token-classification", model=model, tokenizer=tokenizer, aggregation_strategy="simple",
+                   device=-1)
+    # the pipeline truncates at max_length, the engine overflows into more rows
+    texts = [text for text in TEXTS if text.strip() and len(tokenizer(text)["input_ids"]) <= 512]
+    assert len(texts) > 10
+    got = BatchedTokenClassifier(model, tokenizer, batch_size=4).predict(texts)
+    multiline = 0
+    for text, spans in zip(texts, got):
+        assert as_tuples(spans) == [(e["start"], e["end"], e["entity_group"]) for e in ner(text)]
+        multiline += sum("\n" in text[s.start:s.end] for s in spans)
+    assert multiline  # entities do run across line breaks
@@ -0,0 +1,45 @@
+# tests/test_onnx_backend.py
+# The ONNX Runtime export of the tiny random model (conftest.py) against eager
+# PyTorch, all through the batched engine: fp32 gives exactly the PyTorch spans,
+# dynamic int8 stays within a span-F1 tolerance of them.
+import pytest
+
+import eval_script
+import synth_corpus
+from hf_batch import BatchedTokenClassifier
+
+INT8_MIN_F1 = 0.9  # span F1 of int8 with the PyTorch spans as gold
+
+TEXTS = ["Applicant: Ramesh Iyer\nAddress: 12 MG Road, Bengaluru 560001",
+         "राहुल वर्मा, फोन 9876543210, email rahul@example.com"] + [d["text"] for d in synth_corpus.generate(30, seed=7)]
+
+
+@pytest.fixture(scope="module")
+def backends(tiny_xlmr, tmp_path_factory):
+    pytest.importorskip("onnxruntime")
+    from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+    import onnx_backend
+
+    out = tmp_path_factory.mktemp("tiny_onnx")
+    onnx_backend.export(tiny_xlmr, out, int8=True, tokenizer=str(tiny_xlmr))
+    torch_model = AutoModelForTokenClassification.from_pretrained(tiny_xlmr)
+    return {"torch": (torch_model, AutoTokenizer.from_pretrained(tiny_xlmr)),
+            **{name: onnx_backend.load(name, out) for name in onnx_backend.BACKENDS}}
+
+
+def predict(backends, name):
+    return BatchedTokenClassifier(*backends[name], batch_size=4).predict(TEXTS)
+
+
+def test_fp32_spans_equal_torch(backends):
+    want = predict(backends, "torch")
+    assert any(want)
+    assert predict(backends, "onnx") == want
+
+
+def test_int8_spans_within_tolerance(backends):
+    names = [str(i) for i in range(len(TEXTS))]
+    gold = dict(zip(names, predict(backends, "torch")))
+    _, (tp, fp, fn) = eval_script.match_counts(gold, dict(zip(names, predict(backends, "onnx-int8"))))
+    assert eval_script.metrics(tp, fp, fn)[2] >= INT8_MIN_F1
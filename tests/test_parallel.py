@@ -0,0 +1,18 @@
+# tests/test_parallel.py
+# run_parallel's workers get their OMP / MKL thread counts from the environment
+# they are spawned with (numpy is imported before any initializer runs), and the
+# parent's environment is left as it was.
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import redact_demo_updated as R
+
+
+def test_workers_start_with_thread_env(monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "7")
+    monkeypatch.delenv("MKL_NUM_THREADS", raising=False)
+    with R._thread_env(3), ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        seen = list(pool.map(os.getenv, R.THREAD_ENV))
+    assert seen == ["3"] * len(R.THREAD_ENV)
+    assert os.environ["OMP_NUM_THREADS"] == "7" and "MKL_NUM_THREADS" not in os.environ
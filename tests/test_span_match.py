@@ -0,0 +1,95 @@
+# tests/test_span_match.py
+# span_match (sort-merge sweep) against the nested loops it replaced in
+# eval_script.evaluate and plots.compute_metrics_and_confusion: identical
+# per-label tp / fp / fn and confusion matrix on gold.json vs every preds file
+# and on random corpora (unsorted, nested, touching, zero-length and reversed
+# spans, many labels). bench_span_match.py times the two.
+import random
+import pathlib
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+import eval_script
+import plots
+from span_types import from_dicts
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+RANDOM_FILES = 3000
+
+
+# -------------------- previous implementations --------------------
+def legacy_eval_counts(gold, preds):
+    results = defaultdict(lambda: {"tp": 0, "fp": 0, "fn": 0})
+    for fname, g_spans in gold.items():
+        p_spans = preds.get(fname, [])
+        matched_pred = set()
+        for g in g_spans:
+            found = False
+            for i, p in enumerate(p_spans):
+                if i in matched_pred:
+                    continue
+                if g["label"] == p["label"] and eval_script.span_overlap((g["start"], g["end"]), (p["start"], p["end"])):
+                    results[g["label"]]["tp"] += 1
+                    matched_pred.add(i)
+                    found = True
+                    break
+            if not found:
+                results[g["label"]]["fn"] += 1
+        for i, p in enumerate(p_spans):
+            if i not in matched_pred:
+                results[p["label"]]["fp"] += 1
+    return dict(results)
+
+
+def legacy_confusion(gold, preds, labels):
+    label_to_idx = {l: i for i, l in enumerate(labels)}
+    cm = np.zeros((len(labels), len(labels)), dtype=int)
+    for fname, gspans in gold.items():
+        pspans = preds.get(fname, [])
+        for g in gspans:
+            for p in pspans:
+                if p["label"] == g["label"] and plots.overlap((g["start"], g["end"]), (p["start"], p["end"])):
+                    cm[label_to_idx[g["label"]], label_to_idx[g["label"]]] += 1
+    return cm
+
+
+# -------------------- inputs --------------------
+def random_corpus(rng, n_files, labels, max_spans=12, width=60):
+    gold, preds = {}, {}
+    for f in range(n_files):
+        def spans(k):
+            out = []
+            for _ in range(k):
+                st = rng.randint(0, width)
+                ed = st + rng.choice([0, 1, 2, 5, 10, 20, -3])  # zero-length and reversed too
+                out.append({"start": st, "end": ed, "label": rng.choice(labels)})
+            return out
+        gold[f"f{f}.txt"] = spans(rng.randint(0, max_spans))
+        if rng.random() < 0.9:
+            preds[f"f{f}.txt"] = spans(rng.randint(0, max_spans))
+    preds["only_in_preds.txt"] = [{"start": 0, "end": 5, "label": labels[0]}]
+    return gold, preds
+
+
+def as_spans(corpus):
+    return {fname: from_dicts(spans) for fname, spans in corpus.items()}
+
+
+def check(gold, preds):
+    got, _ = eval_script.match_counts(as_spans(gold), as_spans(preds))
+    assert dict(got) == legacy_eval_counts(gold, preds), "eval counts differ"
+    labels, _, cm = plots.compute_metrics_and_confusion(as_spans(gold), as_spans(preds))
+    assert (cm == legacy_confusion(gold, preds, labels)).all(), "confusion matrix differs"
+
+
+# -------------------- properties --------------------
+@pytest.mark.parametrize("preds_file", sorted(p.name for p in ROOT.glob("preds*.json")))
+def test_repo_preds(preds_file):
+    check(eval_script.load_json(ROOT / "gold.json"), eval_script.load_json(ROOT / preds_file))
+
+
+@pytest.mark.parametrize("labels", [["A"], ["A", "B"], ["A", "B", "C", "D", "E"]])
+def test_random_corpora(labels):
+    check(*random_corpus(random.Random(len(labels)), RANDOM_FILES, labels))
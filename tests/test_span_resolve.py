@@ -0,0 +1,145 @@
+# tests/test_span_resolve.py
+# span_resolve against the pairwise loops it replaced in combine_and_dedupe() and
+# clean_preds.py (contained-span and overlap passes), on random span sets: same
+# spans, same order. bench_span_resolve.py times the two.
+import random
+
+from span_resolve import LABEL_PRIORITY, dedupe_levels, dedupe_spans, drop_contained, resolve_overlaps
+from span_types import from_dicts, to_dicts
+
+LABELS = list(LABEL_PRIORITY) + ["O", "UNKNOWN"]
+CASES = 2000
+
+
+# -------------------- previous implementations --------------------
+def dedupe_loop(spans, text_len):
+    good = []
+    for s in spans:
+        st, ed = s.get("start"), s.get("end")
+        label = s.get("label", "O")
+        if not (isinstance(st,int) and isinstance(ed,int) and 0 <= st < ed <= text_len):
+            continue
+        good.append({"start": st, "end": ed, "label": label})
+    good = sorted(good, key=lambda x: (x["start"], -(x["end"]-x["start"])))
+    unique = []
+    for s in good:
+        st, ed, lab = s["start"], s["end"], s["label"]
+        overlap = False
+        for u in unique:
+            if not (ed <= u["start"] or st >= u["end"]):
+                if lab == u["label"] and (abs(st - u["start"]) < 3 or abs(ed - u["end"]) < 3):
+                    overlap = True
+                    break
+                if (u["end"]-u["start"]) >= (ed-st):
+                    overlap = True
+                    break
+        if not overlap:
+            unique.append(s)
+    return unique
+
+
+def contained_loop(merged):
+    final = []
+    for s in merged:
+        contained = False
+        for t in merged:
+            if t is s: continue
+            if t["start"] <= s["start"] and t["end"] >= s["end"]:
+                if LABEL_PRIORITY.get(t["label"],0) >= LABEL_PRIORITY.get(s["label"],0):
+                    contained = True
+                    break
+        if not contained:
+            final.append(s)
+    return final
+
+
+def overlaps(a,b):
+    return not (a[1] <= b[0] or b[1] <= a[0])
+
+
+def overlap_loop(filtered, ntext):
+    filtered = sorted(filtered, key=lambda x: (x["start"], - (x["end"]-x["start"])))
+    nonover = []
+    for s in filtered:
+        conflict = None
+        for i,u in enumerate(nonover):
+            if overlaps((s["start"], s["end"]), (u["start"], u["end"])):
+                conflict = (i,u); break
+        if not conflict:
+            nonover.append(s)
+            continue
+        i,u = conflict
+        p_s = LABEL_PRIORITY.get(s["label"],0)
+        p_u = LABEL_PRIORITY.get(u["label"],0)
+        if p_s > p_u:
+            nonover[i] = s
+        elif p_s < p_u:
+            if s["end"] <= u["end"] and s["start"] >= u["start"]:
+                pass
+            else:
+                if s["start"] < u["start"]:
+                    s2 = s.copy()
+                    s2["end"] = u["start"]
+                    s2["text"] = ntext[s2["start"]:s2["end"]].strip()
+                    nonover.append(s2)
+                elif s["end"] > u["end"]:
+                    s2 = s.copy()
+                    s2["start"] = u["end"]
+                    s2["text"] = ntext[s2["start"]:s2["end"]].strip()
+                    nonover.append(s2)
+        else:
+            len_s = s["end"]-s["start"]
+            len_u = u["end"]-u["start"]
+            if len_s > len_u:
+                nonover[i] = s
+    return nonover
+
+
+# -------------------- inputs --------------------
+def random_spans(rng, n, text_len, max_len):
+    out = []
+    for _ in range(n):
+        st = rng.randrange(-2, text_len)
+        ed = st + rng.randrange(0, max_len)
+        out.append({"start": st, "end": ed, "label": rng.choice(LABELS), "text": f"t{st}"})
+    return out
+
+
+def random_cases(seed, cases=CASES):
+    """(text, spans) with out-of-range, empty, nested and overlapping spans."""
+    rng = random.Random(seed)
+    for _ in range(cases):
+        text_len = rng.choice([20, 60, 300])
+        text = "".join(rng.choice("ab \n") for _ in range(text_len))
+        yield rng, text, random_spans(rng, rng.randrange(0, 40), text_len, rng.choice([3, 10, 40]))
+
+
+def valid(spans, text_len):
+    return [s for s in spans if 0 <= s["start"] < s["end"] <= text_len]
+
+
+# -------------------- properties --------------------
+def test_dedupe_spans():
+    for _, text, spans in random_cases(1):
+        assert to_dicts(dedupe_spans(from_dicts(spans), len(text))) == dedupe_loop(spans, len(text)), spans
+
+
+def test_dedupe_levels():
+    for rng, text, spans in random_cases(2):
+        n, text_len = len(spans), len(text)
+        cuts = sorted(rng.randrange(0, n + 1) for _ in range(2))
+        incs = [spans[:cuts[0]], spans[cuts[0]:cuts[1]], spans[cuts[1]:]]
+        levels = [dedupe_loop(incs[0], text_len), dedupe_loop(incs[0] + incs[1], text_len), dedupe_loop(spans, text_len)]
+        assert [to_dicts(lv) for lv in dedupe_levels([from_dicts(inc) for inc in incs], text_len)] == levels, incs
+
+
+def test_drop_contained():
+    for _, text, spans in random_cases(3):
+        spans = valid(spans, len(text))
+        assert to_dicts(drop_contained(from_dicts(spans))) == contained_loop(spans), spans
+
+
+def test_resolve_overlaps():
+    for _, text, spans in random_cases(4):
+        spans = valid(spans, len(text))
+        assert to_dicts(resolve_overlaps(from_dicts(spans), text)) == overlap_loop(spans, text), spans
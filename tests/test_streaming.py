@@ -0,0 +1,29 @@
+# tests/test_streaming.py
+# redact_file_streaming at the light level (regex + line rules): the same spans and
+# the same redacted file as redact_text_levels on the whole normalized document,
+# with windows small enough that many rule matches sit on or near a window edge.
+import pytest
+
+import redact_demo_updated as R
+import synth_corpus
+from textnorm import normalize_text
+
+
+def as_tuples(spans):
+    return [(s.start, s.end, s.label) for s in spans]
+
+
+@pytest.mark.parametrize("window,overlap", [(1_500, 200), (4_000, 300), (10 ** 6, 2_000)])
+def test_streamed_light_matches_whole_document(tmp_path, window, overlap):
+    docs = [d["text"] for d in synth_corpus.generate(80, seed=5)]
+    raw = "\r\n".join(docs) + "\nApplicant: Ravi Kumar\nPIN 560001, ph 9876543210"
+    path = tmp_path / "big.txt"
+    path.write_text(raw, encoding="utf-8", newline="")
+    outdir = tmp_path / "out"
+    outdir.mkdir()
+
+    preds, found, _ = R.redact_file_streaming(path, outdir, window=window, overlap=overlap, level="light")
+    redacted, want = R.redact_text_levels(normalize_text(raw), level="light")
+    assert want and as_tuples(preds) == as_tuples(want)
+    assert found == {sp.label for sp in R.rule_spans(normalize_text(raw))}
+    assert (outdir / "big_light.txt").read_text(encoding="utf-8") == redacted["light"]
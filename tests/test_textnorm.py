@@ -0,0 +1,29 @@
+# tests/test_textnorm.py
+# The shared normalizer: zero-width characters are deleted before runs of spaces
+# collapse, so spaces that only a zero-width character kept apart become one
+# (fix_preds.py's old inline steps, collapse first, left two). normalize_with_map
+# gives the same text, with an offset for every normalized character.
+import pytest
+
+from textnorm import COLLAPSE_SPACES, DEFAULT, FIX_PREDS
+
+CASES = [
+    ("a \u200b b", "a b"),
+    ("x\u200bz\ufeff  y", "xz y"),
+    ("a\u200e \u200f\u200d \tb\r\nc", "a b\nc"),
+    ("Name: \u200c Ravi  Kumar", "Name: Ravi Kumar"),
+]
+
+
+@pytest.mark.parametrize("raw,want", CASES)
+def test_fix_preds_deletes_zero_width_before_collapsing(raw, want):
+    assert FIX_PREDS.normalize(raw) == want
+    text, offsets = FIX_PREDS.normalize_with_map(raw)
+    assert text == want
+    assert len(offsets) == len(text) + 1 and offsets[-1] == len(raw)
+
+
+def test_other_normalizers_keep_u200b():
+    # only FIX_PREDS deletes U+200B, so its spaces stay apart elsewhere
+    assert COLLAPSE_SPACES.normalize("a \u200b b") == "a \u200b b"
+    assert DEFAULT.normalize("a \u200b  b") == "a \u200b  b"
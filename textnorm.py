@@ -0,0 +1,231 @@
+# textnorm.py
+# The text normalizer of the whole pipeline: NFKC, one character-table pass
+# (zero-width characters, typographic quotes / dashes), line endings and optionally
+# runs of spaces. normalize_with_map() also returns the raw offset of every
+# normalized offset as an array('I'), so spans found on normalized text can be
+# projected back onto the original file (project_spans).
+import re
+import unicodedata
+from array import array
+from bisect import bisect_right
+
+from span_types import coded
+
+ZERO_WIDTH = "\u200c\u200d\ufeff"
+ZERO_WIDTH_ALL = "\u200b\u200c\u200d\u200e\u200f\ufeff"
+PUNCT = {"“": '"', "”": '"', "‘": "'", "’": "'", "—": "-", "–": "-"}
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]+")
+_SPACE_RUN = re.compile(" {2,}")
+
+
+class Normalizer:
+    """
+    delete          - characters removed
+    replace         - one-to-one character replacements
+    newlines        - "\r\n?" (CRLF and lone CR -> "\n"), "\r\n" (CRLF only) or None
+    collapse_spaces - runs of spaces / tabs / NBSP become one space
+
+    Steps, in order: NFKC, the character table, line endings, space runs.
+    """
+
+    def __init__(self, delete=ZERO_WIDTH, replace=PUNCT, newlines=r"\r\n?", collapse_spaces=False):
+        table = {**dict.fromkeys(delete), **replace}
+        if collapse_spaces:
+            table.update({"\t": " ", "\u00A0": " "})
+        self.table = str.maketrans(table)
+        self.char_edits = [(c, r or "") for c, r in table.items()]
+        chars = "".join(table)
+        self.edit_char = re.compile("[" + re.escape(chars) + "]") if chars else None
+        self.fold_cr = newlines == r"\r\n?"
+        self.newlines = re.compile(newlines) if newlines else None
+        self.collapse_spaces = collapse_spaces
+
+    def normalize(self, s):
+        s = unicodedata.normalize("NFKC", s)
+        # str.translate does a dict lookup per char, which on mostly Devanagari
+        # text costs ~70x more than checking which of the few mapped chars occur
+        # at all (usually none); only those are replaced
+        for c, r in self.char_edits:
+            if c in s:
+                s = s.replace(c, r)
+        if self.newlines is not None and "\r" in s:
+            s = s.replace("\r\n", "\n")
+            if self.fold_cr:
+                s = s.replace("\r", "\n")
+        if self.collapse_spaces:
+            # tabs / NBSP are spaces by now; each pass halves the longest run
+            while "  " in s:
+                s = s.replace("  ", " ")
+        return s
+
+    def normalize_with_map(self, s):
+        """
+        (normalized text, offsets): offsets[i] is the raw offset of normalized
+        char i and offsets[len(text)] == len(s), so normalized span [a, b) covers
+        raw s[offsets[a]:offsets[b]].
+        """
+        text, runs = _nfkc_runs(s)
+        steps = [(self.edit_char, lambda m: m.group().translate(self.table)),
+                 (self.newlines, lambda m: "\n"),
+                 (_SPACE_RUN if self.collapse_spaces else None, lambda m: " ")]
+        for pattern, repl in steps:
+            if pattern is None:
+                continue
+            step = _edit_runs(text, pattern, repl)
+            if step != _identity(len(text)):  # 1:1 replacements keep offsets
+                runs = _compose(runs, step)
+            text = pattern.sub(repl, text)
+        offsets = array("I")
+        for _, raw, length in runs:
+            offsets.extend(range(raw, raw + length))
+        offsets.append(len(s))
+        return text, offsets
+
+
+def project_spans(spans, offsets):
+    """
+    Copies of Spans with start / end moved from normalized to raw offsets
+    (offsets from normalize_with_map). Spans outside the normalized text are dropped.
+    """
+    n = len(offsets) - 1
+    out = []
+    for sp in spans:
+        st, ed = int(sp.start), int(sp.end)
+        if 0 <= st < ed <= n:
+            out.append(coded(offsets[st], offsets[ed], sp.code, sp.text))
+    return out
+
+
+# -------------------- OFFSET RUNS --------------------
+# A map is a list of runs (out_start, in_start, length): out[out_start + k] comes
+# from in[in_start + k]. Edits are rare, so maps stay short until materialized.
+def _identity(n):
+    return [(0, 0, n)] if n else []
+
+
+def _edit_runs(text, pattern, repl):
+    """Runs of pattern.sub(repl, text) -> text; each replacement char maps to its match start."""
+    runs, out, pos = [], 0, 0
+    for m in pattern.finditer(text):
+        if m.start() > pos:
+            runs.append((out, pos, m.start() - pos))
+            out += m.start() - pos
+        r = repl(m)
+        if r:
+            runs.extend(_spread(out, m.start(), len(r), 1))
+            out += len(r)
+        pos = m.end()
+    if pos < len(text):
+        runs.append((out, pos, len(text) - pos))
+    return [r for r in runs if r[2]]
+
+
+def _compose(outer, inner):
+    """Map through inner (out -> mid) then outer (mid -> raw)."""
+    if len(outer) == 1 and outer[0][:2] == (0, 0):
+        return inner
+    starts = [r[0] for r in outer]
+    runs = []
+    for out, mid, length in inner:
+        while length > 0:
+            k = bisect_right(starts, mid) - 1
+            o_start, raw, o_len = outer[k]
+            take = min(length, o_start + o_len - mid)
+            runs.append((out, raw + mid - o_start, take))
+            out, mid, length = out + take, mid + take, length - take
+    return runs
+
+
+# -------------------- NFKC WITH OFFSETS --------------------
+_COMPOSE_SECOND = None
+
+
+def _composes_with_previous(ch):
+    """True if ch can be the second half of a canonical composition."""
+    global _COMPOSE_SECOND
+    if _COMPOSE_SECOND is None:
+        seconds = set()
+        for cp in range(0x110000):
+            d = unicodedata.decomposition(chr(cp))
+            if d and not d.startswith("<"):
+                parts = d.split()
+                if len(parts) == 2:
+                    seconds.add(chr(int(parts[1], 16)))
+        # Hangul LV + T and L + V are composed algorithmically
+        seconds.update(chr(c) for c in range(0x1161, 0x1176))
+        seconds.update(chr(c) for c in range(0x11A8, 0x11C3))
+        _COMPOSE_SECOND = frozenset(seconds)
+    return ch in _COMPOSE_SECOND
+
+
+def _clusters(seg):
+    """Split seg before every starter that cannot compose with what precedes it."""
+    cuts = [0]
+    for k in range(1, len(seg)):
+        ch = seg[k]
+        if not unicodedata.combining(ch) and not _composes_with_previous(ch):
+            cuts.append(k)
+    cuts.append(len(seg))
+    return [(cuts[i], cuts[i + 1]) for i in range(len(cuts) - 1)]
+
+
+def _spread(out, raw, n_out, n_raw):
+    """Runs for n_out chars produced together from n_raw chars at raw: 1:1 when the
+    lengths agree, else all of them map to the start of their source."""
+    if n_out == n_raw:
+        return [(out, raw, n_out)]
+    return [(out + t, raw, 1) for t in range(n_out)]
+
+
+def _nfkc_runs(s):
+    """NFKC(s) and its runs. ASCII is NFKC-stable and never composes with what
+    precedes it, so each non-ASCII stretch (plus the char before it) is normalized
+    on its own, cluster by cluster when that reproduces the stretch exactly."""
+    nf = unicodedata.normalize("NFKC", s)
+    if nf == s:
+        return s, _identity(len(s))
+    pieces, runs, out, pos = [], [], 0, 0
+    for m in _NON_ASCII.finditer(s):
+        i = max(m.start() - 1, pos)
+        seg = s[i:m.end()]
+        nf = unicodedata.normalize("NFKC", seg)
+        if nf == seg:
+            continue
+        if i > pos:
+            pieces.append(s[pos:i])
+            runs.append((out, pos, i - pos))
+            out += i - pos
+        parts, seg_runs, o = [], [], out
+        for a, b in _clusters(seg):
+            c = unicodedata.normalize("NFKC", seg[a:b])
+            parts.append(c)
+            # a cluster is one starter plus its marks: 1:1 only if char-by-char
+            if len(c) == b - a and all(unicodedata.normalize("NFKC", ch) == n for ch, n in zip(seg[a:b], c)):
+                seg_runs.append((o, i + a, len(c)))
+            else:
+                seg_runs.extend(_spread(o, i + a, len(c), 0))
+            o += len(c)
+        if "".join(parts) != nf:
+            seg_runs = _spread(out, i, len(nf), len(seg))
+        pieces.append(nf)
+        runs.extend(seg_runs)
+        out += len(nf)
+        pos = m.end()
+    if pos < len(s):
+        pieces.append(s[pos:])
+        runs.append((out, pos, len(s) - pos))
+    return "".join(pieces), runs
+
+
+# -------------------- PIPELINE PROFILES --------------------
+# rtis/*.txt, redact_demo_updated, validate_gold, helper_index
+DEFAULT = Normalizer()
+# clean_preds.py: same plus collapsed spaces
+COLLAPSE_SPACES = Normalizer(collapse_spaces=True)
+# fix_preds.py: wider zero-width set, no quote/dash mapping, only CRLF folded; zero-width
+# characters go before spaces collapse, so "a \u200b b" -> "a b" (fix_preds.py's own
+# steps gave "a  b"; tests/test_textnorm.py)
+FIX_PREDS = Normalizer(delete=ZERO_WIDTH_ALL, replace={}, newlines=r"\r\n", collapse_spaces=True)
+
+normalize_text = DEFAULT.normalize
@@ -0,0 +1,179 @@
+# trace_events.py
+# Opt-in per-stage timing written as Chrome trace-event JSON (open the file in
+# https://ui.perfetto.dev or chrome://tracing). Stages are complete ("X") events;
+# a stage run inside another one (e.g. spacy_spans inside redact_document) shows
+# up nested under it, so a slow document can be attributed to a detector, dedupe
+# or file I/O. Off by default: stage() then returns a shared no-op context
+# manager, and start() / record() / timed() functions return at once, so
+# instrumented code pays one function call per stage. An observer (observe(),
+# e.g. memstats.MemoryAccounting) sees every stage too, with or without tracing.
+# Usage: --trace FILE on redact_demo_updated.py, fix_preds.py, clean_preds.py,
+# apply_redaction.py and apply_redaction_safe.py (worker processes included).
+import os
+import sys
+import json
+import atexit
+import time
+import functools
+import threading
+
+_EVENTS = None  # [(name, t0_ns, t1_ns, tid, args)] while tracing, None otherwise
+_MERGED = []    # Chrome events from other processes (see drain / extend)
+_PATH = None
+_OBSERVER = None  # enter(args) -> token, exit(name, args, token) -> extra event args
+_ON = False       # tracing or observing: stages have to be looked at
+
+
+def enable(path=None):
+    """Start recording; save() writes to `path` (None: only collect, e.g. in a worker)."""
+    global _EVENTS, _PATH, _ON
+    if _EVENTS is None:
+        _EVENTS = []
+    _PATH = path
+    _ON = True
+
+
+def observe(observer):
+    """Hand every stage to `observer` (None: stop), whether or not tracing is on."""
+    global _OBSERVER, _ON
+    _OBSERVER = observer
+    _ON = _EVENTS is not None or observer is not None
+
+
+def enabled():
+    return _EVENTS is not None
+
+
+_now = time.perf_counter_ns
+_tid = threading.get_native_id
+
+
+def _finish(name, t0, args, token):
+    t1 = _now()
+    if token is not None:
+        extra = _OBSERVER.exit(name, args, token)
+        if extra:
+            args = {**args, **extra}
+    if _EVENTS is not None:
+        _EVENTS.append((name, t0, t1, _tid(), args))
+
+
+class _Stage:
+    __slots__ = ("name", "args", "token", "t0")
+
+    def __init__(self, name, args):
+        # timed from here: stage() is always called right as the block is entered
+        self.name = name
+        self.args = args
+        self.token = None if _OBSERVER is None else _OBSERVER.enter(args)
+        self.t0 = _now()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _finish(self.name, self.t0, self.args, self.token)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name, **args):
+    """Context manager recording one stage (args end up in the event); no-op when off."""
+    if not _ON:
+        return _NO_STAGE
+    return _Stage(name, args)
+
+
+def start(**args):
+    """Handle for record(), or None while tracing is off; args are added to the event."""
+    return _Stage(None, args) if _ON else None
+
+
+def record(name, started, **args):
+    """Record a stage begun by started = start() that ends now (for code not shaped as a block)."""
+    if started is not None:
+        _finish(name, started.t0, {**started.args, **args}, started.token)
+
+
+def timed(name):
+    """Decorator: every call of the function is recorded as a `name` stage."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _ON:
+                return fn(*args, **kwargs)
+            with _Stage(name, {}):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def traced(name, iterable, **args):
+    """Yield from iterable, recording every step of it as a `name` stage (lazy pipelines)."""
+    it = iter(iterable)
+    while True:
+        with stage(name, **args):
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+        yield item
+
+
+def drain():
+    """This process's events in Chrome format, cleared here (a worker hands them to its parent)."""
+    global _EVENTS
+    if _EVENTS is None:
+        return []
+    pid = os.getpid()
+    # perf_counter_ns is the system-wide monotonic clock on Linux, so timestamps
+    # of different processes line up on one timeline
+    out = [{"name": name, "cat": "stage", "ph": "X", "ts": t0 / 1000, "dur": (t1 - t0) / 1000,
+            "pid": pid, "tid": tid, **({"args": args} if args else {})}
+           for name, t0, t1, tid, args in _EVENTS]
+    _EVENTS = []
+    return out
+
+
+def extend(events):
+    """Add events drained in another process."""
+    _MERGED.extend(events)
+
+
+def save(path=None):
+    """Write everything recorded so far (plus extend()ed events) as Chrome trace JSON."""
+    path = path or _PATH
+    if path is None or _EVENTS is None:
+        return
+    events = _MERGED + drain()
+    names = {os.getpid(): os.path.basename(sys.argv[0]) or "python"}
+    meta = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": names.get(pid, f"worker {pid}")}}
+            for pid in sorted({e["pid"] for e in events} | set(names))]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+    _MERGED.clear()
+    _MERGED.extend(events)  # a later save() rewrites the whole run
+
+
+def from_argv(argv=None):
+    """Enable tracing if argv has --trace FILE; the file is written at exit."""
+    argv = sys.argv if argv is None else argv
+    if "--trace" not in argv:
+        return False
+    i = argv.index("--trace")
+    if i + 1 >= len(argv):
+        sys.exit("--trace needs a file name")
+    enable(argv[i + 1])
+    atexit.register(save)
+    return True
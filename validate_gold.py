@@ -1,17 +1,10 @@
 # validate_gold.py
 import json
 import os
-import unicodedata
 import argparse
 import textwrap
 
-def normalize_text(s: str) -> str:
-    s = unicodedata.normalize("NFKC", s)
-    s = s.replace("\u200c","").replace("\u200d","").replace("\ufeff","")
-    s = s.replace("“",'\"').replace("”",'\"').replace("’","'").replace("‘","'")
-    s = s.replace("—","-").replace("–","-")
-    s = s.replace("\r\n","\n").replace("\r","\n")
-    return s
+from textnorm import normalize_text
 
 def load_gold(path):
     with open(path, "r", encoding="utf-8") as f:
@@ -109,9 +102,8 @@ def inspect(gold_path="gold.json", rtis_dir="rtis", write_bad="bad_spans.json",
 python
 from pathlib import Path
 s = Path('rtis/sample1.txt').read_text(encoding='utf-8')
-import unicodedata
-def norm(x): return unicodedata.normalize('NFKC', x).replace('\\u200c','').replace('\\u200d','').replace('\\ufeff','')
-s2 = norm(s)
+from textnorm import normalize_text
+s2 = normalize_text(s)
 sub = 'THE EXACT SUBSTRING YOU WANT'
 print(s2.index(sub), s2.index(sub)+len(sub))
 """, "    "))